@@ -23,10 +23,15 @@ CONFIG = {
 # TradingView signal interpretation
 # Based on common indicators: EMA, RSI, MTI
 class TradingViewSignal:
-    def __init__(self, price: float, ema_9: float, rsi: float = 50):
+    def __init__(self, price: float, ema_9: float, rsi: float = 50, symbol: str = None,
+                 timeframe: str = None, received: float = None):
         self.price = price
         self.ema_9 = ema_9
         self.rsi = rsi
+        # Set for signals from webhook alerts (received = perf_counter at receipt)
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.received = received
         
     def get_direction(self) -> str:
         """Determine trade direction based on indicators"""
@@ -56,14 +61,37 @@ class TradingViewSignal:
 
 
 class AftermathBot:
-    def __init__(self, config: dict = CONFIG):
+    def __init__(self, config: dict = CONFIG, candles=None, symbol: str = "BTC-PERP", journal=None):
         self.config = config
+        self.symbol = symbol
         self.position = None  # "long", "short", or None
         self.entry_price = 0
         self.position_size = 0
+        # Optional candle_store.CandleStore - indicators computed in-process
+        self.candles = candles
+        # Optional state_journal.StateJournal - position changes survive restarts
+        self.journal = journal
         
-    async def get_market_data(self, symbol: str) -> dict:
+    def restore(self) -> bool:
+        """Reload this symbol's open position from the journal after a restart"""
+        if self.journal is None:
+            return False
+        saved = self.journal.replay()["positions"].get(self.symbol)
+        if not saved:
+            return False
+        self.position = saved["side"]
+        self.entry_price = saved["entry_price"]
+        self.position_size = saved["size"]
+        print(f"Restored {self.position} {self.symbol} position: {self.position_size} at {self.entry_price}")
+        return True
+        
+    async def get_market_data(self, symbol: str, timeframe: str = "5m") -> dict:
         """Fetch market data from Aftermath API"""
+        if self.candles is not None:
+            latest = self.candles.latest(symbol, timeframe)
+            if latest:
+                return latest
+        
         # Using CCXT-compatible endpoints
         endpoint = f"{self.config['aftermath_api']}/api/ccxt/v1/markets/{symbol}"
         # Note: Implement actual API call here
@@ -80,6 +108,8 @@ class AftermathBot:
         self.position = direction
         self.entry_price = price
         self.position_size = size
+        if self.journal is not None:
+            self.journal.append("position_open", self.symbol, side=direction, entry_price=price, size=size)
         print(f"Opened {direction} position: {size} at {price}")
         
     async def close_position(self, price: float):
@@ -89,6 +119,8 @@ class AftermathBot:
             
         pnl = self.calculate_pnl(price)
         print(f"Closed {self.position} position at {price}. PnL: {pnl:.2f} USDC")
+        if self.journal is not None:
+            self.journal.append("position_close", self.symbol, side=self.position, exit_price=price, pnl=pnl)
         self.position = None
         self.entry_price = 0
         self.position_size = 0
@@ -134,15 +166,24 @@ class AftermathBot:
         return False
 
 
+def alert_symbols(market: str) -> list:
+    """TradingView tickers whose alerts are about this Aftermath market: 'BTC-PERP' -> BTCUSD, BTCUSDT, ..."""
+    base = market.split("-")[0].upper()
+    return [market.upper(), f"{base}USD", f"{base}USDT", f"{base}PERP"]
+
+
 # Placeholder for TradingView browser integration
 # In production, this would read from the browser or TradingView API
-async def get_tradingview_signal() -> Optional[TradingViewSignal]:
+async def get_tradingview_signal(alerts=None, timeout: float = None) -> Optional[TradingViewSignal]:
     """
     Get current signal from TradingView chart.
     
+    With `alerts` (a webhook_server.WebhookServer), waits up to `timeout`
+    seconds for the next TradingView webhook alert and returns its signal.
+    
     To integrate with your actual chart:
     1. Use browser automation to read the chart values
-    2. Or use TradingView's Webhook/Alert API
+    2. Or use TradingView's Webhook/Alert API (webhook_server.py)
     3. Or use TradingView's Pine Scripts to output signals
     
     Current chart shows:
@@ -150,11 +191,47 @@ async def get_tradingview_signal() -> Optional[TradingViewSignal]:
     - EMA 9: $67,129.92
     - RSI: Not visible in current snapshot (would need to check indicator panel)
     """
+    if alerts is not None:
+        return await alerts.get(timeout)
     # This would be replaced with actual TradingView data fetch
     # For now, returns placeholder
     return None
 
 
+async def run_on_ticks(bot: AftermathBot, source, symbol: str = "BTCUSD", timeframe: str = "5m"):
+    """
+    Event-driven loop: every tick from `source` (a price_feed source)
+    checks exits immediately and re-scores the signal from the candles.
+    """
+    from candle_store import CandleStore
+    from tick_dispatcher import TickDispatcher
+    
+    if bot.candles is None:
+        bot.candles = CandleStore([symbol], [timeframe])
+    
+    async def on_tick(tick: dict):
+        price = tick["price"]
+        bot.candles.on_tick(symbol, price, tick["volume"], tick["timestamp"])
+        
+        # Check exit conditions first - straight off the tick
+        if bot.position:
+            if await bot.check_stop_loss(price) or await bot.check_take_profit(price):
+                await bot.close_position(price)
+            return
+        
+        market = bot.candles.latest(symbol, timeframe)
+        if not market["ema_9"]:
+            return  # EMA still warming up
+        signal = TradingViewSignal(price, market["ema_9"], market["rsi"])
+        strength = signal.get_strength()
+        if strength > 0.7:
+            print(f"Signal: {signal.get_direction()} (strength: {strength:.2f})")
+            # Open position based on signal
+    
+    dispatcher = TickDispatcher(source, on_tick, symbols=[symbol])
+    await dispatcher.run()
+
+
 async def main():
     """Main trading loop"""
     bot = AftermathBot()
@@ -162,10 +239,29 @@ async def main():
     print("Starting Aftermath Trading Bot...")
     print(f"Wallet: {CONFIG['wallet_address'][:10]}...")
     
+    # With a tick feed configured, react to ticks instead of polling
+    if os.getenv("PRICE_FEED_URL"):
+        from price_feed import WebSocketPriceFeed
+        feed = WebSocketPriceFeed(os.environ["PRICE_FEED_URL"])
+        try:
+            await run_on_ticks(bot, feed)
+        finally:
+            await feed.close()
+        return
+    
+    # With a webhook secret, TradingView alerts are the signal source
+    alerts = None
+    if os.getenv("WEBHOOK_SECRET"):
+        from webhook_server import WebhookServer
+        # Alerts for other charts are refused, not traded on this market
+        alerts = WebhookServer(os.environ["WEBHOOK_SECRET"], symbols=alert_symbols(bot.symbol))
+        await alerts.start()
+        print(f"Waiting for TradingView alerts on port {alerts.port}")
+    
     while True:
         try:
             # Get TradingView signal
-            signal = await get_tradingview_signal()
+            signal = await get_tradingview_signal(alerts, timeout=CONFIG["tradingview_check_interval"])
             
             if signal:
                 direction = signal.get_direction()
@@ -188,7 +284,8 @@ async def main():
                     elif await bot.check_take_profit(current_price):
                         await bot.close_position(current_price)
                         
-            await asyncio.sleep(CONFIG["tradingview_check_interval"])
+            if alerts is None:
+                await asyncio.sleep(CONFIG["tradingview_check_interval"])
             
         except Exception as e:
             print(f"Error: {e}")
@@ -3,13 +3,15 @@
 Autonomous Trading Bot
 Runs hourly, checks prices, executes trades based on strategy
 """
+import asyncio
 import os
 import json
-import time
-import requests
+import re
 
-BANKR_API_KEY = "bk_3GKNL8C5S6Z9WQEXVU6E43S92626PNZW"
-API_URL = "https://api.bankr.bot"
+from bankr_client import get_client
+from idempotency import order_key
+from price_feed import default_price_source, parse_prompt_prices
+from state_journal import StateJournal
 
 # Strategy: Arcturus (bearish)
 # Bias: 0/10 bearish
@@ -27,53 +29,38 @@ STRATEGY = {
     "leverage": 10,
 }
 
-def submit_prompt(prompt):
-    url = f"{API_URL}/agent/prompt"
-    headers = {"X-API-Key": BANKR_API_KEY, "Content-Type": "application/json"}
-    resp = requests.post(url, headers=headers, json={"prompt": prompt}, timeout=30)
-    return resp.json()
-
-def check_job(job_id):
-    url = f"{API_URL}/agent/job/{job_id}"
-    headers = {"X-API-Key": BANKR_API_KEY}
-    resp = requests.get(url, headers=headers, timeout=30)
-    return resp.json()
-
-def wait_for_completion(job_id, timeout=180):
-    start = time.time()
-    while time.time() - start < timeout:
-        result = check_job(job_id)
-        if result.get("status") == "completed":
-            return result
-        if result.get("status") in ["failed", "cancelled"]:
-            return result
-        time.sleep(10)
-    return {"status": "timeout"}
-
-def get_prices():
+async def submit_prompt(prompt):
+    return await get_client().submit_prompt(prompt)
+
+async def check_job(job_id):
+    return await get_client().check_job(job_id)
+
+async def wait_for_completion(job_id, timeout=180):
+    return await get_client().wait_for_completion(job_id, timeout=timeout)
+
+async def get_prices(source=None):
     """Get current BTC and SOL prices"""
-    result = submit_prompt("what is the current price of BTC and SOL?")
-    job_id = result.get("jobId")
-    if not job_id:
+    owned = source is None
+    if owned:
+        source = default_price_source(os.environ.get("PRICE_REPLAY_FILE"))
+    try:
+        prices = await source.get_prices(["BTC", "SOL"])
+    finally:
+        if owned:
+            await source.close()
+    if not prices:
         print("Error getting prices")
         return None
-    
-    completed = wait_for_completion(job_id)
-    if completed.get("status") != "completed":
-        print("Price check timeout")
-        return None
-    
-    response = completed.get("response", "")
-    return response
+    return prices
 
-def get_balance():
+async def get_balance():
     """Get current portfolio balance"""
-    result = submit_prompt("show my full balance on all networks")
+    result = await submit_prompt("show my full balance on all networks")
     job_id = result.get("jobId")
     if not job_id:
         return None
     
-    completed = wait_for_completion(job_id)
+    completed = await wait_for_completion(job_id)
     if completed.get("status") != "completed":
         return None
     
@@ -81,19 +68,7 @@ def get_balance():
 
 def parse_prices(text):
     """Parse BTC and SOL prices from response"""
-    import re
-    prices = {}
-    
-    # Match patterns like "$67,970" or "67,970.00"
-    btc_match = re.search(r'btc.*?\$?([\d,]+)', text, re.IGNORECASE)
-    sol_match = re.search(r'sol.*?\$?([\d,]+)', text, re.IGNORECASE)
-    
-    if btc_match:
-        prices['BTC'] = float(btc_match.group(1).replace(',', ''))
-    if sol_match:
-        prices['SOL'] = float(sol_match.group(1).replace(',', ''))
-    
-    return prices
+    return parse_prompt_prices(text, ["BTC", "SOL"])
 
 def should_trade(prices):
     """Determine if strategy conditions are met"""
@@ -113,62 +88,174 @@ def should_trade(prices):
     
     return None, f"Outside entry zone - BTC ${btc}, SOL ${sol}"
 
-def open_position(token, collateral=10, leverage=10):
+def open_key(token, collateral, leverage):
+    """Order key for opening a short - the same order is only ever submitted once"""
+    return order_key("open_position", token, "short", collateral, leverage)
+
+async def open_position(token, collateral=10, leverage=10, journal=None):
     """Open leveraged position"""
     prompt = f"open {leverage}x short on {token} with {collateral} usd collateral on avantis"
     print(f"Executing: {prompt}")
     
-    result = submit_prompt(prompt)
+    key = open_key(token, collateral, leverage)
+    result = await get_client().submit_once(key, prompt)
     job_id = result.get("jobId")
     
     if not job_id:
         return {"status": "error", "message": "Failed to submit"}
     
+    if journal is not None and not result.get("deduplicated"):
+        journal.append("job_submitted", job_id, purpose="open_position", token=token, side="short",
+                       collateral=collateral, leverage=leverage)
+    
+    return await finish_open(job_id, token, journal, key)
+
+def failed_response(response):
+    """A completed Bankr reply that is really an error message"""
+    return "error" in response.lower() or "could not" in response.lower()
+
+async def finish_open(job_id, token, journal=None, key=None):
+    """Wait for an open-position job and record the outcome"""
     # Wait for completion
-    completed = wait_for_completion(job_id, timeout=300)
+    completed = await wait_for_completion(job_id, timeout=300)
+    if key is not None:
+        get_client().record_result(key, completed)
     
     if completed.get("status") == "completed":
         response = completed.get("response", "")
-        if "error" in response.lower() or "could not" in response.lower():
-            return {"status": "failed", "message": response}
-        return {"status": "success", "message": response}
+        if failed_response(response):
+            outcome = {"status": "failed", "message": response}
+        else:
+            outcome = {"status": "success", "message": response}
+        if journal is not None:
+            journal.append("job_finished", job_id, status=outcome["status"])
+            if outcome["status"] == "success":
+                journal.append("position_open", token, side="short", job_id=job_id)
+        return outcome
+    
+    if completed.get("status") in ["failed", "cancelled"] and journal is not None:
+        journal.append("job_finished", job_id, status=completed["status"])
     
+    # Still running - the journal keeps the jobId so the next run picks it up
     return {"status": "pending", "job_id": job_id}
 
-def main():
+async def main():
     print("=" * 50)
     print("AUTONOMOUS TRADING BOT - Arcturus Strategy")
     print("=" * 50)
     
-    # Get prices
-    print("\n[1] Fetching prices...")
-    price_text = get_prices()
-    if not price_text:
-        print("Failed to get prices")
+    # Pick up where the last run left off
+    journal = StateJournal()
+    try:
+        await trade(journal)
+    finally:
+        journal.close()
+
+async def position_status(token):
+    """
+    Ask Bankr whether the token's Avantis short is still open: "open",
+    "closed", or None when the answer is missing, an error, or unclear.
+    """
+    prompt = (f"do I still have an open {token} short position on avantis? "
+              f"answer with the single word OPEN or CLOSED")
+    completed = await get_client().run_prompt(prompt, timeout=180)
+    if completed.get("status") != "completed":
+        return None
+    response = completed.get("response", "")
+    if failed_response(response):
+        return None
+    words = set(re.findall(r"[a-z]+", response.lower()))
+    if "closed" in words and "open" not in words:
+        return "closed"
+    if "open" in words and "closed" not in words:
+        return "open"
+    return None
+
+async def reconcile_positions(journal, state):
+    """
+    Close journaled positions Bankr confirms are closed (take-profit hit,
+    or closed by hand), so they don't block that token forever. Anything
+    short of a clear "closed" keeps the position - a wrong close would let
+    the next run open a duplicate short.
+    """
+    tokens = list(state["positions"])
+    if not tokens:
         return
+    statuses = await asyncio.gather(*(position_status(token) for token in tokens), return_exceptions=True)
+    for token, status in zip(tokens, statuses):
+        if isinstance(status, Exception):
+            print(f"Error checking the {token} position: {status} - keeping it")
+        elif status == "closed":
+            print(f"{token} short confirmed closed on Bankr - marking it closed")
+            journal.append("position_close", token, side="short", reason="closed on bankr")
+            del state["positions"][token]
+        elif status is None:
+            print(f"Could not confirm the {token} position - keeping it")
+
+async def trade(journal):
+    state = journal.replay()
+    for job_id, job in state["jobs"].items():
+        if job.get("purpose") == "open_position":
+            print(f"\n[0] Resuming in-flight {job['token']} order (job {job_id})...")
+            key = open_key(job["token"], job.get("collateral"), job.get("leverage"))
+            get_client().orders.put(key, job_id=job_id)
+            try:
+                print(f"Result: {await finish_open(job_id, job['token'], journal, key)}")
+            except Exception as e:
+                # The job stays in the journal for the next run
+                print(f"Error resuming job {job_id}: {e}")
     
-    prices = parse_prices(price_text)
-    print(f"Prices: {prices}")
-    
-    # Check strategy
-    print("\n[2] Checking strategy conditions...")
-    token, reason = should_trade(prices)
-    print(f"Signal: {token} - {reason}")
+    # Resumed orders may have opened positions; then drop the ones closed since
+    state = journal.replay()
+    await reconcile_positions(journal, state)
+    state = journal.replay()
     
-    # Get balance
-    print("\n[3] Checking balance...")
-    balance = get_balance()
+    # Balance doesn't depend on prices - fetch both at once
+    balance_task = asyncio.create_task(get_balance())
+    try:
+        # Get prices
+        print("\n[1] Fetching prices...")
+        prices = await get_prices()
+        if not prices:
+            print("Failed to get prices")
+            return
+        
+        print(f"Prices: {prices}")
+        
+        # Check strategy
+        print("\n[2] Checking strategy conditions...")
+        token, reason = should_trade(prices)
+        print(f"Signal: {token} - {reason}")
+        
+        # Get balance
+        print("\n[3] Checking balance...")
+        balance = await balance_task
+    finally:
+        # No prices (or an error) - don't leave the balance request running
+        if not balance_task.done():
+            balance_task.cancel()
     print(f"Balance: {balance[:200] if balance else 'Failed'}")
     
     # Decision
-    if token:
+    if token and token in state["positions"]:
+        print(f"\n[4] TRADE SIGNAL: {token} - already short, not opening another")
+    elif token and any(job.get("token") == token for job in state["jobs"].values()):
+        print(f"\n[4] TRADE SIGNAL: {token} - order still pending, not resubmitting")
+    elif token:
         print(f"\n[4] TRADE SIGNAL: {token}")
-        result = open_position(token, collateral=STRATEGY['min_collateral'], leverage=STRATEGY['leverage'])
+        result = await open_position(token, collateral=STRATEGY['min_collateral'],
+                                     leverage=STRATEGY['leverage'], journal=journal)
         print(f"Result: {result}")
     else:
         print("\n[4] No trade - conditions not met")
     
     print("\n" + "=" * 50)
 
+async def run():
+    try:
+        await main()
+    finally:
+        await get_client().close()
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(run())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Vectorized Backtester
+Replays historical OHLCV bars through the bot's signal rules
+
+Signals are evaluated as NumPy array operations over the whole history, then
+trades are simulated with AftermathBot's rules: enter when a signal is strong
+enough and no position is open, exit on the stop-loss / take-profit
+percentages from CONFIG, PnL as in calculate_pnl.
+
+Usage:
+    python3 backtester.py --data btc_1m.csv --symbol BTCUSDT
+    python3 backtester.py --data btc_1m.parquet --rule tradingview_signal
+
+Data files need open/high/low/close columns (time and volume optional).
+ema_9 and rsi columns are used if present, otherwise computed.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aftermath_bot import CONFIG
+from signal_rules import SignalRule
+from tradingview_reader import CHART_CONFIG, RULES
+
+LONG, NEUTRAL, SHORT = 1, 0, -1
+
+# Same threshold main.py uses before opening a position
+DEFAULT_MIN_STRENGTH = 0.7
+
+# Bars scanned at a time when looking for a trade's exit
+EXIT_SCAN_CHUNK = 4096
+
+
+def load_bars(path: str) -> Dict[str, np.ndarray]:
+    """
+    Load OHLCV bars from a CSV or Parquet file into float arrays.
+
+    Parquet needs pandas + pyarrow. CSV uses pandas when installed and
+    falls back to NumPy's loader otherwise.
+    """
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Reading Parquet needs pandas and pyarrow: pip install pandas pyarrow")
+        frame = pd.read_parquet(path)
+        columns = {str(c).lower(): frame[c].to_numpy(dtype=np.float64) for c in frame.columns
+                   if np.issubdtype(frame[c].dtype, np.number)}
+    else:
+        try:
+            import pandas as pd
+            frame = pd.read_csv(path)
+            columns = {str(c).lower(): frame[c].to_numpy(dtype=np.float64) for c in frame.columns
+                       if np.issubdtype(frame[c].dtype, np.number)}
+        except ImportError:
+            table = np.genfromtxt(path, delimiter=",", names=True, dtype=np.float64)
+            columns = {name.lower(): np.asarray(table[name]) for name in table.dtype.names}
+
+    if "close" not in columns:
+        raise ValueError(f"{path}: no close column")
+    return prepare_bars(columns)
+
+
+def prepare_bars(bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Fill in missing OHLC/volume columns and the indicators the rules need"""
+    close = np.asarray(bars["close"], dtype=np.float64)
+    prepared = {"close": close}
+    for name in ("open", "high", "low"):
+        prepared[name] = np.asarray(bars.get(name, close), dtype=np.float64)
+    prepared["volume"] = np.asarray(bars.get("volume", np.zeros_like(close)), dtype=np.float64)
+    if "time" in bars:
+        prepared["time"] = np.asarray(bars["time"], dtype=np.float64)
+
+    indicators = CHART_CONFIG["indicators"]
+    prepared["ema_9"] = (np.asarray(bars["ema_9"], dtype=np.float64) if "ema_9" in bars
+                         else ema(close, indicators["EMA"]["length"]))
+    prepared["rsi"] = (np.asarray(bars["rsi"], dtype=np.float64) if "rsi" in bars
+                       else rsi(close, indicators["RSI"]["length"]))
+    return prepared
+
+
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """EMA seeded with the SMA of the first `length` values (NaN before)"""
+    out = np.full(len(values), np.nan)
+    if len(values) < length:
+        return out
+    alpha = 2 / (length + 1)
+    current = float(values[:length].mean())
+    out[length - 1] = current
+    # The recursion is inherently sequential; plain floats keep it fast
+    tail = values[length:].tolist()
+    result = out[length:]
+    for i, value in enumerate(tail):
+        current += alpha * (value - current)
+        result[i] = current
+    return out
+
+
+def rsi(close: np.ndarray, length: int) -> np.ndarray:
+    """RSI with Wilder's smoothing (NaN until `length` changes are seen)"""
+    out = np.full(len(close), np.nan)
+    if len(close) <= length:
+        return out
+    change = np.diff(close)
+    gains = np.maximum(change, 0.0)
+    losses = np.maximum(-change, 0.0)
+    avg_gain = np.empty(len(change) - length + 1)
+    avg_loss = np.empty_like(avg_gain)
+    g, l = gains[:length].mean(), losses[:length].mean()
+    avg_gain[0], avg_loss[0] = g, l
+    keep = (length - 1) / length
+    for i, (gain, loss) in enumerate(zip(gains[length:].tolist(), losses[length:].tolist()), 1):
+        g = g * keep + gain / length
+        l = l * keep + loss / length
+        avg_gain[i], avg_loss[i] = g, l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), values)
+    out[length:] = values
+    return out
+
+
+def calculate_signal_vec(price: np.ndarray, ema_9: np.ndarray, rsi_: np.ndarray,
+                         symbol: str = "BTCUSDT", levels: Optional[dict] = None) -> Dict[str, np.ndarray]:
+    """
+    tradingview_reader.calculate_signal over whole arrays.
+
+    Returns {"direction": int8 array (LONG/NEUTRAL/SHORT), "strength": float array}.
+    `levels` overrides the symbol's TRADING_LEVELS entry (parameter sweeps).
+    """
+    rule = RULES.get(symbol) if levels is None else SignalRule.from_levels(levels)
+    return rule.evaluate_batch(price, ema_9, rsi_)
+
+
+def tradingview_signal_vec(price: np.ndarray, ema_9: np.ndarray, rsi_: np.ndarray) -> Dict[str, np.ndarray]:
+    """aftermath_bot.TradingViewSignal.get_direction/get_strength over whole arrays"""
+    direction = np.zeros(len(price), dtype=np.int8)
+    direction[(price > ema_9) & (rsi_ < 70)] = LONG
+    direction[(price < ema_9) & (rsi_ > 30)] = SHORT
+    strength = 0.5 + np.where(price > ema_9, 0.25, -0.25) + np.where((rsi_ > 30) & (rsi_ < 70), 0.25, 0.0)
+    return {"direction": direction, "strength": np.clip(strength, 0, 1)}
+
+
+SIGNAL_RULES = {
+    "calculate_signal": lambda bars, symbol, levels: calculate_signal_vec(
+        bars["close"], bars["ema_9"], bars["rsi"], symbol, levels),
+    "tradingview_signal": lambda bars, symbol, levels: tradingview_signal_vec(
+        bars["close"], bars["ema_9"], bars["rsi"]),
+}
+
+
+def _first_exit(close: np.ndarray, start: int, side: int, stop: float, target: float) -> int:
+    """Index of the first bar at/after `start` that hits stop or target, or -1"""
+    n = len(close)
+    while start < n:
+        window = close[start:start + EXIT_SCAN_CHUNK]
+        if side == LONG:
+            hit = (window < stop) | (window > target)
+        else:
+            hit = (window > stop) | (window < target)
+        if hit.any():
+            return start + int(hit.argmax())
+        start += EXIT_SCAN_CHUNK
+    return -1
+
+
+def simulate(close: np.ndarray, direction: np.ndarray, strength: np.ndarray,
+             config: dict = CONFIG, min_strength: float = DEFAULT_MIN_STRENGTH,
+             position_size: Optional[float] = None) -> Dict:
+    """
+    Trade the signals one position at a time, like AftermathBot.
+
+    Enters at the close of a bar whose signal is non-neutral with strength
+    above `min_strength`; exits when check_stop_loss / check_take_profit
+    would fire on a later close; a position still open at the end is closed
+    on the last bar. Size defaults to max_position_size USDC worth of units.
+    """
+    stop_pct = config["stop_loss_pct"] / 100
+    tp_pct = config["take_profit_pct"] / 100
+    n = len(close)
+
+    entries = np.flatnonzero((direction != NEUTRAL) & (strength > min_strength))
+    trades = []
+    bar = 0
+    while True:
+        k = np.searchsorted(entries, bar)
+        if k >= len(entries):
+            break
+        i = int(entries[k])
+        side = int(direction[i])
+        entry = float(close[i])
+        if side == LONG:
+            stop, target = entry * (1 - stop_pct), entry * (1 + tp_pct)
+        else:
+            stop, target = entry * (1 + stop_pct), entry * (1 - tp_pct)
+        j = _first_exit(close, i + 1, side, stop, target)
+        if j < 0:
+            j = n - 1
+        size = position_size if position_size is not None else config["max_position_size"] / entry
+        trades.append((i, j, side, entry, float(close[j]), size))
+        bar = j + 1
+
+    log = np.array(trades, dtype=[("entry_bar", np.int64), ("exit_bar", np.int64), ("side", np.int8),
+                                  ("entry_price", np.float64), ("exit_price", np.float64),
+                                  ("size", np.float64)])
+    pnl = (log["exit_price"] - log["entry_price"]) * log["size"] * log["side"]
+
+    # Bar-by-bar equity: realized PnL plus the open trade marked to market
+    equity = np.zeros(n)
+    if len(log):
+        realized = np.zeros(n)
+        np.add.at(realized, log["exit_bar"], pnl)
+        equity = np.cumsum(realized)
+        for (i, j, side, entry, _, size) in trades:
+            if j > i:
+                equity[i:j] += (close[i:j] - entry) * size * side
+    peak = np.maximum.accumulate(np.maximum(equity, 0))
+    drawdown = float((peak - equity).max()) if n else 0.0
+
+    return {
+        "trades": len(log),
+        "pnl": float(pnl.sum()),
+        "max_drawdown": drawdown,
+        "hit_rate": float((pnl > 0).mean()) if len(log) else 0.0,
+        "wins": int((pnl > 0).sum()),
+        "losses": int((pnl <= 0).sum()),
+        "trade_log": log,
+        "trade_pnl": pnl,
+        "equity": equity,
+    }
+
+
+def run_backtest(bars: Dict[str, np.ndarray], rule: str = "calculate_signal", symbol: str = "BTCUSDT",
+                 levels: Optional[dict] = None, config: dict = CONFIG,
+                 min_strength: float = DEFAULT_MIN_STRENGTH, position_size: Optional[float] = None) -> Dict:
+    """Evaluate a signal rule over prepared bars and simulate the trades"""
+    if rule not in SIGNAL_RULES:
+        raise ValueError(f"Unknown rule {rule!r}, expected one of {sorted(SIGNAL_RULES)}")
+    signals = SIGNAL_RULES[rule](bars, symbol, levels)
+    return simulate(bars["close"], signals["direction"], signals["strength"],
+                    config=config, min_strength=min_strength, position_size=position_size)
+
+
+def print_report(result: Dict, elapsed: float, bars: int):
+    print(f"""
+📊 Backtest ({bars:,} bars in {elapsed:.2f}s)
+   Trades:       {result['trades']}  ({result['wins']} won / {result['losses']} lost)
+   Hit rate:     {result['hit_rate'] * 100:.1f}%
+   PnL:          {result['pnl']:,.2f} USDC
+   Max drawdown: {result['max_drawdown']:,.2f} USDC""")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the bot's signal rules")
+    parser.add_argument("--data", required=True, help="CSV or Parquet file of OHLCV bars")
+    parser.add_argument("--symbol", default="BTCUSDT", help="Symbol for TRADING_LEVELS")
+    parser.add_argument("--rule", choices=sorted(SIGNAL_RULES), default="calculate_signal")
+    parser.add_argument("--min-strength", type=float, default=DEFAULT_MIN_STRENGTH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bars = load_bars(args.data)
+    result = run_backtest(bars, args.rule, args.symbol, min_strength=args.min_strength)
+    print_report(result, time.perf_counter() - start, len(bars["close"]))
@@ -0,0 +1,367 @@
+"""
+Bankr API Client
+Shared async client for the Bankr AI agent API
+
+One keep-alive connection pool serves every caller, requests run with
+per-call timeouts and a concurrency cap, and transient failures are retried
+with jittered exponential backoff. Nothing here blocks the event loop, so
+orders and status checks for several symbols can be in flight at once.
+
+Usage:
+    from bankr_client import get_client
+    client = get_client()
+    job = await client.submit_prompt("what is my portfolio balance?")
+    result = await client.wait_for_completion(job["jobId"])
+
+Outstanding jobs are polled by one shared JobTracker: quickly right after
+submission, then backing off, and callers await futures instead of sleeping.
+
+Orders go through run_order(key, prompt): the key is looked up in an
+IdempotencyCache first, so retrying an order that timed out waits on the
+job already submitted instead of placing it twice.
+"""
+
+import asyncio
+import heapq
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from idempotency import DEFAULT_TTL, IdempotencyCache
+from metrics import incr, span
+
+# Bankr API configuration
+BANKR_API_KEY = os.environ.get("BANKR_API_KEY", "bk_3GKNL8C5S6Z9WQEXVU6E43S92626PNZW")
+BANKR_API_URL = "https://api.bankr.bot"
+
+DEFAULT_TIMEOUT = 30  # seconds per HTTP call
+DEFAULT_CONCURRENCY = 8  # requests in flight at once
+DEFAULT_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 8.0
+
+# Worth retrying - rate limited or the server is having a moment
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Job polling: fast at first, then exponential backoff up to the cap
+POLL_INITIAL = 0.25  # seconds
+POLL_FACTOR = 2.0
+POLL_CAP = 5.0
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class BankrError(Exception):
+    """Bankr request failed after all retries"""
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class BankrClient:
+    def __init__(self, api_key: str = BANKR_API_KEY, base_url: str = BANKR_API_URL,
+                 timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 retries: int = DEFAULT_RETRIES, order_ttl: float = DEFAULT_TTL):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._tracker: Optional["JobTracker"] = None
+        self.orders = IdempotencyCache(ttl=order_ttl)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        # A session is tied to its event loop; CLI scripts call asyncio.run repeatedly
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-API-Key": self.api_key},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def request(self, method: str, path: str, json: Optional[dict] = None,
+                      timeout: Optional[float] = None, retry_post: bool = False) -> dict:
+        """
+        Make one API call, retrying transient failures.
+
+        GETs are retried on connection errors, timeouts and RETRY_STATUSES.
+        POSTs are only retried when the request never reached the server
+        (connect errors) or was rejected with 429, unless `retry_post` is
+        set - a blind retry could submit the same trade twice.
+        """
+        session = await self._get_session()
+        call_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        url = f"{self.base_url}{path}"
+        idempotent = method == "GET" or retry_post
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    async with session.request(method, url, json=json, timeout=call_timeout) as response:
+                        if response.status in RETRY_STATUSES and (idempotent or response.status == 429):
+                            last_error = BankrError(f"{method} {path}: HTTP {response.status}")
+                        else:
+                            return await response.json(content_type=None)
+            except aiohttp.ClientConnectorError as e:
+                last_error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if not idempotent:
+                    incr("bankr_errors")
+                    raise BankrError(f"{method} {path}: {e!r}") from e
+                last_error = e
+
+            if attempt < self.retries:
+                incr("bankr_retries")
+                await asyncio.sleep(backoff_delay(attempt))
+
+        incr("bankr_errors")
+        raise BankrError(f"{method} {path} failed after {self.retries + 1} attempts: {last_error!r}")
+
+    async def submit_prompt(self, prompt: str, thread_id: str = None, timeout: Optional[float] = None) -> dict:
+        """Submit a prompt to Bankr AI agent"""
+        data = {"prompt": prompt}
+        if thread_id:
+            data["threadId"] = thread_id
+        with span("bankr_submit"):
+            return await self.request("POST", "/agent/prompt", json=data, timeout=timeout)
+
+    async def check_job(self, job_id: str, timeout: Optional[float] = None) -> dict:
+        """Check job status"""
+        return await self.request("GET", f"/agent/job/{job_id}", timeout=timeout)
+
+    async def wait_for_completion(self, job_id: str, timeout: float = 120) -> dict:
+        """Wait for job to complete"""
+        # Shielded: the future may be shared with other callers of the same job
+        with span("bankr_wait"):
+            return await asyncio.shield(self.track_job(job_id, timeout))
+
+    def track_job(self, job_id: str, timeout: float = 120) -> "asyncio.Future":
+        """
+        Future resolved with the job's final status.
+
+        All tracked jobs share one poller task; resolves to
+        {"status": "timeout", ...} if the job outlives `timeout`.
+        """
+        loop = asyncio.get_running_loop()
+        if self._tracker is None or self._tracker.loop is not loop:
+            self._tracker = JobTracker(self)
+        return self._tracker.track(job_id, timeout)
+
+    async def run_prompt(self, prompt: str, timeout: float = 120) -> dict:
+        """Submit a prompt and wait for its job; returns the submit response if no job was created"""
+        result = await self.submit_prompt(prompt)
+        job_id = result.get("jobId")
+        if not job_id:
+            return result
+        return await self.wait_for_completion(job_id, timeout=timeout)
+
+    async def submit_once(self, key: str, prompt: str, timeout: Optional[float] = None) -> dict:
+        """
+        Submit `prompt` unless order `key` already has a job.
+
+        Returns the submit response, or {"jobId": ..., "deduplicated": True}
+        for a key seen within the TTL. Concurrent calls with the same key
+        share a single submission.
+        """
+        entry = self.orders.get(key)
+        if entry is not None and entry.get("jobId"):
+            incr("orders_deduplicated")
+            return {"jobId": entry["jobId"], "deduplicated": True}
+        pending = self.orders.claim(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        try:
+            result = await self.submit_prompt(prompt, timeout=timeout)
+        except BaseException as e:
+            # No jobId came back, so nothing is remembered and a retry submits again
+            self.orders.release(key, error=e)
+            raise
+        if result.get("jobId"):
+            self.orders.put(key, job_id=result["jobId"])
+        self.orders.release(key, result=result)
+        return result
+
+    def record_result(self, key: str, completed: dict):
+        """
+        Remember how order `key` ended.
+
+        Completed orders are answered from the cache until the TTL runs out;
+        failed or cancelled ones are forgotten so they can be retried. On a
+        timeout the jobId is kept, so a retry waits on the same job.
+        """
+        status = completed.get("status")
+        if status == "completed":
+            self.orders.put(key, result=completed)
+        elif status in ("failed", "cancelled"):
+            self.orders.discard(key)
+
+    async def run_order(self, key: str, prompt: str, timeout: float = 120) -> dict:
+        """run_prompt, but at most one job per order key within the TTL"""
+        entry = self.orders.get(key)
+        if entry is not None and "result" in entry:
+            return entry["result"]
+        submitted = await self.submit_once(key, prompt)
+        job_id = submitted.get("jobId")
+        if not job_id:
+            return submitted
+        completed = await self.wait_for_completion(job_id, timeout=timeout)
+        self.record_result(key, completed)
+        return completed
+
+    async def close(self):
+        if self._tracker is not None:
+            self._tracker.stop()
+            self._tracker = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class JobTracker:
+    """
+    Polls every outstanding Bankr job from a single task.
+
+    Each job is polled quickly after submission, then less often
+    (POLL_INITIAL doubling up to POLL_CAP). Every check runs as its own
+    task and is handled as it completes, so a slow or hung check never
+    holds up the polls of other jobs; a job whose check is still
+    running at its deadline times out. Futures are resolved on a
+    terminal status.
+    """
+
+    def __init__(self, client: BankrClient, initial: float = POLL_INITIAL,
+                 factor: float = POLL_FACTOR, cap: float = POLL_CAP):
+        self.client = client
+        self.initial = initial
+        self.factor = factor
+        self.cap = cap
+        self.loop = asyncio.get_running_loop()
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._schedule = []  # heap of (next poll time, job_id)
+        self._checks: Dict[str, asyncio.Task] = {}  # job_id -> check in flight
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def track(self, job_id: str, timeout: float) -> asyncio.Future:
+        if job_id in self._futures:
+            return self._futures[job_id]
+        future = self.loop.create_future()
+        # A caller giving up on the future stops the polling for it
+        future.add_done_callback(lambda _: self._forget(job_id))
+        now = time.monotonic()
+        self._futures[job_id] = future
+        self._deadlines[job_id] = now + timeout
+        self._intervals[job_id] = self.initial
+        heapq.heappush(self._schedule, (now + self.initial, job_id))
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        for future in list(self._futures.values()):
+            future.cancel()
+
+    def _forget(self, job_id: str):
+        self._futures.pop(job_id, None)
+        self._deadlines.pop(job_id, None)
+        self._intervals.pop(job_id, None)
+        check = self._checks.pop(job_id, None)
+        if check is not None:
+            check.cancel()
+
+    def _resolve(self, job_id: str, result: dict):
+        future = self._futures.get(job_id)
+        if future is not None and not future.done():
+            future.set_result(result)
+        # Now rather than from the future's callback, so the scheduler never sees it again
+        self._forget(job_id)
+
+    def _timeout(self, job_id: str):
+        incr("bankr_job_timeouts")
+        self._resolve(job_id, {"status": "timeout", "error": "Job did not complete in time"})
+
+    def _start_check(self, job_id: str):
+        check = self.loop.create_task(self.client.check_job(job_id))
+        self._checks[job_id] = check
+        check.add_done_callback(lambda done: self._checked(job_id, done))
+
+    def _checked(self, job_id: str, check: asyncio.Task):
+        """A job's check finished: resolve the job, or schedule its next poll"""
+        result = None if check.cancelled() else (check.exception() or check.result())
+        if self._checks.get(job_id) is not check:
+            return  # the job was resolved or given up on meanwhile
+        del self._checks[job_id]
+        now = time.monotonic()
+        if isinstance(result, dict) and result.get("status") in TERMINAL_STATUSES:
+            self._resolve(job_id, result)
+        elif now >= self._deadlines[job_id]:
+            self._timeout(job_id)
+        else:
+            # Still pending (or the check failed) - back off
+            interval = min(self.cap, self._intervals[job_id] * self.factor)
+            self._intervals[job_id] = interval
+            next_poll = min(now + interval, self._deadlines[job_id])
+            heapq.heappush(self._schedule, (next_poll, job_id))
+            self._wakeup.set()
+
+    async def _run(self):
+        while self._futures:
+            # Drop heap entries for jobs that finished or were cancelled
+            while self._schedule and self._schedule[0][1] not in self._futures:
+                heapq.heappop(self._schedule)
+
+            now = time.monotonic()
+            # A check still running at its job's deadline doesn't get to hold the job
+            for job_id in [job_id for job_id in self._checks if now >= self._deadlines[job_id]]:
+                self._timeout(job_id)
+
+            wake = [self._deadlines[job_id] for job_id in self._checks]
+            if self._schedule:
+                wake.append(self._schedule[0][0])
+            if not wake:
+                break
+            delay = min(wake) - now
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue  # a new job or a finished check may change what is due
+
+            while self._schedule and self._schedule[0][0] <= now:
+                _, job_id = heapq.heappop(self._schedule)
+                if job_id in self._futures and job_id not in self._checks:
+                    self._start_check(job_id)
+
+
+_client: Optional[BankrClient] = None
+
+
+def get_client() -> BankrClient:
+    """The process-wide client, so every caller shares one connection pool"""
+    global _client
+    if _client is None:
+        _client = BankrClient()
+    return _client
@@ -9,16 +9,13 @@ Usage:
     python3 bankr_trader.py --signal long --price 67000 --target 68000
 """
 
-import os
-import requests
+import asyncio
 import json
-import time
 import argparse
 from datetime import datetime
 
-# Bankr API configuration
-BANKR_API_KEY = os.environ.get("BANKR_API_KEY", "bk_3GKNL8C5S6Z9WQEXVU6E43S92626PNZW")
-BANKR_API_URL = "https://api.bankr.bot"
+from bankr_client import get_client
+from idempotency import order_key
 
 # TradingView signals we're tracking
 TRADING_SIGNALS = {
@@ -29,62 +26,40 @@ TRADING_SIGNALS = {
 }
 
 
-def submit_prompt(prompt: str, thread_id: str = None) -> dict:
+async def submit_prompt(prompt: str, thread_id: str = None) -> dict:
     """Submit a prompt to Bankr AI agent"""
-    url = f"{BANKR_API_URL}/agent/prompt"
-    headers = {
-        "X-API-Key": BANKR_API_KEY,
-        "Content-Type": "application/json"
-    }
-    data = {"prompt": prompt}
-    if thread_id:
-        data["threadId"] = thread_id
-    
-    response = requests.post(url, headers=headers, json=data)
-    return response.json()
+    return await get_client().submit_prompt(prompt, thread_id)
 
 
-def check_job(job_id: str) -> dict:
+async def check_job(job_id: str) -> dict:
     """Check job status"""
-    url = f"{BANKR_API_URL}/agent/job/{job_id}"
-    headers = {"X-API-Key": BANKR_API_KEY}
-    response = requests.get(url, headers=headers)
-    return response.json()
+    return await get_client().check_job(job_id)
 
 
-def wait_for_completion(job_id: str, timeout: int = 120) -> dict:
+async def wait_for_completion(job_id: str, timeout: int = 120) -> dict:
     """Wait for job to complete"""
-    start = time.time()
-    while time.time() - start < timeout:
-        result = check_job(job_id)
-        status = result.get("status", "pending")
-        
-        if status == "completed":
-            return result
-        elif status in ["failed", "cancelled"]:
-            return result
-        
-        time.sleep(3)
-    
-    return {"status": "timeout", "error": "Job did not complete in time"}
+    return await get_client().wait_for_completion(job_id, timeout=timeout)
 
 
-def get_balance():
+async def get_balance():
     """Get current portfolio balance"""
-    result = submit_prompt("what is my portfolio balance?")
+    result = await submit_prompt("what is my portfolio balance?")
     job_id = result.get("jobId")
     if not job_id:
         return result
     
-    completed = wait_for_completion(job_id)
+    completed = await wait_for_completion(job_id)
     return completed
 
 
-def execute_trade(action: str, token: str, amount: float) -> dict:
+async def execute_trade(action: str, token: str, amount: float, key: str = None) -> dict:
     """
     Execute a trade via Bankr
     
     Actions: buy, sell, swap
+
+    The same (action, token, amount) within the order TTL is not submitted
+    again - pass a distinct `key` to place an identical trade on purpose.
     """
     prompt = f"{action} {amount} {token}"
     
@@ -95,21 +70,32 @@ def execute_trade(action: str, token: str, amount: float) -> dict:
     elif action.lower() == "swap":
         prompt = f"swap {amount} {token} for eth"
     
+    client = get_client()
+    key = key or order_key("trade", action.lower(), token.upper(), amount)
+    entry = client.orders.get(key)
+    if entry is not None and "result" in entry:
+        print(f"Already executed: {prompt}")
+        return entry["result"]
+    
     print(f"Executing: {prompt}")
-    result = submit_prompt(prompt)
+    result = await client.submit_once(key, prompt)
     job_id = result.get("jobId")
     
     if not job_id:
         print(f"Error submitting: {result}")
         return result
     
-    print(f"Job submitted: {job_id}")
-    completed = wait_for_completion(job_id)
+    if result.get("deduplicated"):
+        print(f"Waiting on existing job: {job_id}")
+    else:
+        print(f"Job submitted: {job_id}")
+    completed = await wait_for_completion(job_id)
+    client.record_result(key, completed)
     
     return completed
 
 
-def execute_strategy_signal(signal: dict) -> dict:
+async def execute_strategy_signal(signal: dict) -> dict:
     """
     Execute a trade based on TradingView signal
     
@@ -145,18 +131,27 @@ def execute_strategy_signal(signal: dict) -> dict:
     print(f"   TP: ${tp:,.2f}")
     print(f"   Executing: {prompt}")
     
-    result = submit_prompt(prompt)
+    # One order per distinct signal - a re-sent or retried signal reuses its job
+    client = get_client()
+    key = order_key("signal", signal)
+    entry = client.orders.get(key)
+    if entry is not None and "result" in entry:
+        print("   Signal already executed")
+        return entry["result"]
+    
+    result = await client.submit_once(key, prompt)
     job_id = result.get("jobId")
     
     if job_id:
         print(f"Job ID: {job_id}")
-        completed = wait_for_completion(job_id)
+        completed = await wait_for_completion(job_id)
+        client.record_result(key, completed)
         return completed
     
     return result
 
 
-def generate_trading_report():
+async def generate_trading_report():
     """Generate a trading report from current market analysis"""
     prompt = """analyze the current crypto market and give me a brief report on:
     - BTC price and 24h movement
@@ -166,16 +161,47 @@ def generate_trading_report():
     
     keep it concise, like a trader would write."""
     
-    result = submit_prompt(prompt)
+    result = await submit_prompt(prompt)
     job_id = result.get("jobId")
     
     if job_id:
-        completed = wait_for_completion(job_id)
+        completed = await wait_for_completion(job_id)
         return completed.get("response", "No response")
     
     return "Error generating report"
 
 
+async def run_cli(args, parser):
+    try:
+        if args.action == "balance":
+            print("Checking balance...")
+            result = await get_balance()
+            print(json.dumps(result, indent=2))
+        
+        elif args.action == "report":
+            print("Generating market report...")
+            result = await generate_trading_report()
+            print(result)
+        
+        elif args.action in ["buy", "sell", "swap"]:
+            if not args.token or not args.amount:
+                print("Error: --token and --amount required")
+                exit(1)
+            
+            result = await execute_trade(args.action, args.token.upper(), args.amount)
+            print(json.dumps(result, indent=2))
+        
+        elif args.signal:
+            signal = json.loads(args.signal)
+            result = await execute_strategy_signal(signal)
+            print(json.dumps(result, indent=2))
+        
+        else:
+            parser.print_help()
+    finally:
+        await get_client().close()
+
+
 # CLI
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Bankr Trading Bot")
@@ -187,29 +213,4 @@ if __name__ == "__main__":
     parser.add_argument("--target", type=float, help="Target price")
     
     args = parser.parse_args()
-    
-    if args.action == "balance":
-        print("Checking balance...")
-        result = get_balance()
-        print(json.dumps(result, indent=2))
-    
-    elif args.action == "report":
-        print("Generating market report...")
-        result = generate_trading_report()
-        print(result)
-    
-    elif args.action in ["buy", "sell", "swap"]:
-        if not args.token or not args.amount:
-            print("Error: --token and --amount required")
-            exit(1)
-        
-        result = execute_trade(args.action, args.token.upper(), args.amount)
-        print(json.dumps(result, indent=2))
-    
-    elif args.signal:
-        signal = json.loads(args.signal)
-        result = execute_strategy_signal(signal)
-        print(json.dumps(result, indent=2))
-    
-    else:
-        parser.print_help()
+    asyncio.run(run_cli(args, parser))
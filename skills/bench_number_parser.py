@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Number Parser Benchmark
+Fuzzes number_parser with randomly formatted prices, then measures
+snippets per second against the old parse_price / parse_rsi. Parsing
+is timed with the memo bypassed; memo hits are reported on their own
+
+Usage:
+    python3 bench_number_parser.py
+    python3 bench_number_parser.py --fuzz 200000 --snippets 1000000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from number_parser import parse_price, parse_rsi
+
+PREFIXES = ["", "Last ", "C", "Price: ", "BTCUSD 5m · ", "close "]
+SUFFIXES = ["", " USD", " ▲", " (+0.42%)"]
+
+
+def old_parse_price(text: str) -> float:
+    """The original tradingview_reader.parse_price, kept here as the baseline"""
+    cleaned = text.replace("$", "").replace(",", "").strip()
+    match = re.search(r'[\d.]+', cleaned)
+    if match:
+        try:
+            return float(match.group())
+        except:
+            pass
+    return 0
+
+
+def old_parse_rsi(text: str) -> float:
+    """The original tradingview_reader.parse_rsi"""
+    match = re.search(r'(\d+\.?\d*)\s*(?=|$)', text)
+    if match:
+        try:
+            val = float(match.group(1))
+            if 0 <= val <= 100:
+                return val
+        except:
+            pass
+    return 50
+
+
+def group(integer: str, sep: str) -> str:
+    parts = []
+    while len(integer) > 3:
+        parts.append(integer[-3:])
+        integer = integer[:-3]
+    parts.append(integer)
+    return sep.join(reversed(parts))
+
+
+def format_price(rng: random.Random, value: float) -> tuple:
+    """(text, expected value) in one of the formats charts and agents print"""
+    style = rng.randrange(6)
+    integer, fraction = f"{value:.2f}".split(".")
+    if style == 0:
+        body = f"{group(integer, ',')}.{fraction}"
+    elif style == 1:
+        body = f"{integer}.{fraction}"
+    elif style == 2:
+        body = f"{group(integer, '.')},{fraction}"            # 67.300,92
+    elif style == 3:
+        body = f"{group(integer, rng.choice([' ', ' ', ' ', chr(39)]))},{fraction}"
+    elif style == 4:
+        thousands = round(value / 1000, 1)                     # 67.3K
+        body, value = f"{thousands}K", thousands * 1000
+    else:
+        body = group(integer, ",")                             # no decimals
+        value = float(integer)
+    expected = float(f"{value:.2f}") if style != 4 else value
+    sign = rng.random() < 0.1
+    currency = rng.choice(["$", "", "$ "])
+    text = f"{rng.choice(PREFIXES)}{'−' if sign else ''}{currency}{body}{rng.choice(SUFFIXES)}"
+    return text, -expected if sign else expected
+
+
+# Numbers glued to the text after them: the match must be rejected or kept whole, never cut short
+EDGE_CASES = [
+    ("0.5BTC", 0.5), ("2.5x", 2.5), ("67,300.92USD", 67300.92),
+    ("O67,000H67,500L66,900C67,300", 67000), ("15m 67,300", 67300), ("4h", 0),
+    ("1,5m 42", 42), ("67.3K", 67300), ("1.2M", 1.2e6), ("$-5", -5),
+]
+
+
+def fuzz(count: int, seed: int = 11) -> int:
+    rng = random.Random(seed)
+    failures = 0
+    for text, expected in EDGE_CASES:
+        if parse_price(text) != expected:
+            failures += 1
+            print(f"  mismatch: {text!r} -> {parse_price(text)} (expected {expected})")
+    # ... and with a glued word after every random price
+    glued = lambda text: text + rng.choice(["BTC", "x", "USD", "H67,500"]) if text[-1].isdigit() else text
+    for _ in range(count):
+        value = rng.choice([rng.uniform(0.01, 10), rng.uniform(10, 100_000), rng.uniform(1e5, 1e9)])
+        text, expected = format_price(rng, value)
+        if rng.random() < 0.2:
+            text = glued(text)
+        got = parse_price(text)
+        if abs(got - expected) > 1e-6 * max(1.0, abs(expected)):
+            failures += 1
+            if failures <= 5:
+                print(f"  mismatch: {text!r} -> {got} (expected {expected})")
+    # RSI legends: inputs first, value last
+    for _ in range(count // 10):
+        value = round(rng.uniform(0, 100), 2)
+        text = f"RSI {rng.choice([7, 14])} close {value}"
+        if parse_rsi(text) != value:
+            failures += 1
+            if failures <= 5:
+                print(f"  mismatch: {text!r} -> {parse_rsi(text)}")
+    return failures
+
+
+def throughput(fn, snippets: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in snippets:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(snippets) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Number parser fuzz and throughput benchmark")
+    parser.add_argument("--fuzz", type=int, default=100_000, help="Random snippets to check")
+    parser.add_argument("--snippets", type=int, default=200_000, help="Snippets per throughput run")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = fuzz(args.fuzz)
+    print(f"fuzz: {len(EDGE_CASES)} edge cases + {args.fuzz:,} prices + {args.fuzz // 10:,} RSI legends, "
+          f"{failures} mismatches")
+
+    rng = random.Random(3)
+    # Chart text as read from the DOM: "$67,300.92"-style prices, all distinct
+    prices = [f"${group(str(i * 7919 % 10_000_000), ',')}.{rng.randrange(100):02d}"
+              for i in range(args.snippets)]
+    rsis = [f"{i % 10_000 / 100:.2f}" + rng.choice(["", " ", "  "]) * (i // 10_000 + 1)
+            for i in range(args.snippets)]
+    # Prices inside surrounding text: the full scan
+    labelled = [f"{rng.choice(PREFIXES)}{price}{rng.choice(SUFFIXES)}" for price in prices]
+    # Re-reading an unchanged legend every tick: a few hundred distinct snippets
+    repeats = [prices[i % 500] for i in range(args.snippets)]
+    print("parsing (every snippet new, no memo):")
+    for name, new, old, data in [("price", parse_price, old_parse_price, prices),
+                                 ("rsi", parse_rsi, old_parse_rsi, rsis),
+                                 ("text", parse_price, old_parse_price, labelled)]:
+        t_new = throughput(new.uncached, data, args.repeat)
+        t_old = throughput(old, data, args.repeat)
+        print(f"{name:>6}  old: {t_old / 1e6:5.2f} M/s  number_parser: {t_new / 1e6:5.2f} M/s  "
+              f"({t_new / t_old:.1f}x)")
+    # A memo hit is a dict lookup, not parsing - reported apart so it isn't read as parser speed
+    t_memo = throughput(parse_price, repeats, args.repeat)
+    print(f"memo hits (500 distinct snippets re-read): {t_memo / 1e6:5.2f} M/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Signal Rules Benchmark
+Checks the compiled rules against the original calculate_signal on random
+levels and ticks, then measures scoring throughput
+
+Usage:
+    python3 bench_signal_rules.py
+    python3 bench_signal_rules.py --cases 200000 --symbols 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from signal_rules import EMA_RULES, LONG, SHORT, RuleBook, SignalRule
+
+
+def old_calculate_signal(price: float, ema_9: float, rsi: float, levels: dict) -> dict:
+    """The original tradingview_reader.calculate_signal, kept here as the baseline"""
+    signal = {
+        "direction": "neutral",
+        "strength": 0.0,
+        "entry_price": price,
+        "stop_loss": 0,
+        "take_profit": 0,
+        "reason": ""
+    }
+    bias_score = levels.get("bias_score", 5)
+    recommendation = levels.get("recommendation", "neutral")
+    ema_distance = ((price - ema_9) / ema_9) * 100 if ema_9 else 0.0
+    if recommendation == "short" and bias_score <= 3:
+        if price >= levels.get("short_level", price * 1.01):
+            signal["direction"] = "short"
+            signal["strength"] = min(1.0, 0.7 + (bias_score / 20))
+            signal["stop_loss"] = levels.get("long_level", price * 1.01)
+            signal["take_profit"] = levels.get("tp1", price * 0.98)
+            signal["reason"] = f"Bearish bias ({bias_score}/10), price at resistance"
+        elif price <= levels.get("long_level", price * 0.99):
+            signal["direction"] = "neutral"
+            signal["reason"] = "Price at support - wait for entry zone"
+    elif recommendation == "long" and bias_score >= 7:
+        if price <= levels.get("long_level", price * 0.99):
+            signal["direction"] = "long"
+            signal["strength"] = min(1.0, 0.7 + (bias_score / 20))
+            signal["stop_loss"] = levels.get("short_level", price * 0.99)
+            signal["take_profit"] = levels.get("tp1", price * 1.02)
+            signal["reason"] = f"Bullish bias ({bias_score}/10), price at support"
+    elif levels:
+        if price > ema_9 and 30 < rsi < 70:
+            signal["direction"] = "long"
+            signal["strength"] = min(1.0, (ema_distance / 2) + 0.3)
+            signal["stop_loss"] = ema_9
+            signal["take_profit"] = price * 1.05
+            signal["reason"] = f"Price {ema_distance:.2f}% above EMA, RSI at {rsi}"
+        elif price < ema_9 and 30 < rsi < 70:
+            signal["direction"] = "short"
+            signal["strength"] = min(1.0, (abs(ema_distance) / 2) + 0.3)
+            signal["stop_loss"] = ema_9
+            signal["take_profit"] = price * 0.95
+            signal["reason"] = f"Price {abs(ema_distance):.2f}% below EMA, RSI at {rsi}"
+    else:
+        signal["reason"] = "No clear direction - price near EMA or RSI in overbought/oversold"
+    return signal
+
+
+def random_levels(rng: random.Random) -> dict:
+    """Levels around 100, with any field possibly missing"""
+    if rng.random() < 0.1:
+        return {}
+    levels = {
+        "bias_score": rng.randrange(11),
+        "recommendation": rng.choice(["short", "long", "neutral"]),
+        "long_level": round(rng.uniform(90, 100), 2),
+        "short_level": round(rng.uniform(100, 110), 2),
+        "tp1": round(rng.uniform(85, 115), 2),
+    }
+    for key in list(levels):
+        if rng.random() < 0.15:
+            del levels[key]
+    return levels
+
+
+def random_tick(rng: random.Random) -> tuple:
+    price = round(rng.uniform(85, 115), 2)
+    ema_9 = rng.choice([0.0, price, round(price * rng.uniform(0.97, 1.03), 2)])
+    return price, ema_9, rng.choice([50, round(rng.uniform(0, 100), 2), 30, 70])
+
+
+def parity(cases: int, seed: int = 5) -> int:
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(cases):
+        levels = random_levels(rng)
+        rule = SignalRule.from_levels(levels)
+        ticks = [random_tick(rng) for _ in range(8)]
+        for price, ema_9, rsi in ticks:
+            expected = old_calculate_signal(price, ema_9, rsi, levels)
+            got = rule.evaluate(price, ema_9, rsi)
+            if got != expected:
+                failures += 1
+                if failures <= 5:
+                    print(f"  mismatch: {levels} {price, ema_9, rsi}\n    {got}\n    {expected}")
+        # Batch and table paths must agree with evaluate()
+        price, ema_9, rsi = (np.array(column, dtype=np.float64) for column in zip(*ticks))
+        expected = np.array([{"long": LONG, "short": SHORT}.get(rule.evaluate(*t)["direction"], 0) for t in ticks])
+        strengths = np.array([rule.evaluate(*t)["strength"] for t in ticks])
+        for name, scores in [("batch", rule.evaluate_batch(price, ema_9, rsi)),
+                             ("table", RuleBook({str(i): levels for i in range(8)})
+                              .table([str(i) for i in range(8)]).score(price, ema_9, rsi))]:
+            if not (np.array_equal(scores["direction"], expected) and np.allclose(scores["strength"], strengths)):
+                failures += 1
+                if failures <= 5:
+                    print(f"  {name} mismatch: {levels} {ticks}")
+    return failures
+
+
+def per_second(fn, count: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Signal rules parity and throughput benchmark")
+    parser.add_argument("--cases", type=int, default=50_000, help="Random level sets to check")
+    parser.add_argument("--symbols", type=int, default=5_000, help="Symbols scored per tick")
+    args = parser.parse_args()
+
+    failures = parity(args.cases)
+    print(f"parity: {args.cases:,} level sets x 8 ticks, {failures} mismatches")
+
+    rng = random.Random(9)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    levels = {symbol: random_levels(rng) for symbol in symbols}
+    ticks = [random_tick(rng) for _ in symbols]
+    book = RuleBook(levels)
+    price, ema_9, rsi = (np.array(column, dtype=np.float64) for column in zip(*ticks))
+
+    def old_loop():
+        for symbol, (p, e, r) in zip(symbols, ticks):
+            old_calculate_signal(p, e, r, levels.get(symbol, {}))
+
+    def rule_loop():
+        get = book.get
+        for symbol, (p, e, r) in zip(symbols, ticks):
+            get(symbol).evaluate(p, e, r)
+
+    def table_score():
+        book.table(symbols).score(price, ema_9, rsi)
+
+    n = len(symbols)
+    old = per_second(old_loop, n)
+    print(f"{n:,} symbols per tick")
+    print(f"  old calculate_signal:  {old / 1e6:6.2f} M symbols/s")
+    for name, fn in [("SignalRule.evaluate", rule_loop), ("RuleTable.score", table_score)]:
+        rate = per_second(fn, n)
+        print(f"  {name + ':':<22} {rate / 1e6:6.2f} M symbols/s ({rate / old:.1f}x), "
+              f"{n / rate * 1e3:.2f} ms per tick")
+
+    # One symbol, a long history (backtests)
+    bars = 1_000_000
+    series = np.random.default_rng(1).normal(100, 5, size=(3, bars))
+    rule = SignalRule(EMA_RULES)  # the costliest branch
+    rate = per_second(lambda: rule.evaluate_batch(series[0], series[1], series[2] % 100), bars)
+    print(f"evaluate_batch: {rate / 1e6:.1f} M bars/s")
+
+
+if __name__ == "__main__":
+    main()
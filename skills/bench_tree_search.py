@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tree Search Benchmark
+Compares the old recursive per-keyword search with find_fields on
+synthetic TradingView-like snapshots
+
+Usage:
+    python3 bench_tree_search.py
+    python3 bench_tree_search.py --nodes 10000 100000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tradingview_reader import FIELD_KEYWORDS, find_fields
+
+FILLER = ["div", "toolbar", "button", "Indicators", "Alert", "Drawing", "Volume 1.2K", "Crosshair"]
+
+
+def build_snapshot(nodes: int, fanout: int = 8, seed: int = 7) -> dict:
+    """Bushy tree of `nodes` nodes with the chart fields near the end"""
+    rng = random.Random(seed)
+    root = {"text": "", "children": []}
+    frontier = [root]
+    count = 1
+    while count < nodes:
+        parent = frontier.pop(0)
+        for _ in range(fanout):
+            if count >= nodes:
+                break
+            child = {"text": rng.choice(FILLER), "children": []}
+            parent["children"].append(child)
+            frontier.append(child)
+            count += 1
+    # Legend sits in the last leaves, so every search walks the whole tree
+    leaves = frontier[-3:]
+    leaves[0]["text"] = "Last price $67,300.92"
+    leaves[1]["text"] = "EMA 9 close 67,129.92"
+    leaves[2]["text"] = "RSI 7 close 55.10"
+    return root
+
+
+def recursive_find(snapshot: dict, keywords: list):
+    """The original find_element_text, kept here as the baseline"""
+    text = snapshot.get("text", "")
+    if any(kw.lower() in text.lower() for kw in keywords):
+        return text
+    for child in snapshot.get("children", []):
+        result = recursive_find(child, keywords)
+        if result:
+            return result
+    return None
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tree search benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for nodes in args.nodes:
+        snapshot = build_snapshot(nodes)
+
+        def old():
+            return {field: recursive_find(snapshot, kws) for field, kws in FIELD_KEYWORDS.items()}
+
+        def new():
+            return find_fields(snapshot, FIELD_KEYWORDS)
+
+        assert old() == new(), "searches disagree"
+        t_old = timed(old, args.repeat)
+        t_new = timed(new, args.repeat)
+        print(f"{nodes:>8,} nodes  recursive: {t_old * 1000:8.2f} ms  "
+              f"find_fields: {t_new * 1000:8.2f} ms  ({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Webhook Load Generator
+Fires TradingView-style alerts at the webhook server and measures
+alerts per second and receipt-to-evaluation latency
+
+The server and a consumer that evaluates every signal share one event
+loop, as in the trading loop; the load comes from separate processes
+posting over keep-alive connections, so it never competes with the
+server for the GIL.
+
+Usage:
+    python3 bench_webhook.py
+    python3 bench_webhook.py --alerts 50000 --clients 4 --concurrency 16
+    python3 bench_webhook.py --url http://127.0.0.1:8787/webhook --secret ...   # external server
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Histogram
+from tradingview_reader import calculate_signal
+from webhook_server import WebhookServer
+
+SYMBOLS = ["BTCUSD", "SOLUSDT", "SUIUSD"]
+TIMEFRAMES = ["5", "15", "60", "240"]
+
+
+def make_alerts(count: int, secret: str, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    alerts = []
+    for _ in range(count):
+        price = rng.uniform(60_000, 70_000)
+        alerts.append(json.dumps({
+            "secret": secret,
+            "symbol": f"BINANCE:{rng.choice(SYMBOLS)}",
+            "timeframe": rng.choice(TIMEFRAMES),
+            "price": round(price, 2),
+            "ema_9": round(price * rng.uniform(0.99, 1.01), 2),
+            "rsi": round(rng.uniform(10, 90), 2),
+        }).encode())
+    return alerts
+
+
+async def serve(secret: str, expected: int, port_ready, idle: float = 10.0):
+    """Webhook server plus a consumer that evaluates every signal, as the trading loop would"""
+    latency = Histogram("webhook_to_eval")
+    evaluated = 0
+    async with WebhookServer(secret, host="127.0.0.1", port=0) as server:
+        port_ready(f"http://127.0.0.1:{server.port}{server.path}")
+        while evaluated < expected:
+            signal = await server.get(timeout=idle)
+            if signal is None:
+                break
+            signal.get_direction()
+            signal.get_strength()
+            calculate_signal(signal.price, signal.ema_9, signal.rsi, "BTCUSDT")
+            latency.record(int((time.perf_counter() - signal.received) * 1e9))
+            evaluated += 1
+    return server.summary(), latency, evaluated
+
+
+async def fire(url: str, alerts: list, concurrency: int) -> float:
+    """Post every alert with `concurrency` requests in flight; returns seconds taken"""
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        position = iter(alerts)
+        failures = 0
+
+        async def worker():
+            nonlocal failures
+            for body in position:
+                async with session.post(url, data=body) as response:
+                    await response.read()
+                    if response.status != 202:
+                        failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    if failures:
+        print(f"  {failures} alerts were not accepted")
+    return elapsed
+
+
+def load(url: str, alerts: list, concurrency: int, results):
+    """Load generator process: one event loop posting its share of the alerts"""
+    results.put(asyncio.run(fire(url, alerts, concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webhook server load generator")
+    parser.add_argument("--alerts", type=int, default=20_000, help="Alerts to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight per client")
+    parser.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--url", help="Target an already running server instead of an in-process one")
+    parser.add_argument("--secret", default="bench-secret")
+    args = parser.parse_args()
+
+    alerts = make_alerts(args.alerts, args.secret)
+    results = multiprocessing.Queue()
+    clients = []
+
+    def start_clients(url: str):
+        for i in range(args.clients):
+            process = multiprocessing.Process(
+                target=load, args=(url, alerts[i::args.clients], args.concurrency, results), daemon=True)
+            process.start()
+            clients.append(process)
+
+    start = time.perf_counter()
+    if args.url:
+        start_clients(args.url)
+        server = None
+    else:
+        # The server gets this process to itself; the clients run in their own
+        server = asyncio.run(serve(args.secret, args.alerts, start_clients))
+    elapsed = max(results.get() for _ in clients)
+    for process in clients:
+        process.join()
+    total = time.perf_counter() - start
+    print(f"sent {args.alerts:,} alerts: {args.alerts / elapsed:,.0f} alerts/s "
+          f"({args.clients} clients x {args.concurrency} in flight, {total:.2f}s total)")
+
+    if server is not None:
+        stats, lat, evaluated = server
+        print(f"server: {stats['accepted']:,} accepted, {stats['dropped']} dropped, {evaluated:,} evaluated")
+        print(f"receipt -> evaluation: p50 {lat.percentile(0.5) / 1e6:.3f} ms  "
+              f"p99 {lat.percentile(0.99) / 1e6:.3f} ms  p99.9 {lat.percentile(0.999) / 1e6:.3f} ms  "
+              f"max {lat.max / 1e6:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
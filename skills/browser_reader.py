@@ -3,8 +3,12 @@ Browser-based TradingView Reader
 Reads live data from your TradingView tab
 """
 
+import asyncio
+import re
 from typing import Dict, Optional
 
+from number_parser import first_number, last_number, parse_number
+
 
 async def read_tradingview_tab(browser, tab_id: str) -> Dict:
     """
@@ -34,21 +38,11 @@ async def read_tradingview_tab(browser, tab_id: str) -> Dict:
     }
     
     try:
-        # Get snapshot of the page
-        snapshot = browser.snapshot(tab_id)
-        
-        # Parse price - TradingView shows price in multiple places
-        # Look for the main price display
-        result["price"] = parse_price_from_snapshot(snapshot)
-        
-        # Parse EMA from indicators
-        result["ema_9"] = parse_ema_from_snapshot(snapshot)
+        # Get snapshot of the page (blocking call - keep it off the event loop)
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, browser.snapshot, tab_id)
         
-        # Parse RSI
-        result["rsi"] = parse_rsi_from_snapshot(snapshot)
-        
-        # Try to find support/resistance from drawings
-        result["support"], result["resistance"] = parse_sr_levels(snapshot)
+        # One walk over the tree fills price, EMA, RSI, OHLC and S/R
+        result.update(extract_chart_fields(snapshot))
         
     except Exception as e:
         print(f"Error reading TradingView: {e}")
@@ -56,103 +50,117 @@ async def read_tradingview_tab(browser, tab_id: str) -> Dict:
     return result
 
 
-def parse_price_from_snapshot(snapshot: dict) -> float:
-    """
-    Find and extract current price from TradingView snapshot.
-    TradingView shows price in the chart header and in OHLC values.
+# Precompiled patterns - shared by every node visit instead of being
+# rebuilt (and `re` re-imported) on each call
+OHLC_RE = re.compile(
+    r'\bO\s*([\d,]+\.?\d*)\s*H\s*([\d,]+\.?\d*)\s*L\s*([\d,]+\.?\d*)\s*C\s*([\d,]+\.?\d*)'
+)
+EMA_RE = re.compile(r'ema|exponential moving average')
+
+# Same depth limit the per-field searches used
+MAX_DEPTH = 10
+
+
+def extract_chart_fields(snapshot: dict, max_depth: int = MAX_DEPTH) -> Dict:
     """
-    import re
+    Walk the snapshot tree once and fill every chart field.
     
-    # Search for price patterns in the snapshot
-    # Typical: "$67,300.92" or "67,300" or "67.3K"
+    Visits nodes in the same depth-first order as the old per-field
+    searches, so each field still takes its first match - except price,
+    which is the close of an OHLC legend when one is found (the old search
+    took the first in-range number there, i.e. the open). Uses an explicit
+    stack, so deep trees cannot hit the recursion limit.
     
-    def search_tree(node, depth=0):
-        if depth > 10:  # Limit recursion
-            return None
-            
+    Returns:
+        dict with price, ema_9, rsi, ohlc, support, resistance
+    """
+    price = None
+    ema = None
+    rsi = None
+    ohlc = {}
+    support = []
+    resistance = []
+    
+    stack = [(snapshot, 0)]
+    while stack:
+        node, depth = stack.pop()
         text = node.get("text", "")
         
-        # Look for price-like numbers near "C" (close) or "$"
-        if "C" in text or "$" in text:
-            # Extract numbers
-            matches = re.findall(r'[\d,]+\.?\d*', text)
-            for match in matches:
-                num = float(match.replace(",", ""))
-                if 1000 < num < 1000000:  # Reasonable BTC price range
-                    return num
-                    
-        # Check children
-        for child in node.get("children", []):
-            result = search_tree(child, depth + 1)
-            if result:
-                return result
-                
-        return None
+        if text:
+            # OHLC legend: "O67,079.62 H67,458.00 L67,076.30 C67,300.92"
+            if not ohlc:
+                match = OHLC_RE.search(text)
+                if match:
+                    values = [parse_number(g) for g in match.groups()]
+                    if None not in values:
+                        ohlc = dict(zip(("open", "high", "low", "close"), values))
+                        # Current price is the close, not the legend's first number (the open)
+                        if price is None:
+                            price = ohlc["close"]
+            
+            # Look for price-like numbers near "C" (close) or "$"
+            if price is None and ("C" in text or "$" in text):
+                price = first_number(text, 1000, 1000000)  # Reasonable BTC price range
+            
+            lowered = text.lower()
+            
+            if ema is None and EMA_RE.search(lowered):
+                # Pattern: "EMA 9 close 67,129.92" - the value comes after the inputs
+                ema = last_number(lowered)
+            
+            if rsi is None and "rsi" in lowered:
+                rsi = last_number(lowered, 0, 100)
+            
+            # Horizontal lines / alerts labelled on the chart
+            if "support" in lowered or "resistance" in lowered:
+                level = first_number(lowered)
+                if level:
+                    if "support" in lowered:
+                        support.append(level)
+                    else:
+                        resistance.append(level)
+        
+        if depth < max_depth:
+            # Reverse so children pop in document order
+            children = node.get("children", [])
+            for child in reversed(children):
+                stack.append((child, depth + 1))
     
-    return search_tree(snapshot) or 0
+    return {
+        "price": price or 0,
+        "ema_9": ema or 0,
+        "rsi": rsi if rsi is not None else 50,
+        "ohlc": ohlc,
+        "support": sorted(support, reverse=True),
+        "resistance": sorted(resistance),
+    }
+
+
+def parse_price_from_snapshot(snapshot: dict) -> float:
+    """
+    Find and extract current price from TradingView snapshot.
+    TradingView shows price in the chart header and in OHLC values.
+    """
+    return extract_chart_fields(snapshot)["price"]
 
 
 def parse_ema_from_snapshot(snapshot: dict) -> float:
     """Extract EMA value from indicators panel"""
-    # Similar to price parsing, look for EMA-labeled elements
-    import re
-    
-    def search_tree(node, depth=0):
-        if depth > 10:
-            return None
-            
-        text = node.get("text", "").lower()
-        
-        if "ema" in text or "exponential moving average" in text:
-            # Extract the number after EMA label
-            # Pattern: "EMA 67,129.92" or similar
-            import re
-            match = re.search(r'([\d,]+\.?\d*)', text)
-            if match:
-                return float(match.group(1).replace(",", ""))
-                
-        for child in node.get("children", []):
-            result = search_tree(child, depth + 1)
-            if result:
-                return result
-                
-        return None
-    
-    return search_tree(snapshot) or 0
+    return extract_chart_fields(snapshot)["ema_9"]
 
 
 def parse_rsi_from_snapshot(snapshot: dict) -> float:
     """Extract RSI value from indicators panel"""
-    import re
-    
-    def search_tree(node, depth=0):
-        if depth > 10:
-            return None
-            
-        text = node.get("text", "").lower()
-        
-        if "rsi" in text:
-            match = re.search(r'(\d+\.?\d*)', text)
-            if match:
-                val = float(match.group(1))
-                if 0 <= val <= 100:
-                    return val
-                    
-        for child in node.get("children", []):
-            result = search_tree(child, depth + 1)
-            if result:
-                return result
-                
-        return 50  # Default
+    return extract_chart_fields(snapshot)["rsi"]
 
 
 def parse_sr_levels(snapshot: dict) -> tuple:
     """
     Find support and resistance levels from horizontal lines.
-    This is complex - TradingView stores drawings in specific elements.
+    Only picks up lines whose label says "support" or "resistance".
     """
-    # For now, return empty - would need more complex parsing
-    return [], []
+    fields = extract_chart_fields(snapshot)
+    return fields["support"], fields["resistance"]
 
 
 # Demo function - simulates reading from browser
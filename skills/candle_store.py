@@ -0,0 +1,248 @@
+"""
+Streaming OHLCV Candle Store
+Keeps recent bars per (symbol, timeframe) and updates indicators as bars arrive
+
+Each series is a fixed-size NumPy ring buffer, so memory stays bounded no
+matter how long the bot runs. EMA, RSI (Wilder) and MFI are carried as
+running state and updated in O(1) per bar - the bot computes its own values
+instead of scraping them off the chart.
+
+Usage:
+    store = CandleStore()
+    store.on_tick("BTCUSD", 67300.92, volume=0.5)
+    store.series("BTCUSD", "5m").latest()
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from tradingview_reader import CHART_CONFIG
+
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Bars kept per series - the oldest bar is overwritten once full
+DEFAULT_CAPACITY = 2000
+
+# MFI is not on the chart config; 14 is the usual length
+DEFAULT_MFI_LENGTH = 14
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """Convert "5m", "1h", "4h" ... to seconds"""
+    try:
+        return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+
+
+class CandleSeries:
+    """Ring buffer of bars for one symbol/timeframe with incremental indicators"""
+
+    FIELDS = ("time", "open", "high", "low", "close", "volume", "ema", "rsi", "mfi")
+    TIME, OPEN, HIGH, LOW, CLOSE, VOLUME, EMA, RSI, MFI = range(len(FIELDS))
+
+    def __init__(self, symbol: str, timeframe: str, capacity: int = DEFAULT_CAPACITY,
+                 ema_length: int = 9, rsi_length: int = 14, mfi_length: int = DEFAULT_MFI_LENGTH):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.seconds = timeframe_seconds(timeframe)
+        self.capacity = capacity
+        self.ema_length = ema_length
+        self.rsi_length = rsi_length
+        self.mfi_length = mfi_length
+
+        self.data = np.full((len(self.FIELDS), capacity), np.nan)
+        self.count = 0  # bars ever appended (not capped)
+
+        # Money flow of the last mfi_length bars: [positive, negative]
+        self._flows = np.zeros((2, mfi_length))
+
+        # Running indicator state, as of the last bar
+        self._state = self._initial_state()
+        # State as of the bar before the last, so the open bar can be revised
+        self._before_last = None
+
+    @staticmethod
+    def _initial_state() -> dict:
+        return {
+            "ema": np.nan, "ema_sum": 0.0,
+            "avg_gain": 0.0, "avg_loss": 0.0, "changes": 0,
+            "prev_close": np.nan,
+            "prev_tp": np.nan, "flows": 0, "pos_sum": 0.0, "neg_sum": 0.0,
+        }
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def bucket(self, timestamp: float) -> float:
+        """Start time of the bar that `timestamp` falls in"""
+        return timestamp - (timestamp % self.seconds)
+
+    def update(self, timestamp: float, open_: float, high: float, low: float,
+               close: float, volume: float = 0.0):
+        """
+        Append a bar, or revise the open bar if `timestamp` matches it.
+
+        Older timestamps are ignored - bars only move forward.
+        """
+        last_time = self.data[self.TIME, (self.count - 1) % self.capacity] if self.count else None
+        if last_time is not None and timestamp < last_time:
+            return
+
+        if last_time is not None and timestamp == last_time:
+            # Roll indicator state back to before the open bar, then re-apply
+            self._state = dict(self._before_last)
+            self._flows[:, self._state["flows"] % self.mfi_length] = self._before_last["slot"]
+            index = (self.count - 1) % self.capacity
+        else:
+            index = self.count % self.capacity
+            self.count += 1
+        self._before_last = dict(self._state)
+        self._before_last["slot"] = tuple(self._flows[:, self._state["flows"] % self.mfi_length])
+
+        ema, rsi, mfi = self._advance(high, low, close, volume)
+        self.data[:, index] = (timestamp, open_, high, low, close, volume, ema, rsi, mfi)
+
+    def on_tick(self, price: float, volume: float = 0.0, timestamp: Optional[float] = None):
+        """Fold a trade/price tick into the current bar"""
+        timestamp = time.time() if timestamp is None else timestamp
+        start = self.bucket(timestamp)
+        if self.count:
+            index = (self.count - 1) % self.capacity
+            if self.data[self.TIME, index] == start:
+                _, open_, high, low, _, vol = self.data[:self.VOLUME + 1, index]
+                self.update(start, open_, max(high, price), min(low, price), price, vol + volume)
+                return
+        self.update(start, price, price, price, price, volume)
+
+    def _advance(self, high: float, low: float, close: float, volume: float) -> Tuple[float, float, float]:
+        state = self._state
+
+        # EMA, seeded with the SMA of the first ema_length closes
+        n = self.count
+        if n < self.ema_length:
+            state["ema_sum"] += close
+            ema = np.nan
+        elif n == self.ema_length:
+            state["ema_sum"] += close
+            ema = state["ema_sum"] / self.ema_length
+        else:
+            alpha = 2 / (self.ema_length + 1)
+            ema = state["ema"] + alpha * (close - state["ema"])
+        state["ema"] = ema
+
+        # RSI with Wilder's smoothing, seeded with the SMA of the first changes
+        rsi = np.nan
+        if not np.isnan(state["prev_close"]):
+            change = close - state["prev_close"]
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            state["changes"] += 1
+            length = self.rsi_length
+            if state["changes"] <= length:
+                state["avg_gain"] += gain / length
+                state["avg_loss"] += loss / length
+            else:
+                state["avg_gain"] = (state["avg_gain"] * (length - 1) + gain) / length
+                state["avg_loss"] = (state["avg_loss"] * (length - 1) + loss) / length
+            if state["changes"] >= length:
+                rsi = _ratio_index(state["avg_gain"], state["avg_loss"])
+        state["prev_close"] = close
+
+        # MFI over a rolling window of money flows
+        mfi = np.nan
+        typical = (high + low + close) / 3
+        if not np.isnan(state["prev_tp"]):
+            flow = typical * volume
+            pos = flow if typical > state["prev_tp"] else 0.0
+            neg = flow if typical < state["prev_tp"] else 0.0
+            slot = state["flows"] % self.mfi_length
+            old_pos, old_neg = self._flows[:, slot]
+            state["pos_sum"] += pos - old_pos
+            state["neg_sum"] += neg - old_neg
+            self._flows[:, slot] = (pos, neg)
+            if slot == self.mfi_length - 1:
+                # Re-sum once per window so rounding error cannot build up
+                state["pos_sum"], state["neg_sum"] = self._flows.sum(axis=1)
+            state["flows"] += 1
+            if state["flows"] >= self.mfi_length:
+                mfi = _ratio_index(state["pos_sum"], state["neg_sum"])
+        state["prev_tp"] = typical
+
+        return ema, rsi, mfi
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent bar as a chart_data dict (same keys as read_live_chart)"""
+        if not self.count:
+            return None
+        t, o, h, l, c, v, ema, rsi, mfi = self.data[:, (self.count - 1) % self.capacity]
+        return {
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "price": float(c),
+            "ema_9": float(ema) if not np.isnan(ema) else 0,
+            "rsi": float(rsi) if not np.isnan(rsi) else 50,
+            "mfi": float(mfi) if not np.isnan(mfi) else 50,
+            "volume": float(v),
+            "ohlc": {"open": float(o), "high": float(h), "low": float(l), "close": float(c)},
+            "timestamp": float(t),
+            "source": "candles",
+        }
+
+    def to_arrays(self, bars: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Copy of the last `bars` bars (default: all held), oldest first"""
+        held = len(self)
+        bars = held if bars is None else min(bars, held)
+        start = (self.count - bars) % self.capacity
+        order = (start + np.arange(bars)) % self.capacity
+        return {name: self.data[i, order] for i, name in enumerate(self.FIELDS)}
+
+
+def _ratio_index(up: float, down: float) -> float:
+    """100 - 100 / (1 + up/down), the shape shared by RSI and MFI"""
+    if down == 0:
+        return 100.0 if up > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + up / down)
+
+
+class CandleStore:
+    """All candle series the bot tracks, keyed by (symbol, timeframe)"""
+
+    def __init__(self, symbols: Optional[list] = None, timeframes: Optional[list] = None,
+                 capacity: int = DEFAULT_CAPACITY, config: dict = CHART_CONFIG):
+        indicators = config.get("indicators", {})
+        self.ema_length = indicators.get("EMA", {}).get("length", 9)
+        self.rsi_length = indicators.get("RSI", {}).get("length", 14)
+        self.mfi_length = indicators.get("MFI", {}).get("length", DEFAULT_MFI_LENGTH)
+        self.capacity = capacity
+        self.timeframes = list(timeframes or config["timeframes"])
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        for symbol in symbols or config["symbols"]:
+            for timeframe in self.timeframes:
+                self.series(symbol, timeframe)
+
+    def series(self, symbol: str, timeframe: str) -> CandleSeries:
+        """Get (or create) the series for a symbol/timeframe"""
+        key = (symbol, timeframe)
+        if key not in self._series:
+            self._series[key] = CandleSeries(
+                symbol, timeframe, self.capacity,
+                ema_length=self.ema_length, rsi_length=self.rsi_length, mfi_length=self.mfi_length,
+            )
+        return self._series[key]
+
+    def on_tick(self, symbol: str, price: float, volume: float = 0.0, timestamp: Optional[float] = None):
+        """Fold a tick into every timeframe tracked for the symbol"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for timeframe in self.timeframes:
+            self.series(symbol, timeframe).on_tick(price, volume, timestamp)
+
+    def on_bar(self, symbol: str, timeframe: str, timestamp: float, open_: float,
+               high: float, low: float, close: float, volume: float = 0.0):
+        """Feed a finished (or updating) bar straight into one series"""
+        self.series(symbol, timeframe).update(timestamp, open_, high, low, close, volume)
+
+    def latest(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        key = (symbol, timeframe)
+        return self._series[key].latest() if key in self._series else None
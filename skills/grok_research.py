@@ -9,26 +9,82 @@ Usage:
 Or import and use:
     from grok_research import research
     result = research("What are the best trading strategies?")
+
+Answers are cached (see research_cache.py) for GROK_CACHE_TTL seconds, and
+on disk too when GROK_CACHE_PATH is set.
+
+Several questions at once (async, one pooled session):
+    async with GrokClient() as grok:
+        async for query, answer in grok.research_many(queries):
+            print(query, answer)
+
+Streaming, acting on the first line of the answer:
+    async for text in grok.stream_with_context(query, context, stop=first_line):
+        ...
 """
 
+import asyncio
+import json
 import os
 import requests
-from typing import Optional, Dict
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from research_cache import DEFAULT_TTL, ResponseCache, cache_key
 
 # xAI Grok API
 # Get your API key from https://console.x.ai/
 # Note: May need to set up billing
 
 XAI_API_KEY = os.environ.get("XAI_API_KEY", "")
+GROK_API_BASE = os.environ.get("GROK_API_BASE", "https://api.x.ai/v1")
+GROK_API_URL = f"{GROK_API_BASE}/chat/completions"
+DEFAULT_MODEL = "grok-2-1212"
+
+DEFAULT_TIMEOUT = 60  # seconds per completion
+DEFAULT_CONCURRENCY = 8  # completions in flight at once
+
+SYSTEM_PROMPT = """You are a research assistant. 
+    Provide thorough, accurate information with sources when possible.
+    Be concise but comprehensive. Format results clearly."""
+
+# Shared by every caller - the same question asked twice is answered once
+CACHE = ResponseCache(
+    ttl=float(os.environ.get("GROK_CACHE_TTL", DEFAULT_TTL)),
+    path=os.environ.get("GROK_CACHE_PATH") or None,
+)
+
+# One keep-alive connection for every request
+_session = requests.Session()
+
+
+def _is_answer(text: str) -> bool:
+    """Only real answers are cached, not error strings"""
+    return not text.startswith(("ERROR:", "Error:", "Exception:"))
+
+
+def first_line(text: str) -> bool:
+    """Stop predicate for streaming: the first full line (e.g. a verdict) has arrived"""
+    return "\n" in text.lstrip()
+
+
+def _context_query(query: str, context: str) -> str:
+    return f"""Context: {context}
 
+Question: {query}
+
+Provide a thorough answer considering the context above."""
 
-def research(query: str, model: str = "grok-2-1212") -> Optional[str]:
+
+def research(query: str, model: str = DEFAULT_MODEL, cache: Optional[ResponseCache] = CACHE) -> Optional[str]:
     """
     Use Grok to research a query.
     
     Args:
         query: The research question
         model: Grok model to use (default: grok-2-1212)
+        cache: ResponseCache to consult first (None to always ask)
         
     Returns:
         Research results as string
@@ -36,91 +92,343 @@ def research(query: str, model: str = "grok-2-1212") -> Optional[str]:
     if not XAI_API_KEY:
         return "ERROR: XAI_API_KEY not set. Get key from https://console.x.ai/"
     
-    url = "https://api.x.ai/v1/chat/completions"
-    
     headers = {
         "Authorization": f"Bearer {XAI_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    system_prompt = """You are a research assistant. 
-    Provide thorough, accurate information with sources when possible.
-    Be concise but comprehensive. Format results clearly."""
-    
     data = {
         "model": model,
         "messages": [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": query}
         ],
         "max_tokens": 2000
     }
     
-    try:
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            return f"Error: {response.status_code} - {response.text}"
-    except Exception as e:
-        return f"Exception: {e}"
+    def ask():
+        try:
+            response = _session.post(GROK_API_URL, headers=headers, json=data)
+            if response.status_code == 200:
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
+            else:
+                return f"Error: {response.status_code} - {response.text}"
+        except Exception as e:
+            return f"Exception: {e}"
+    
+    if cache is None:
+        return ask()
+    return cache.get_or_compute(cache_key(model, SYSTEM_PROMPT, query), ask, _is_answer)
 
 
-def research_with_context(query: str, context: str) -> Optional[str]:
+def research_with_context(query: str, context: str, cache: Optional[ResponseCache] = CACHE) -> Optional[str]:
     """
     Research with additional context (e.g., for trading decisions)
     
     Args:
         query: Research question
         context: Additional context to consider
+        cache: ResponseCache to consult first (None to always ask)
     """
     if not XAI_API_KEY:
         return "ERROR: XAI_API_KEY not set"
     
-    url = "https://api.x.ai/v1/chat/completions"
-    
     headers = {
         "Authorization": f"Bearer {XAI_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    full_query = f"""Context: {context}
-
-Question: {query}
-
-Provide a thorough answer considering the context above."""
+    full_query = _context_query(query, context)
 
     data = {
-        "model": "grok-2-1212",
+        "model": DEFAULT_MODEL,
         "messages": [{"role": "user", "content": full_query}],
         "max_tokens": 2000
     }
     
+    def ask():
+        try:
+            response = _session.post(GROK_API_URL, headers=headers, json=data)
+            if response.status_code == 200:
+                result = response.json()
+                return result["choices"][0]["message"]["content"]
+            else:
+                return f"Error: {response.status_code}"
+        except Exception as e:
+            return f"Exception: {e}"
+    
+    if cache is None:
+        return ask()
+    return cache.get_or_compute(cache_key(DEFAULT_MODEL, None, query, context), ask, _is_answer)
+
+
+class GrokClient:
+    """
+    Async Grok client: one keep-alive connection pool, a cap on requests in
+    flight, a timeout per completion, and the same answer cache as research().
+
+    Errors come back as the same "Error: ..." / "Exception: ..." strings the
+    sync functions return, so one failed query never sinks a batch.
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 cache: Optional[ResponseCache] = CACHE):
+        self.api_key = XAI_API_KEY if api_key is None else api_key
+        self.base_url = (base_url or GROK_API_BASE).rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "GrokClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def complete(self, messages: List[dict], model: str = DEFAULT_MODEL,
+                       timeout: Optional[float] = None) -> str:
+        """One chat completion; returns the answer or an error string"""
+        if not self.api_key:
+            return "ERROR: XAI_API_KEY not set. Get key from https://console.x.ai/"
+        session = await self._get_session()
+        data = {"model": model, "messages": messages, "max_tokens": 2000}
+        call_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+        try:
+            async with self._semaphore:
+                async with session.post(f"{self.base_url}/chat/completions", json=data,
+                                        timeout=call_timeout) as response:
+                    if response.status == 200:
+                        result = await response.json(content_type=None)
+                        return result["choices"][0]["message"]["content"]
+                    return f"Error: {response.status} - {await response.text()}"
+        except asyncio.TimeoutError:
+            return f"Exception: no answer within {timeout or self.timeout}s"
+        except Exception as e:
+            return f"Exception: {e}"
+
+    async def _cached(self, key: str, ask) -> str:
+        if self.cache is None:
+            return await ask()
+        return await self.cache.get_or_compute_async(key, ask, _is_answer)
+
+    async def research(self, query: str, model: str = DEFAULT_MODEL, timeout: Optional[float] = None) -> str:
+        """Async research()"""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": query},
+        ]
+        return await self._cached(cache_key(model, SYSTEM_PROMPT, query),
+                                  lambda: self.complete(messages, model, timeout))
+
+    async def research_with_context(self, query: str, context: str, timeout: Optional[float] = None) -> str:
+        """Async research_with_context()"""
+        messages = [{"role": "user", "content": _context_query(query, context)}]
+        return await self._cached(cache_key(DEFAULT_MODEL, None, query, context),
+                                  lambda: self.complete(messages, DEFAULT_MODEL, timeout))
+
+    async def stream(self, messages: List[dict], model: str = DEFAULT_MODEL,
+                     stop: Optional[Callable[[str], bool]] = None,
+                     timeout: Optional[float] = None,
+                     status: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Stream a completion; yields each text delta as it arrives.
+
+        `stop` is called with the text so far after every delta - once it
+        returns True the stream is closed, and the rest of the generation
+        is abandoned. Errors are yielded as a single error string.
+
+        If a `status` dict is given, it is filled in as the stream ends:
+        "done" is True only when the server sent [DONE], "stopped" when
+        `stop` cut it short, and "error" holds the error yielded, if any.
+        """
+        if status is None:
+            status = {}
+        status.update(done=False, stopped=False, error=None)
+        if not self.api_key:
+            status["error"] = "ERROR: XAI_API_KEY not set. Get key from https://console.x.ai/"
+            yield status["error"]
+            return
+        session = await self._get_session()
+        data = {"model": model, "messages": messages, "max_tokens": 2000, "stream": True}
+        # Streams can legitimately run long - bound the wait for each chunk instead
+        call_timeout = aiohttp.ClientTimeout(sock_read=timeout or self.timeout)
+        text = ""
+        try:
+            async with self._semaphore:
+                async with session.post(f"{self.base_url}/chat/completions", json=data,
+                                        timeout=call_timeout) as response:
+                    if response.status != 200:
+                        status["error"] = f"Error: {response.status} - {await response.text()}"
+                        yield status["error"]
+                        return
+                    # Server-sent events: "data: {json}" lines, ending with "data: [DONE]"
+                    async for raw in response.content:
+                        line = raw.decode("utf-8", "replace").strip()
+                        if not line.startswith("data:"):
+                            continue
+                        payload = line[5:].strip()
+                        if payload == "[DONE]":
+                            status["done"] = True
+                            return
+                        choices = json.loads(payload).get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content")
+                        if not delta:
+                            continue
+                        text += delta
+                        yield delta
+                        if stop is not None and stop(text):
+                            status["stopped"] = True
+                            response.close()  # drop the connection rather than read the rest
+                            return
+        except asyncio.TimeoutError:
+            status["error"] = f"Exception: stream stalled for {timeout or self.timeout}s"
+            yield status["error"]
+        except (aiohttp.ClientError, ValueError) as e:
+            status["error"] = f"Exception: {e}"
+            yield status["error"]
+
+    async def stream_with_context(self, query: str, context: str,
+                                  stop: Optional[Callable[[str], bool]] = None,
+                                  timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Streaming research_with_context().
+
+        A cached answer is yielded whole. Only a stream the server finished
+        with [DONE] is cached - not one cut short by `stop`, one that broke
+        off early, or one that ended in an error.
+        """
+        key = cache_key(DEFAULT_MODEL, None, query, context)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        messages = [{"role": "user", "content": _context_query(query, context)}]
+        text = ""
+        status = {}
+        async for delta in self.stream(messages, DEFAULT_MODEL, stop=stop, timeout=timeout, status=status):
+            text += delta
+            yield delta
+        if self.cache is not None and status["done"] and text and _is_answer(text):
+            self.cache.put(key, text)
+
+    async def research_many(self, queries: Iterable[str], model: str = DEFAULT_MODEL,
+                            timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Ask every query at once; yields (query, answer) as each one finishes.
+
+        Stopping early cancels the queries still outstanding.
+        """
+        async def ask(query):
+            return query, await self.research(query, model, timeout)
+
+        tasks = [asyncio.ensure_future(ask(q)) for q in queries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def research_batch(self, queries: Iterable[str], model: str = DEFAULT_MODEL,
+                             timeout: Optional[float] = None) -> Dict[str, str]:
+        """research_many, collected into {query: answer}"""
+        return {query: answer async for query, answer in self.research_many(queries, model, timeout)}
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def pre_open_queries(symbols: Iterable[str] = None) -> Dict[str, str]:
+    """{symbol: question} for the pre-open research pass"""
+    if symbols is None:
+        from tradingview_reader import CHART_CONFIG
+        symbols = CHART_CONFIG["symbols"]
+    return {
+        symbol: f"What is the latest news and market sentiment for {symbol}? "
+                f"List anything that could move the price today."
+        for symbol in symbols
+    }
+
+
+async def research_symbols(symbols: Iterable[str] = None, client: GrokClient = None) -> Dict[str, str]:
+    """
+    Pre-open research for every symbol, asked concurrently.
+
+    Takes about as long as the slowest single answer; prints each as it lands.
+    """
+    queries = pre_open_queries(symbols)
+    by_query = {query: symbol for symbol, query in queries.items()}
+    owned = client is None
+    client = client or GrokClient()
+    results = {}
     try:
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-        else:
-            return f"Error: {response.status_code}"
-    except Exception as e:
-        return f"Exception: {e}"
+        async for query, answer in client.research_many(queries.values()):
+            symbol = by_query[query]
+            results[symbol] = answer
+            print(f"\n=== {symbol} ===\n{answer}")
+    finally:
+        if owned:
+            await client.close()
+    return results
 
 
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Grok Research Tool")
-    parser.add_argument("--query", "-q", required=True, help="Research query")
+    parser.add_argument("--query", "-q", help="Research query")
+    parser.add_argument("--symbols", "-s", nargs="*", metavar="SYMBOL",
+                        help="Pre-open research for these symbols at once (default: all chart symbols)")
     parser.add_argument("--context", "-c", help="Additional context")
-    parser.add_argument("--model", "-m", default="grok-2-1212", help="Model to use")
+    parser.add_argument("--model", "-m", default=DEFAULT_MODEL, help="Model to use")
+    parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated (with --context)")
+    parser.add_argument("--first-line", action="store_true", help="With --stream, stop after the first line")
+    parser.add_argument("--no-cache", action="store_true", help="Always ask Grok, ignore cached answers")
     
     args = parser.parse_args()
+    cache = None if args.no_cache else CACHE
+    
+    async def pre_open():
+        async with GrokClient(cache=cache) as grok:
+            await research_symbols(args.symbols or None, grok)
+    
+    if args.symbols is not None:
+        asyncio.run(pre_open())
+        raise SystemExit(0)
+    if not args.query:
+        parser.error("--query is required (or use --symbols)")
+    
+    async def stream():
+        async with GrokClient(cache=cache) as grok:
+            stop = first_line if args.first_line else None
+            async for delta in grok.stream_with_context(args.query, args.context, stop=stop):
+                print(delta, end="", flush=True)
+        print()
+    
+    if args.context and args.stream:
+        asyncio.run(stream())
+        raise SystemExit(0)
     
     if args.context:
-        result = research_with_context(args.query, args.context)
+        result = research_with_context(args.query, args.context, cache=cache)
     else:
-        result = research(args.query, args.model)
+        result = research(args.query, args.model, cache=cache)
     
     print(result)
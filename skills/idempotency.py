@@ -0,0 +1,103 @@
+"""
+Idempotency Cache
+Remembers which orders were already submitted, so a retry can't double-fill
+
+Orders are keyed by a hash of what they do (the signal / prompt), and the
+cache maps that key to the Bankr jobId and, once known, its result. Before
+submitting, callers look the key up: a finished order returns its result, an
+in-flight one is awaited by jobId, and only a miss submits a new prompt.
+Entries expire after a TTL, so the same trade can be placed again later.
+
+Usage:
+    orders = IdempotencyCache(ttl=300)
+    key = order_key("trade", "buy", "BTC", 0.01)
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_TTL = 300  # seconds an order key is remembered
+MAX_ENTRIES = 4096
+
+
+def order_key(*parts: Any) -> str:
+    """Stable hash of an order's defining fields (dicts are key-sorted)"""
+    blob = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+
+class IdempotencyCache:
+    """TTL + LRU map of order key -> {"jobId", "result", "expires"}"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Keys being submitted right now - concurrent callers wait on these
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        self._evict()
+        return len(self._entries)
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry["expires"] > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+        # Expired entries can also sit behind fresher ones after a touch
+        for key in [k for k, e in self._entries.items() if e["expires"] <= now]:
+            del self._entries[key]
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, job_id: Optional[str] = None, result: Optional[dict] = None):
+        entry = self._entries.get(key) or {}
+        if job_id is not None:
+            entry["jobId"] = job_id
+        if result is not None:
+            entry["result"] = result
+        entry["expires"] = time.monotonic() + self.ttl
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    def discard(self, key: str):
+        self._entries.pop(key, None)
+
+    def claim(self, key: str) -> Optional[asyncio.Future]:
+        """
+        Mark `key` as being submitted.
+
+        Returns None if the caller now owns the submission (and must call
+        release), or the owner's future to await if someone else does.
+        """
+        if key in self._inflight:
+            return self._inflight[key]
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+
+    def release(self, key: str, result: Optional[dict] = None, error: Optional[BaseException] = None):
+        future = self._inflight.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # mark retrieved - waiters re-raise on await
+        else:
+            future.set_result(result)
@@ -4,10 +4,30 @@ Aftermath x TradingView Trading Bot
 Real-time mode - reads from your TradingView browser tab
 
 Usage:
-    python3 main.py --symbol BTCUSD --timeframe 5m --live
-    
+    python3 main.py --symbol BTCUSD --timeframe 5m 1h --live --tab 5m=TAB_A --tab 1h=TAB_B
+    python3 main.py --symbol BTCUSD SOLUSDT SUIUSD --timeframe 5m 15m --dry-run
+    python3 main.py --all --dry-run
+    python3 main.py --all --event-driven --replay ticks.jsonl --dry-run
+    WEBHOOK_SECRET=... python3 main.py --all --webhook 8787 --dry-run
+
+Every (symbol, timeframe) pair runs as its own asyncio task. Each symbol
+has one AftermathBot (its position), and all tasks share the Bankr client
+and the price feed. With --event-driven there is no timer: each tick from
+the feed triggers stop-loss/take-profit checks and signal evaluation.
+With --webhook, TradingView alerts posted to the webhook server (see
+webhook_server.py) drive evaluation instead. With --live, each symbol reads
+all of its timeframe tabs (--tab [SYMBOL:]TIMEFRAME=TAB_ID) at once and
+trades on their confluence. Reading tabs needs the OpenClaw browser, which
+the host passes as main(browser=...); run from the command line there is
+no browser, and --live scores demo values only.
+
 Environment variables:
     WALLET_PRIVATE_KEY: Your Sui wallet private key
+    PRICE_FEED_URL: Structured tick feed (see price_feed.py)
+    WEBHOOK_SECRET: Shared secret TradingView alerts must carry (--webhook)
+
+With --post-alerts, signal changes are queued for X (see post_queue.py) and
+posted by a background worker, so the trading loop never waits on it.
 """
 
 import argparse
@@ -19,27 +39,50 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from aftermath_bot import AftermathBot, CONFIG
-from tradingview_reader import TRADING_LEVELS, calculate_signal
+from bankr_client import get_client
+from candle_store import CandleStore
+import metrics
+from metrics import span
+from post_queue import PostQueue
+from price_feed import PRICE_FEED_URL, ReplayPriceSource, WebSocketPriceFeed
+from snapshot_cache import SnapshotCache
+from state_journal import StateJournal
+from tick_dispatcher import TickDispatcher
+from trigger_index import TriggerIndex, add_level_triggers, add_position_triggers
+from tradingview_reader import (CHART_CONFIG, TRADING_LEVELS, calculate_signal, confluence_signal,
+                                read_timeframes, read_tradingview_browser)
+from webhook_server import WEBHOOK_SECRET, WebhookServer
+
 
+# tab_id -> SnapshotCache, kept across reads of the same tab
+_snapshot_caches = {}
 
-async def read_live_chart(browser, tradingview_tab_id: str) -> dict:
+
+async def read_live_chart(browser, tradingview_tab_id: str, symbol: str = "BTCUSD") -> dict:
     """
     Read live chart data from TradingView browser tab.
-    
+
     This function reads directly from your open TradingView tab
     and extracts current price, EMA, RSI values dynamically.
-    
+
     Args:
         browser: OpenClaw browser instance
         tradingview_tab_id: ID of the TradingView tab
-        
+        symbol: Symbol shown in the tab
+
     Returns:
         dict with price, ema_9, rsi, ohlc
     """
-    # In live mode, this would read from browser
-    # For demo, using current chart values
+    if browser is not None:
+        # One cache per tab: field locations and unchanged values carry over between reads
+        cache = _snapshot_caches.setdefault(tradingview_tab_id, SnapshotCache())
+        chart_data = await read_tradingview_browser(browser, tradingview_tab_id, cache=cache)
+        chart_data["symbol"] = symbol
+        return chart_data
+
+    # No browser attached - demo values from the current chart
     return {
-        "symbol": "BTCUSD",
+        "symbol": symbol,
         "price": 67300.92,
         "ema_9": 67129.92,
         "rsi": 50,
@@ -47,111 +90,518 @@ async def read_live_chart(browser, tradingview_tab_id: str) -> dict:
             "open": 67079.62,
             "high": 67458.00,
             "low": 67076.30,
-            "close": 
+            "close": 67300.92
         },
-       67300.92 "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+async def read_live_timeframes(browser, tabs: dict, symbol: str, timeframes: list) -> dict:
+    """
+    Read every timeframe tab of a symbol at once (see read_timeframes).
+
+    Args:
+        browser: OpenClaw browser instance
+        tabs: timeframe -> ID of the TradingView tab showing it
+        symbol: Symbol shown in the tabs
+        timeframes: Timeframes to read
+
+    Returns:
+        {"symbol", "timeframes": {timeframe: chart_data}, "missing": {timeframe: reason}, "elapsed_ms"}
+    """
+    if browser is not None:
+        tabs = {timeframe: tabs[timeframe] for timeframe in timeframes if timeframe in tabs}
+        caches = {timeframe: _snapshot_caches.setdefault(tab_id, SnapshotCache())
+                  for timeframe, tab_id in tabs.items()}
+        view = await read_timeframes(browser, tabs, symbol, caches=caches)
+        for timeframe in timeframes:
+            if timeframe not in tabs:
+                view["missing"][timeframe] = "no tab"
+        return view
+
+    # No browser attached - the demo values on every timeframe
+    chart_data = await read_live_chart(None, None, symbol)
+    return {"symbol": symbol, "timeframes": {timeframe: dict(chart_data, timeframe=timeframe)
+                                             for timeframe in timeframes},
+            "missing": {}, "elapsed_ms": 0.0}
+
+
+class Market:
+    """Shared state for one symbol: its bot/position and a lock around trading"""
+
+    def __init__(self, symbol: str, config: dict, candles: CandleStore, triggers: TriggerIndex,
+                 journal: StateJournal = None, outbox: PostQueue = None):
+        self.symbol = symbol
+        self.outbox = outbox
+        self.triggers = triggers
+        self.bot = AftermathBot(config, candles=candles, symbol=symbol, journal=journal)
+        # Positions opened before a restart are picked up from the journal
+        self.bot.restore()
+        # Timeframes of the same symbol must not open two positions at once
+        self.lock = asyncio.Lock()
+        # Last signal direction per timeframe, to only report changes
+        self.directions = {}
+        # Stop-loss / take-profit (and TP1/TP2) of the open position live in the trigger index
+        self.arm_exits()
+
+    def arm_exits(self):
+        """Replace the position's exit triggers - call whenever the position opens or closes"""
+        self.triggers.remove_where(self.symbol, position=True)
+        bot = self.bot
+        if bot.position and bot.entry_price:
+            add_position_triggers(self.triggers, self.symbol, bot.position, bot.entry_price,
+                                  bot.config, levels=TRADING_LEVELS.get(self.symbol), position=True)
+
+
+async def get_chart_data(symbol: str, timeframe: str, args, feed, candles: CandleStore) -> dict:
+    """Chart values for one market from the candles poll_prices fills, or demo data"""
+    if feed is not None:
+        latest = candles.latest(symbol, timeframe)
+        if latest:
+            return latest
+
+    # Demo data
+    return {
+        "symbol": symbol,
+        "price": 67300.92,
+        "ema_9": 67129.92,
+        "rsi": 50
     }
 
 
-async def main():
+def report_crosses(market: Market, crossed: list, price: float):
+    """Print the strategy levels / S/R lines the price just crossed"""
+    for trigger in crossed:
+        arrow = "⬆️" if trigger["direction"] == "above" else "⬇️"
+        print(f"  {arrow} {market.symbol}: crossed {trigger['kind']} ${trigger['level']:,.2f} (now ${price:,.2f})")
+
+
+async def check_exits(market: Market, price: float, fired: list) -> bool:
+    """Close the symbol's position if its stop-loss or take-profit trigger fired"""
+    bot = market.bot
+    if not bot.position or not fired:
+        return False
+    kinds = {trigger["kind"] for trigger in fired}
+    for name in ("tp1", "tp2"):
+        if name in kinds:
+            print(f"  🎯 {market.symbol}: {name.upper()} reached at ${price:,.2f}")
+    if "stop_loss" not in kinds and "take_profit" not in kinds:
+        return False
+    async with market.lock:
+        if not bot.position:
+            return False
+        if "stop_loss" in kinds:
+            print(f"  🛑 {market.symbol}: stop-loss hit at ${price:,.2f}")
+        else:
+            print(f"  ✅ {market.symbol}: take-profit hit at ${price:,.2f}")
+        await bot.close_position(price)
+        market.arm_exits()
+        return True
+
+
+async def on_price(market: Market, price: float) -> bool:
+    """
+    Feed a new price to the trigger index: one bisect per side finds the
+    level crosses to report and the position's exits to act on.
+    Returns True if the position was closed.
+    """
+    crossed, exits = [], []
+    for trigger in market.triggers.update(market.symbol, price):
+        (exits if trigger.get("position") else crossed).append(trigger)
+    report_crosses(market, crossed, price)
+    return await check_exits(market, price, exits)
+
+
+async def execute(market: Market, signal: dict, args):
+    """Act on a signal: open a position when it is strong enough, else keep monitoring"""
+    symbol = market.symbol
+    bot = market.bot
+    if args.dry_run:
+        return
+    async with market.lock:
+        if signal["direction"] != "neutral" and signal["strength"] > 0.7:
+            if not bot.position:
+                print(f"  → {symbol}: opening {signal['direction']} position...")
+                # await bot.open_position(...)
+                # market.arm_exits()
+        elif bot.position:
+            print(f"  → {symbol}: monitoring position...")
+
+
+async def evaluate(market: Market, timeframe: str, chart_data: dict, args, verbose: bool = True,
+                   trade: bool = True) -> dict:
+    """Score one chart reading and act on it (unless `trade` is False); returns the signal"""
+    symbol = market.symbol
+
+    # Get strategy levels
+    current_levels = TRADING_LEVELS.get(symbol, {})
+
+    # Calculate signal with dynamic levels
+    with span("signal"):
+        signal = calculate_signal(
+            chart_data["price"],
+            chart_data.get("ema_9", 0),
+            chart_data.get("rsi", 50),
+            symbol
+        )
+
+    # Dynamic level adjustment based on current price
+    price = chart_data["price"]
+    long_level = current_levels.get("long_level", price * 0.99)
+    short_level = current_levels.get("short_level", price * 1.01)
+
+    changed = market.directions.get(timeframe) != signal["direction"]
+    market.directions[timeframe] = signal["direction"]
+
+    tag = f"[{datetime.now().strftime('%H:%M:%S')}] {symbol} {timeframe}"
+    if verbose or changed:
+        print(f"\n{tag}\n"
+              f"  💰 Price:        ${price:,.2f}\n"
+              f"  📈 EMA9:         ${chart_data.get('ema_9', 0):,.2f}\n"
+              f"  📉 RSI:          {chart_data.get('rsi', 50)}\n"
+              f"  🎯 Long Level:   ${long_level:,.2f}\n"
+              f"  🎯 Short Level:  ${short_level:,.2f}\n"
+              f"  ⚡ Signal:       {signal['direction'].upper()} (strength: {signal['strength']:.2f})\n"
+              f"  💡 Reason:       {signal['reason']}")
+
+    if changed and market.outbox is not None and signal["direction"] != "neutral":
+        market.outbox.enqueue(f"{symbol} {timeframe}: {signal['direction'].upper()} at ${price:,.2f} "
+                              f"(strength {signal['strength']:.2f}) - {signal['reason']}")
+
+    # Execute if signal is strong
+    if trade:
+        await execute(market, signal, args)
+
+    return signal
+
+
+async def poll_prices(symbols: list, args, feed, candles: CandleStore, polled: asyncio.Condition):
+    """
+    Fetch every symbol's price once per interval and fold it into the candles.
+
+    One tick per symbol updates all of its timeframes, so the per-timeframe
+    tasks only read the candles; they are woken through `polled`.
+    """
+    while True:
+        try:
+            prices = await feed.get_prices(symbols)
+            for symbol in symbols:
+                price = prices.get(symbol.upper())
+                if price:
+                    candles.on_tick(symbol, price)
+        except Exception as e:
+            print(f"Error fetching prices: {e}")
+        async with polled:
+            polled.notify_all()
+        await asyncio.sleep(args.interval)
+
+
+async def run_market(market: Market, timeframe: str, args, feed, candles: CandleStore,
+                     polled: asyncio.Condition = None):
+    """Polling loop for one (symbol, timeframe); with `polled`, runs after each price poll"""
+    while True:
+        if polled is not None:
+            async with polled:
+                await polled.wait()
+        try:
+            with span("chart_data"):
+                chart_data = await get_chart_data(market.symbol, timeframe, args, feed, candles)
+            await on_price(market, chart_data["price"])
+            await evaluate(market, timeframe, chart_data, args)
+        except Exception as e:
+            print(f"Error in {market.symbol} {timeframe}: {e}")
+
+        # Wait before next iteration
+        if polled is None:
+            await asyncio.sleep(args.interval)
+
+
+async def run_live_market(market: Market, timeframes: list, args, browser=None, tabs: dict = None):
+    """
+    Live loop for one symbol: every timeframe tab is read at once, each
+    timeframe is scored, and the position follows their confluence rather
+    than any single timeframe.
+    """
+    symbol = market.symbol
+    while True:
+        try:
+            with span("chart_data"):
+                view = await read_live_timeframes(browser, tabs or {}, symbol, timeframes)
+            for timeframe, reason in view["missing"].items():
+                print(f"  ⚠️  {symbol} {timeframe}: {reason}")
+            if view["timeframes"]:
+                # The fastest timeframe read has the freshest price
+                await on_price(market, next(iter(view["timeframes"].values()))["price"])
+                for timeframe, chart_data in view["timeframes"].items():
+                    await evaluate(market, timeframe, chart_data, args, trade=False)
+                with span("signal"):
+                    signal = confluence_signal(view, symbol)
+                print(f"  🧭 {symbol} confluence: {signal['direction'].upper()} {signal['agreement']} "
+                      f"(strength: {signal['strength']:.2f}) - {len(view['timeframes'])} tab(s) read "
+                      f"in {view['elapsed_ms']:.0f} ms\n"
+                      f"  💡 Reason:       {signal['reason']}")
+                await execute(market, signal, args)
+        except Exception as e:
+            print(f"Error in {symbol}: {e}")
+
+        await asyncio.sleep(args.interval)
+
+
+async def run_event_driven(markets: dict, timeframes: list, args, feed, candles: CandleStore):
+    """
+    Evaluate markets as ticks arrive rather than on a timer.
+
+    Exits are checked first, straight off the tick price; then each
+    timeframe's signal is re-scored from the updated candles. Only
+    signal changes are printed.
+    """
+    by_feed_symbol = {symbol.upper(): market for symbol, market in markets.items()}
+
+    async def on_tick(tick: dict):
+        market = by_feed_symbol[tick["symbol"]]
+        with span("tick"):
+            with span("candles"):
+                candles.on_tick(market.symbol, tick["price"], tick["volume"], tick["timestamp"])
+            await on_price(market, tick["price"])
+            for timeframe in timeframes:
+                chart_data = candles.latest(market.symbol, timeframe)
+                await evaluate(market, timeframe, chart_data, args, verbose=False)
+
+    dispatcher = TickDispatcher(feed, on_tick, debounce=args.debounce, symbols=list(by_feed_symbol))
+    try:
+        await dispatcher.run()
+    finally:
+        stats = dispatcher.stats()
+        print(f"\n📡 Ticks: {stats['received']} received, {stats['handled']} handled, "
+              f"{stats['coalesced']} coalesced | latency last {stats['last_latency_ms']:.2f} ms, "
+              f"max {stats['max_latency_ms']:.2f} ms")
+
+
+async def run_webhook(markets: dict, timeframes: list, args, server: WebhookServer):
+    """
+    Evaluate markets as TradingView alerts arrive on the webhook server.
+
+    An alert carries the chart values itself, so it goes straight to the
+    exit checks and evaluate(); alerts without a timeframe count for the
+    first one configured.
+    """
+    by_alert_symbol = {symbol.upper(): market for symbol, market in markets.items()}
+    try:
+        while True:
+            signal = await server.get()
+            try:
+                market = by_alert_symbol[signal.symbol]
+                chart_data = {"symbol": market.symbol, "price": signal.price,
+                              "ema_9": signal.ema_9, "rsi": signal.rsi}
+                with span("alert"):
+                    await on_price(market, signal.price)
+                    await evaluate(market, signal.timeframe or timeframes[0], chart_data, args, verbose=False)
+            except Exception as e:
+                print(f"Error handling {signal.symbol} alert: {e}")
+    finally:
+        stats = server.summary()
+        print(f"\n🔔 Alerts: {stats['received']} received, {stats['accepted']} accepted, "
+              f"{stats['rejected']} bad secret, {stats['invalid']} invalid, {stats['dropped']} dropped | "
+              f"receipt to evaluation last {stats['last_latency_ms']:.2f} ms, max {stats['max_latency_ms']:.2f} ms")
+
+
+async def export_metrics(path: str, every: float = 10.0):
+    """Rewrite the Prometheus text file every few seconds"""
+    while True:
+        await asyncio.sleep(every)
+        metrics.write_textfile(path)
+
+
+def make_feed(args):
+    """Price feed shared by every market, if one is configured"""
+    if args.replay:
+        return ReplayPriceSource(args.replay, speed=args.replay_speed)
+    if PRICE_FEED_URL:
+        return WebSocketPriceFeed(PRICE_FEED_URL)
+    return None
+
+
+def parse_tabs(specs: list, symbols: list) -> dict:
+    """
+    --tab values -> {symbol: {timeframe: tab_id}}
+
+    "BTCUSD:5m=TAB_ID" names the symbol; "5m=TAB_ID" is allowed when
+    there is only one symbol. Raises ValueError on anything else.
+    """
+    tabs = {symbol: {} for symbol in symbols}
+    for spec in specs or []:
+        key, sep, tab_id = spec.partition("=")
+        symbol, _, timeframe = key.rpartition(":")
+        if not sep or not timeframe or not tab_id:
+            raise ValueError(f"bad --tab {spec!r}, expected [SYMBOL:]TIMEFRAME=TAB_ID")
+        if not symbol:
+            if len(symbols) != 1:
+                raise ValueError(f"--tab {spec!r} needs a symbol (SYMBOL:TIMEFRAME=TAB_ID) with several symbols")
+            symbol = symbols[0]
+        if symbol not in tabs:
+            raise ValueError(f"--tab {spec!r}: {symbol} is not being traded")
+        tabs[symbol][timeframe] = tab_id
+    return tabs
+
+
+async def main(browser=None):
+    """
+    Args:
+        browser: OpenClaw browser instance for --live; without one --live
+            scores demo values, not the tabs
+    """
     parser = argparse.ArgumentParser(description="Aftermath Trading Bot - Live")
-    parser.add_argument("--symbol", default="BTCUSD", help="Trading symbol")
-    parser.add_argument("--timeframe", default="5m", help="Timeframe")
-    parser.add_argument("--live", action="store_true", help="Live mode (read from browser)")
+    parser.add_argument("--symbol", nargs="+", default=["BTCUSD"], help="Trading symbol(s)")
+    parser.add_argument("--timeframe", nargs="+", default=["5m"], help="Timeframe(s)")
+    parser.add_argument("--all", action="store_true", help="Every symbol and timeframe in CHART_CONFIG")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between reads per market")
+    parser.add_argument("--replay", help="Replay ticks from a JSONL/CSV file instead of the live feed")
+    parser.add_argument("--replay-speed", type=float, default=0.0,
+                        help="Replay pacing (1.0 = real time, 0 = as fast as possible)")
+    parser.add_argument("--event-driven", action="store_true", help="Evaluate on every feed tick instead of polling")
+    parser.add_argument("--webhook", type=int, metavar="PORT",
+                        help="Evaluate on TradingView webhook alerts received on this port")
+    parser.add_argument("--debounce", type=float, default=0.0, help="Seconds to coalesce a tick burst (event mode)")
+    parser.add_argument("--journal-sync", choices=["off", "normal", "full"], default="normal",
+                        help="State journal durability (full = fsync every batch)")
+    parser.add_argument("--post-alerts", choices=["digest", "thread", "single"], nargs="?", const="digest",
+                        help="Post signal changes to X through the outbound queue")
+    parser.add_argument("--metrics-file", help="Write per-stage latency metrics (Prometheus text format) here")
+    parser.add_argument("--metrics-port", type=int, help="Serve per-stage latency metrics on this port")
+    parser.add_argument("--live", action="store_true",
+                        help="Live mode: trade the confluence of each symbol's timeframe tabs")
+    parser.add_argument("--tab", action="append", metavar="[SYMBOL:]TIMEFRAME=TAB_ID",
+                        help="TradingView tab showing a timeframe (--live, repeatable)")
     parser.add_argument("--dry-run", action="store_true", help="Dry run mode")
     args = parser.parse_args()
-    
+
+    symbols = CHART_CONFIG["symbols"] if args.all else args.symbol
+    timeframes = CHART_CONFIG["timeframes"] if args.all else args.timeframe
+    try:
+        tabs = parse_tabs(args.tab, symbols)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if not args.live:
+        mode = "DRY RUN"
+    elif browser is None:
+        mode = "LIVE (DEMO DATA - no browser attached)"
+    else:
+        mode = "LIVE (reading from TradingView)"
     print(f"""
 ╔════════════════════════════════════════════════════════════╗
 ║     Aftermath x TradingView Futures Trading Bot          ║
 ║              REAL-TIME DYNAMIC MODE                      ║
 ╠════════════════════════════════════════════════════════════╣
-║  Symbol: {args.symbol}                                          ║
-║  Timeframe: {args.timeframe}                                           ║
-║  Mode: {'LIVE (reading from TradingView)' if args.live else 'DRY RUN'}                                      ║
+║  Symbols: {', '.join(symbols)}
+║  Timeframes: {', '.join(timeframes)}
+║  Mode: {mode}
 ╚════════════════════════════════════════════════════════════╝
     """)
-    
-    # Initialize bot
-    bot = AftermathBot(CONFIG)
-    
+
     if not args.dry_run and not CONFIG.get("private_key"):
         print("ERROR: No private key. Set WALLET_PRIVATE_KEY or use --dry-run")
         sys.exit(1)
-    
+
     print(f"Initialized bot with wallet: {CONFIG['wallet_address'][:10]}...")
-    
+
+    if args.metrics_file or args.metrics_port:
+        metrics.enable()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+    # Shared across all markets
+    candles = CandleStore(symbols, timeframes)
+    feed = make_feed(args)
+    triggers = TriggerIndex()
+    journal = StateJournal(sync=args.journal_sync)
+    outbox = PostQueue(mode=args.post_alerts) if args.post_alerts else None
+    markets = {symbol: Market(symbol, CONFIG, candles, triggers, journal, outbox) for symbol in symbols}
+
     # Load strategy levels
-    levels = TRADING_LEVELS.get(args.symbol, {})
-    print(f"\n📊 Strategy: {levels.get('recommendation', 'neutral').upper()}")
-    print(f"   Bias Score: {levels.get('bias_score', 5)}/10")
-    print(f"   Entry Zone: ${levels.get('long_level', 0):,.0f} - ${levels.get('short_level', 0):,.0f}")
-    print(f"   TP1: ${levels.get('tp1', 0):,.0f} | TP2: ${levels.get('tp2', 0):,.0f}")
-    
-    print(f"\n🚀 Starting live trading loop for {args.symbol}...")
-    print("   Bot will read from TradingView tab every 60 seconds.")
+    for symbol in symbols:
+        levels = TRADING_LEVELS.get(symbol, {})
+        add_level_triggers(triggers, symbol, levels)
+        print(f"\n📊 {symbol} Strategy: {levels.get('recommendation', 'neutral').upper()}")
+        print(f"   Bias Score: {levels.get('bias_score', 5)}/10")
+        print(f"   Entry Zone: ${levels.get('long_level', 0):,.0f} - ${levels.get('short_level', 0):,.0f}")
+        print(f"   TP1: ${levels.get('tp1', 0):,.0f} | TP2: ${levels.get('tp2', 0):,.0f}")
+
+    print(f"\n🚀 Starting live trading loop for {len(markets) * len(timeframes)} market(s)...")
+    server = None
+    if args.webhook is not None:
+        if not WEBHOOK_SECRET:
+            print("ERROR: --webhook needs a shared secret. Set WEBHOOK_SECRET")
+            sys.exit(1)
+        server = WebhookServer(WEBHOOK_SECRET, port=args.webhook, symbols=symbols)
+        await server.start()
+        print(f"   Evaluating on TradingView alerts at http://<host>:{server.port}{server.path}")
+        tasks = [asyncio.create_task(run_webhook(markets, timeframes, args, server))]
+    elif args.event_driven:
+        if feed is None:
+            print("ERROR: --event-driven needs a tick feed. Set PRICE_FEED_URL or use --replay")
+            sys.exit(1)
+        print("   Evaluating on every tick from the feed.")
+        tasks = [asyncio.create_task(run_event_driven(markets, timeframes, args, feed, candles))]
+    elif args.live:
+        if browser is None:
+            print("   ⚠️  No browser attached: every timeframe scores the same demo values, not your tabs.")
+        else:
+            print(f"   Each symbol reads all of its timeframe tabs every {args.interval:g} seconds "
+                  f"and trades on their confluence.")
+            for symbol in symbols:
+                untabbed = [timeframe for timeframe in timeframes if timeframe not in tabs[symbol]]
+                if untabbed:
+                    print(f"   ⚠️  {symbol}: no --tab for {', '.join(untabbed)}")
+        tasks = [asyncio.create_task(run_live_market(market, timeframes, args, browser, tabs[symbol]))
+                 for symbol, market in markets.items()]
+    else:
+        print(f"   Each market reads every {args.interval:g} seconds.")
+        # Prices are fetched once per symbol, not once per timeframe
+        polled = asyncio.Condition() if feed is not None else None
+        tasks = [
+            asyncio.create_task(run_market(market, timeframe, args, feed, candles, polled))
+            for market in markets.values()
+            for timeframe in timeframes
+        ]
+        if polled is not None:
+            tasks.append(asyncio.create_task(poll_prices(symbols, args, feed, candles, polled)))
     print("   Levels dynamically adjust based on current price.\n")
-    
-    iteration = 0
-    
+    poster = asyncio.create_task(outbox.run()) if outbox is not None else None
+    exporter = asyncio.create_task(export_metrics(args.metrics_file)) if args.metrics_file else None
+
     try:
-        while True:
-            iteration += 1
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Iteration {iteration}")
-            
-            if args.live:
-                # Read from browser (TradingView tab)
-                chart_data = await read_live_chart(None, None)
-            else:
-                # Demo data
-                chart_data = {
-                    "symbol": args.symbol,
-                    "price": 67300.92,
-                    "ema_9": 67129.92,
-                    "rsi": 50
-                }
-            
-            # Get strategy levels
-            current_levels = TRADING_LEVELS.get(args.symbol, {})
-            
-            # Calculate signal with dynamic levels
-            signal = calculate_signal(
-                chart_data["price"],
-                chart_data.get("ema_9", 0),
-                chart_data.get("rsi", 50),
-                args.symbol
-            )
-            
-            # Dynamic level adjustment based on current price
-            price = chart_data["price"]
-            long_level = current_levels.get("long_level", price * 0.99)
-            short_level = current_levels.get("short_level", price * 1.01)
-            
-            print(f"  ${price:,.2f}")
-            💰 Price:        print(f"  📈 EMA9:         ${chart_data.get('ema_9', 0):,.2f}")
-            print(f"  📉 RSI:          {chart_data.get('rsi', 50)}")
-            print(f"  🎯 Long Level:   ${long_level:,.2f}")
-            print(f"  🎯 Short Level:  ${short_level:,.2f}")
-            print(f"  ⚡ Signal:       {signal['direction'].upper()} (strength: {signal['strength']:.2f})")
-            print(f"  💡 Reason:       {signal['reason']}")
-            
-            # Execute if signal is strong
-            if not args.dry_run:
-                if signal["direction"] != "neutral" and signal["strength"] > 0.7:
-                    if not bot.position:
-                        print(f"  → Opening {signal['direction']} position...")
-                        # await bot.open_position(...)
-                elif bot.position:
-                    print(f"  → Monitoring position...")
-            
-            # Wait before next iteration
-            await asyncio.sleep(60)
-            
-    except KeyboardInterrupt:
+        await asyncio.gather(*tasks)
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n\n🛑 Shutting down...")
-        if bot.position:
-            print("   Closing open position...")
+        for market in markets.values():
+            if market.bot.position:
+                print(f"   Closing open {market.symbol} position...")
+    finally:
+        for task in tasks:
+            task.cancel()
+        if server is not None:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await server.close()
+        if poster is not None:
+            # Unsent alerts stay in the outbox for the next run
+            poster.cancel()
+            await asyncio.gather(poster, return_exceptions=True)
+            outbox.close()
+        if feed is not None:
+            await feed.close()
+        await get_client().close()
+        journal.close()
+        if metrics.enabled():
+            print("\n⏱️  Stage latency (ms)\n" + metrics.report())
+        if exporter is not None:
+            exporter.cancel()
+            metrics.write_textfile(args.metrics_file)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
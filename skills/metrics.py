@@ -0,0 +1,247 @@
+"""
+Metrics
+Per-stage latency histograms and counters for the trading loop
+
+Wrap a stage in span() and its duration lands in a log-linear ("HDR-style")
+histogram: 128 sub-buckets per power of two, so any percentile is within
+1% of the true value while recording stays a couple of integer ops.
+Counters track events such as retries and timeouts. Everything can be
+exported in the Prometheus text format - to a file for node_exporter's
+textfile collector, or over HTTP.
+
+Metrics are off until enable() is called (or BOT_METRICS=1). While off,
+span() hands back one shared no-op object, well under a microsecond
+(run this file to measure it).
+
+Usage:
+    from metrics import span, incr
+    with span("signal"):
+        signal = calculate_signal(...)
+    incr("bankr_retries")
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+SUB_BITS = 7  # 2^7 sub-buckets per power of two -> under 1% relative error
+SUB_MASK = (1 << SUB_BITS) - 1
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+PREFIX = "bot"
+
+_enabled = os.environ.get("BOT_METRICS", "") not in ("", "0")
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _bucket_index(value: int) -> int:
+    shift = value.bit_length() - SUB_BITS
+    if shift <= 0:
+        return value
+    return (shift << SUB_BITS) + (value >> shift)
+
+
+def _bucket_value(index: int) -> int:
+    """Midpoint of the values that share bucket `index`"""
+    shift, sub = index >> SUB_BITS, index & SUB_MASK
+    if shift == 0:
+        return sub
+    return (sub << shift) + (1 << (shift - 1))
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers (nanoseconds, for spans)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        self._lock = threading.Lock()
+
+    def record(self, value: int):
+        index = _bucket_index(value)
+        with self._lock:
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> int:
+        """Value at quantile q (0..1); 0 when empty"""
+        if not self.count:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(max(_bucket_value(index), self.min), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        out = {"count": self.count, "mean": self.mean(), "min": self.min or 0, "max": self.max}
+        out.update({f"p{q * 100:g}": self.percentile(q) for q in QUANTILES})
+        return out
+
+
+# Registry
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str) -> Histogram:
+    hist = _histograms.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+
+def incr(name: str, n: int = 1):
+    """Bump a counter (no-op while metrics are off)"""
+    if _enabled:
+        with _registry_lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    with _registry_lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class _Span:
+    __slots__ = ("hist", "start")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage: str):
+    """Time a `with` block into the stage's histogram"""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(histogram(stage))
+
+
+# Export
+
+def render() -> str:
+    """Everything recorded so far, in the Prometheus text exposition format"""
+    lines = []
+    with _registry_lock:
+        counters = sorted(_counters.items())
+        hists = sorted(_histograms.items())
+    for name, value in counters:
+        lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+        lines.append(f"{PREFIX}_{name}_total {value}")
+    if hists:
+        metric = f"{PREFIX}_stage_seconds"
+        lines.append(f"# HELP {metric} Time spent per pipeline stage")
+        lines.append(f"# TYPE {metric} summary")
+        for stage, hist in hists:
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q}"}} {hist.percentile(q) / 1e9:.9f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {hist.total / 1e9:.9f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {hist.count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str):
+    """Write render() to `path` atomically (rename), as the textfile collector expects"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+    """Serve render() at http://host:port/metrics from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def report() -> str:
+    """Human-readable per-stage table (milliseconds)"""
+    rows = [f"{'stage':<16}{'count':>8}{'p50':>10}{'p99':>10}{'max':>10}"]
+    with _registry_lock:
+        hists = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+    for stage, hist in hists:
+        rows.append(f"{stage:<16}{hist.count:>8}{hist.percentile(0.5) / 1e6:>10.3f}"
+                    f"{hist.percentile(0.99) / 1e6:>10.3f}{hist.max / 1e6:>10.3f}")
+    rows.extend(f"{name}: {value}" for name, value in counters)
+    return "\n".join(rows)
+
+
+if __name__ == "__main__":
+    N = 1_000_000
+
+    def cost_per_span() -> float:
+        start = time.perf_counter()
+        for _ in range(N):
+            with span("bench"):
+                pass
+        return (time.perf_counter() - start) / N * 1e9
+
+    enable(False)
+    print(f"disabled: {cost_per_span():.0f} ns/span")
+    enable(True)
+    print(f"enabled:  {cost_per_span():.0f} ns/span")
+    print(histogram("bench").summary())
@@ -0,0 +1,202 @@
+"""
+Number Parser
+One numeric-token scanner for every piece of chart and agent text
+
+Handles what TradingView and the agents actually print:
+    $67,300.92   67300.92   67.3K   1.2M   −12.5 (unicode minus)
+    67.300,92    67 300,92 (no-break / thin space)   67'300.92
+
+Grouping vs. decimal separators are worked out per token: with both "," and
+"." the last one is the decimal point; a lone "," followed by exactly three
+digits groups thousands (67,300), any other lone "," is a decimal comma
+(0,96); a repeated separator always groups. K / M / B suffixes scale the
+value (lowercase "m" is left alone - on a chart it means minutes).
+
+The pattern is compiled once at import. A number is only ever matched
+whole - it can't end where another digit follows - so a number followed
+by text it can't end with is rejected, not cut short ("15m" is no price,
+and never 1). The pattern tells plain and comma-grouped numbers apart
+itself, so those convert with a single float() call; a snippet that is
+just "$67,300.92" or "48.52" skips the scan altogether. Plain re syntax
+only (no atomic groups or possessive quantifiers), so it imports on
+Python 3.8+.
+
+Speed: parsing is not millions of snippets a second. With the memo
+bypassed, bench_number_parser.py measures about 1.2x the old parser on
+bare prices and RSI values, and about 0.7x on prices inside labels
+(sign, suffix and locale handling cost a richer scan) - roughly 0.1-0.3
+M/s on the single-core box it was run on. parse_price / parse_indicator
+/ parse_rsi remember recently seen snippets, and since chart legends
+mostly repeat from tick to tick most calls are memo hits (a dict
+lookup, several M/s) - but that is the cache, not the parser.
+
+Usage:
+    from number_parser import parse_price, parse_rsi
+    parse_price("Last $67,300.92")       # 67300.92
+    parse_rsi("RSI 7 close 48.52")       # 48.52
+"""
+
+import re
+from typing import Iterator, Optional
+
+GROUP_SPACES = "'\u00a0\u202f\u2009"  # apostrophe, no-break, narrow no-break, thin space
+SUFFIXES = {"K": 1e3, "k": 1e3, "M": 1e6, "B": 1e9}
+
+NUMBER_RE = re.compile(
+    r"(?=[-\u2212$\u20ac\u00a3\u00a5\d])"                     # lets the scan skip plain text quickly
+    r"(?P<sign>(?<![\w)])-|\u2212)?"                           # minus, unless it's a hyphen inside a word
+    r"(?:[$\u20ac\u00a3\u00a5]\s?(?P<sign2>[-\u2212])?)?"     # currency, and "$-5"
+    r"(?:(?P<grouped>\d{1,3}(?:,\d{3})+(?:\.\d+)?)"             # 67,300.92
+    r"|(?P<plain>\d+(?:\.\d+)?)"                               # 67300.92
+    r"|(?P<digits>\d(?:[\d,.'\u00a0\u202f\u2009]*\d)?))"      # any other digits and separators
+    r"(?![,.'\u00a0\u202f\u2009]*\d)"                         # ... taken whole, never cut short
+    r"(?P<suffix>[KkMB](?![A-Za-z]))?"                        # 67.3K, but not the B of "0.5BTC"
+    r"(?![smhHdDwW]\b)"                                       # not a timeframe such as "5m" or "4h"
+)
+
+# A whole snippet that is a single "$67,300.92" / "67300.92" / "48.52"
+BARE_RE = re.compile(r"\s*\$?(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*")
+
+MEMO_SIZE = 4096  # distinct snippets remembered per parser
+
+
+def _to_float(digits: str) -> Optional[float]:
+    """Digits with separators -> float, inferring which separator is the decimal"""
+    if "," in digits:
+        comma = digits.rfind(",")
+        dot = digits.rfind(".")
+        if dot > comma:
+            digits = digits.replace(",", "")                         # 67,300.92
+        elif dot >= 0:
+            digits = digits.replace(".", "").replace(",", ".")       # 67.300,92
+        elif len(digits) - comma != 4 and digits.count(",") == 1:
+            digits = digits.replace(",", ".")                        # 0,96
+        else:
+            digits = digits.replace(",", "")                         # 67,300
+    try:
+        return float(digits)
+    except ValueError:
+        pass
+    # Rarer shapes: space / apostrophe grouping, or repeated dots (1.234.567)
+    for space in GROUP_SPACES:
+        digits = digits.replace(space, "")
+    if digits.count(".") > 1:
+        digits = digits.replace(".", "")
+    try:
+        return float(digits)
+    except ValueError:
+        return None
+
+
+def _value(match) -> Optional[float]:
+    sign, sign2, grouped, plain, digits, suffix = match.groups()
+    if grouped:
+        value = float(grouped.replace(",", ""))
+    elif plain:
+        value = float(plain)
+    else:
+        value = _to_float(digits)
+        if value is None:
+            return None
+    if suffix:
+        value *= SUFFIXES[suffix]
+    if sign or sign2:
+        value = -value
+    return value
+
+
+def _bare(text: str) -> Optional[float]:
+    """
+    Value of a snippet that is nothing but a plain price or reading
+    ("$67,300.92", "48.52"), as the DOM mostly hands us; None otherwise.
+    Same result as the full scan, without it.
+    """
+    match = BARE_RE.fullmatch(text)
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def _memoized(parse):
+    """
+    Remember results for recently seen snippets.
+
+    Chart legends are re-read every tick and mostly unchanged, so a repeat
+    costs one dict lookup. The memo is dropped whole when it fills up.
+    """
+    memo = {}
+
+    def cached(text: str):
+        value = memo.get(text)
+        if value is None:
+            if len(memo) >= MEMO_SIZE:
+                memo.clear()
+            value = memo[text] = parse(text)
+        return value
+
+    cached.__name__ = parse.__name__
+    cached.__doc__ = parse.__doc__
+    cached.uncached = parse
+    return cached
+
+
+def iter_numbers(text: str) -> Iterator[float]:
+    """Every number in `text`, in order"""
+    for match in NUMBER_RE.finditer(text):
+        value = _value(match)
+        if value is not None:
+            yield value
+
+
+def parse_number(token: str) -> Optional[float]:
+    """A single token such as "$67,300.92" or "67.3K"; None unless the whole token is a number"""
+    token = token.strip()
+    match = NUMBER_RE.fullmatch(token)
+    return _value(match) if match else None
+
+
+def first_number(text: str, lo: float = None, hi: float = None) -> Optional[float]:
+    """First number in `text` within [lo, hi] (either bound optional)"""
+    search = NUMBER_RE.search
+    match = search(text)
+    while match is not None:
+        value = _value(match)
+        if value is not None and (lo is None or value >= lo) and (hi is None or value <= hi):
+            return value
+        match = search(text, match.end())
+    return None
+
+
+def last_number(text: str, lo: float = None, hi: float = None) -> Optional[float]:
+    """Last number in `text` within [lo, hi] - indicator legends list their inputs first"""
+    found = None
+    for match in NUMBER_RE.finditer(text):
+        value = _value(match)
+        if value is not None and (lo is None or value >= lo) and (hi is None or value <= hi):
+            found = value
+    return found
+
+
+@_memoized
+def parse_price(text: str) -> float:
+    """Extract price from text like '$67,961' or '67,961.50'; 0 if there is none"""
+    value = _bare(text)
+    if value is None:
+        value = first_number(text)
+    return value if value is not None else 0
+
+
+@_memoized
+def parse_indicator(text: str) -> float:
+    """Value from an indicator legend like 'EMA 9 close 67,129.92' (the last number); 0 if none"""
+    value = _bare(text)
+    if value is None:
+        value = last_number(text)
+    return value if value is not None else 0
+
+
+@_memoized
+def parse_rsi(text: str) -> float:
+    """RSI from text like 'RSI 7 close 48.52' - the last number in 0..100, else 50"""
+    value = _bare(text)
+    if value is None or value > 100:
+        value = last_number(text, 0, 100)
+    return value if value is not None else 50
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Parallel Parameter Sweep
+Backtests calculate_signal over grids of TRADING_LEVELS and CONFIG risk settings
+
+Bars are loaded once into a shared-memory block; worker processes map it as
+NumPy arrays, so each task only carries its parameter set, never the prices.
+
+Usage:
+    python3 param_sweep.py --data btc_1m.csv --symbol BTCUSDT \\
+        --short-level 68200 68465 68700 --bias-score 0 2 \\
+        --stop-loss-pct 1 2 3 --take-profit-pct 3 5 --workers 8
+
+Only long_level, short_level and bias_score change calculate_signal's
+entries, so those are the level parameters swept. tp1/tp2 are not: exits
+use the CONFIG percentages, as AftermathBot does, so every tp value would
+repeat the same backtest.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aftermath_bot import CONFIG
+from backtester import DEFAULT_MIN_STRENGTH, load_bars, run_backtest
+from tradingview_reader import TRADING_LEVELS
+
+# Levels the backtest reads (entries); tp1/tp2 don't change its result
+LEVEL_PARAMS = ("long_level", "short_level", "bias_score")
+RISK_PARAMS = ("stop_loss_pct", "take_profit_pct")
+
+# Columns the workers need from the bars
+SHARED_COLUMNS = ("close", "ema_9", "rsi")
+
+# Parameter sets handed to a worker per task
+DEFAULT_CHUNK = 16
+
+# Per-process view of the shared bars, set up by _attach
+_worker_bars = None
+_worker_shm = None
+
+
+def build_grid(grid: Dict[str, list], symbol: str) -> List[Dict]:
+    """
+    Expand {param: [values]} into every combination.
+
+    Parameters missing from `grid` keep their TRADING_LEVELS / CONFIG value.
+    """
+    base = {**{k: TRADING_LEVELS.get(symbol, {}).get(k) for k in LEVEL_PARAMS},
+            **{k: CONFIG[k] for k in RISK_PARAMS}}
+    axes = {k: grid.get(k) or [base[k]] for k in LEVEL_PARAMS + RISK_PARAMS}
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def _attach(name: str, length: int):
+    """Pool initializer: map the shared block as the bars dict"""
+    global _worker_bars, _worker_shm
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(SHARED_COLUMNS), length), dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_bars = {column: block[i] for i, column in enumerate(SHARED_COLUMNS)}
+
+
+def _evaluate(bars: Dict[str, np.ndarray], params: Dict, symbol: str, min_strength: float) -> Dict:
+    levels = dict(TRADING_LEVELS.get(symbol, {}))
+    levels.update({k: params[k] for k in LEVEL_PARAMS if params.get(k) is not None})
+    config = dict(CONFIG, **{k: params[k] for k in RISK_PARAMS})
+    result = run_backtest(bars, "calculate_signal", symbol, levels=levels, config=config,
+                          min_strength=min_strength)
+    return {
+        "params": params,
+        "trades": result["trades"],
+        "pnl": result["pnl"],
+        "max_drawdown": result["max_drawdown"],
+        "hit_rate": result["hit_rate"],
+    }
+
+
+def _run_chunk(chunk: List[Dict], symbol: str, min_strength: float) -> List[Dict]:
+    return [_evaluate(_worker_bars, params, symbol, min_strength) for params in chunk]
+
+
+def sweep(bars: Dict[str, np.ndarray], grid: Dict[str, list], symbol: str = "BTCUSDT",
+          workers: Optional[int] = None, min_strength: float = DEFAULT_MIN_STRENGTH,
+          chunk_size: int = DEFAULT_CHUNK) -> List[Dict]:
+    """
+    Backtest every parameter combination across a process pool.
+
+    Returns one summary per combination, best PnL first.
+    """
+    combos = build_grid(grid, symbol)
+    length = len(bars["close"])
+
+    shm = shared_memory.SharedMemory(create=True, size=len(SHARED_COLUMNS) * length * 8)
+    try:
+        block = np.ndarray((len(SHARED_COLUMNS), length), dtype=np.float64, buffer=shm.buf)
+        for i, column in enumerate(SHARED_COLUMNS):
+            block[i] = bars[column]
+
+        chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, length)) as pool:
+            futures = [pool.submit(_run_chunk, chunk, symbol, min_strength) for chunk in chunks]
+            for future in futures:
+                results.extend(future.result())
+        del block
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results.sort(key=lambda r: r["pnl"], reverse=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over signal levels")
+    parser.add_argument("--data", required=True, help="CSV or Parquet file of OHLCV bars")
+    parser.add_argument("--symbol", default="BTCUSDT", help="Symbol for TRADING_LEVELS")
+    for name in LEVEL_PARAMS + RISK_PARAMS:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs="+", help=f"Values for {name}")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--min-strength", type=float, default=DEFAULT_MIN_STRENGTH)
+    parser.add_argument("--top", type=int, default=10, help="Results to print")
+    args = parser.parse_args()
+
+    grid = {name: getattr(args, name) for name in LEVEL_PARAMS + RISK_PARAMS}
+    start = time.perf_counter()
+    bars = load_bars(args.data)
+    results = sweep(bars, grid, args.symbol, workers=args.workers, min_strength=args.min_strength)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n🔍 Swept {len(results)} combinations over {len(bars['close']):,} bars in {elapsed:.2f}s\n")
+    for rank, r in enumerate(results[:args.top], 1):
+        params = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{rank:>3}. PnL {r['pnl']:>10,.2f}  DD {r['max_drawdown']:>9,.2f}  "
+              f"hit {r['hit_rate'] * 100:5.1f}%  trades {r['trades']:>4}  | {params}")
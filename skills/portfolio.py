@@ -0,0 +1,180 @@
+"""
+Portfolio Engine
+Many open positions across symbols, held in one structured NumPy array
+
+AftermathBot tracks a single position in plain attributes. The portfolio
+keeps every open position as a row of a structured array (symbol id, side,
+entry, size), packed at the front so mark-to-market, PnL and stop/target
+checks are single vectorized expressions over all positions at once.
+
+Usage:
+    book = Portfolio()
+    pid = book.open("BTCUSD", "long", size=0.01, price=68000)
+    book.set_prices({"BTCUSD": 68250})
+    book.total_pnl()
+"""
+
+import itertools
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from aftermath_bot import CONFIG
+
+LONG, SHORT = 1, -1
+SIDES = {"long": LONG, "short": SHORT}
+SIDE_NAMES = {LONG: "long", SHORT: "short"}
+
+POSITION_DTYPE = np.dtype([
+    ("id", np.int64),
+    ("symbol", np.int32),   # index into Portfolio.symbols
+    ("side", np.int8),      # LONG / SHORT
+    ("entry_price", np.float64),
+    ("size", np.float64),
+    ("opened_at", np.float64),
+])
+
+
+class ExposureError(ValueError):
+    """Opening the position would take exposure past max_position_size"""
+
+
+class Portfolio:
+    def __init__(self, config: dict = CONFIG, capacity: int = 256):
+        self.config = config
+        self.positions = np.zeros(capacity, dtype=POSITION_DTYPE)
+        self.count = 0  # open positions occupy rows [0, count)
+        self.symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self.prices = np.full(16, np.nan)  # last price per symbol id
+        self._rows: Dict[int, int] = {}    # position id -> row
+        self._ids = itertools.count(1)
+        self.realized_pnl = 0.0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def symbol_id(self, symbol: str) -> int:
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if len(self.symbols) > len(self.prices):
+                self.prices = np.concatenate([self.prices, np.full(len(self.prices), np.nan)])
+        return self._symbol_ids[symbol]
+
+    @property
+    def open_positions(self) -> np.ndarray:
+        """View of the open rows"""
+        return self.positions[:self.count]
+
+    # Exposure
+
+    def exposure(self, marked: bool = False) -> float:
+        """Total notional (USDC) of open positions, at entry or at last prices"""
+        rows = self.open_positions
+        if marked:
+            prices = self.prices[rows["symbol"]]
+            prices = np.where(np.isnan(prices), rows["entry_price"], prices)
+        else:
+            prices = rows["entry_price"]
+        return float(np.dot(prices, rows["size"]))
+
+    def would_exceed(self, notional: float) -> bool:
+        return self.exposure() + notional > self.config["max_position_size"]
+
+    # Opening / closing
+
+    def open(self, symbol: str, side: str, size: float, price: float) -> int:
+        """Open a position and return its id; raises ExposureError past the cap"""
+        if side not in SIDES:
+            raise ValueError(f"side must be 'long' or 'short', not {side!r}")
+        notional = size * price
+        if self.would_exceed(notional):
+            raise ExposureError(
+                f"{symbol} {side} {notional:,.2f} USDC would exceed max_position_size "
+                f"{self.config['max_position_size']:,.2f} (open: {self.exposure():,.2f})"
+            )
+        if self.count == len(self.positions):
+            self.positions = np.concatenate([self.positions, np.zeros(len(self.positions), dtype=POSITION_DTYPE)])
+
+        position_id = next(self._ids)
+        row = self.count
+        self.positions[row] = (position_id, self.symbol_id(symbol), SIDES[side], price, size, time.time())
+        self._rows[position_id] = row
+        self.count += 1
+        return position_id
+
+    def close(self, position_id: int, price: float) -> float:
+        """Close a position at `price`; returns its realized PnL"""
+        row = self._rows.pop(position_id)
+        record = self.positions[row]
+        pnl = float(record["side"] * (price - record["entry_price"]) * record["size"])
+        self.realized_pnl += pnl
+
+        # Keep open rows packed: move the last row into the hole
+        last = self.count - 1
+        if row != last:
+            self.positions[row] = self.positions[last]
+            self._rows[int(self.positions[row]["id"])] = row
+        self.count = last
+        return pnl
+
+    # Mark to market
+
+    def set_prices(self, prices: Dict[str, float]):
+        for symbol, price in prices.items():
+            self.prices[self.symbol_id(symbol)] = price
+
+    def calculate_pnl(self, prices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Unrealized PnL of every open position (AftermathBot.calculate_pnl, vectorized).
+
+        `prices` is indexed by symbol id; defaults to the last set prices.
+        Positions with no price yet show 0.
+        """
+        rows = self.open_positions
+        marks = (self.prices if prices is None else prices)[rows["symbol"]]
+        pnl = rows["side"] * (marks - rows["entry_price"]) * rows["size"]
+        return np.nan_to_num(pnl)
+
+    def total_pnl(self) -> float:
+        return float(self.calculate_pnl().sum())
+
+    def pnl_by_symbol(self) -> Dict[str, float]:
+        rows = self.open_positions
+        totals = np.bincount(rows["symbol"], weights=self.calculate_pnl(), minlength=len(self.symbols))
+        return {self.symbols[i]: float(totals[i]) for i in np.unique(rows["symbol"])}
+
+    def check_exits(self) -> Dict[str, List[int]]:
+        """
+        Ids of positions past their stop-loss / take-profit at the last prices.
+
+        Same strict comparisons as AftermathBot.check_stop_loss/check_take_profit.
+        """
+        rows = self.open_positions
+        marks = self.prices[rows["symbol"]]
+        stop_pct = self.config["stop_loss_pct"] / 100
+        tp_pct = self.config["take_profit_pct"] / 100
+        # Signed move in the position's favour, relative to entry
+        move = rows["side"] * (marks - rows["entry_price"]) / rows["entry_price"]
+        stopped = move < -stop_pct
+        target = move > tp_pct
+        return {
+            "stop_loss": rows["id"][stopped].tolist(),
+            "take_profit": rows["id"][target].tolist(),
+        }
+
+    def to_dicts(self) -> List[dict]:
+        pnl = self.calculate_pnl()
+        return [
+            {
+                "id": int(r["id"]),
+                "symbol": self.symbols[r["symbol"]],
+                "side": SIDE_NAMES[int(r["side"])],
+                "entry_price": float(r["entry_price"]),
+                "size": float(r["size"]),
+                "pnl": float(p),
+            }
+            for r, p in zip(self.open_positions, pnl)
+        ]
@@ -0,0 +1,343 @@
+"""
+Post Queue
+Persistent outbound queue for X posts, paced by the API's rate limits
+
+enqueue() writes the message to a SQLite outbox and returns at once, so
+posting never holds up the trading loop. A background worker posts from
+the outbox:
+- a token bucket paces posts, and is corrected from the x-rate-limit-*
+  headers of every response (a 429 pauses it until the window resets)
+- messages that pile up while waiting are coalesced: "digest" packs them
+  into as few 280-character posts as possible, "thread" does the same and
+  chains bursts as replies, "single" posts each message on its own
+- network errors and 5xx are retried with backoff; nothing is removed from
+  the outbox until it was posted
+
+Usage:
+    outbox = PostQueue()
+    outbox.enqueue("BTCUSD 5m flipped LONG at $68,100")
+    worker = asyncio.create_task(outbox.run())
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from bankr_client import backoff_delay
+from x_poster import POST_TIMEOUT, TWEET_LIMIT, TWEETS_URL, auth_headers, tweet_body
+
+OUTBOX_PATH = os.environ.get(
+    "X_OUTBOX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "x_outbox.db")
+)
+
+MODES = ("digest", "thread", "single")
+
+# Default pacing until the API tells us better: a burst of 5, then one a minute
+BUCKET_CAPACITY = 5
+BUCKET_RATE = 1 / 60  # tokens per second
+
+BURST_WINDOW = 300  # seconds; thread mode replies to a post this recent
+RETRY_CAP = 300  # seconds between retries at most
+BATCH_LIMIT = 50  # outbox rows considered per post
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    created  REAL NOT NULL,
+    text     TEXT NOT NULL,
+    status   TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_try REAL NOT NULL DEFAULT 0,
+    tweet_id TEXT,
+    error    TEXT
+)
+"""
+
+PENDING, SENT, FAILED = "pending", "sent", "failed"
+
+
+class TokenBucket:
+    """Posts allowed right now; refills at `rate`, corrected by rate-limit headers"""
+
+    def __init__(self, rate: float = BUCKET_RATE, capacity: float = BUCKET_CAPACITY):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self.paused_until = 0.0  # epoch seconds; set when the API says the window is spent
+
+    def _refill(self, now: float):
+        if now < self.paused_until:
+            self.updated = now
+            return
+        if self.paused_until:
+            # Window reset - the full allowance is back
+            self.tokens = float(self.capacity)
+            self.paused_until = 0.0
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a post may be made"""
+        now = time.time()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill(time.time())
+        self.tokens -= 1
+
+    def observe(self, headers, status: int = 200):
+        """Follow x-rate-limit-limit / -remaining / -reset (and Retry-After on 429)"""
+        now = time.time()
+        limit = _header_number(headers, "x-rate-limit-limit")
+        remaining = _header_number(headers, "x-rate-limit-remaining")
+        reset = _header_number(headers, "x-rate-limit-reset")
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+        if status == 429 or remaining == 0:
+            retry_after = _header_number(headers, "retry-after")
+            if reset and reset > now:
+                self.paused_until = reset
+            elif retry_after:
+                self.paused_until = now + retry_after
+            else:
+                self.paused_until = now + 60
+            self.tokens = 0.0
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    value = headers.get(name) if headers is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def split_long(text: str, limit: int = TWEET_LIMIT) -> Tuple[str, str]:
+    """First post-sized piece of `text` (broken at a space if possible) and the rest"""
+    if len(text) <= limit:
+        return text, ""
+    cut = text.rfind(" ", 0, limit + 1)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip(), text[cut:].lstrip()
+
+
+def pack(texts: List[str], limit: int = TWEET_LIMIT) -> List[Tuple[str, int]]:
+    """
+    Pack messages into posts of at most `limit` characters.
+
+    Returns (post text, number of messages it holds), in order. A message
+    too long for one post becomes its own post holding just its first
+    piece, with a count of 0.
+    """
+    posts = []
+    current, count = "", 0
+    for text in texts:
+        if len(text) > limit:
+            if current:
+                posts.append((current, count))
+                current, count = "", 0
+            posts.append((split_long(text, limit)[0], 0))
+        elif not current:
+            current, count = text, 1
+        elif len(current) + 1 + len(text) <= limit:
+            current, count = f"{current}\n{text}", count + 1
+        else:
+            posts.append((current, count))
+            current, count = text, 1
+    if current:
+        posts.append((current, count))
+    return posts
+
+
+class PostQueue:
+    def __init__(self, path: str = OUTBOX_PATH, mode: str = "digest", bucket: Optional[TokenBucket] = None,
+                 url: str = TWEETS_URL, burst_window: float = BURST_WINDOW):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.path = path
+        self.mode = mode
+        self.bucket = bucket or TokenBucket()
+        self.url = url
+        self.burst_window = burst_window
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop = None
+        self._last_post: Optional[Tuple[str, float]] = None  # (tweet_id, when) for thread mode
+        self.stats: Dict[str, int] = {"posts": 0, "messages": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    # Producer side
+
+    def enqueue(self, text: str) -> int:
+        """Add a message to the outbox; returns its id. Safe from any thread."""
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO outbox (created, text) VALUES (?, ?)", (time.time(), text))
+        wakeup = self._wakeup
+        if wakeup is not None:
+            self._loop.call_soon_threadsafe(wakeup.set)
+        return cursor.lastrowid
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def retry_failed(self) -> int:
+        """Put posts the API rejected back in line"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = 0, next_try = 0, error = NULL WHERE status = ?",
+                (PENDING, FAILED)).rowcount
+
+    def close(self):
+        self._conn.close()
+
+    # Worker side
+
+    def _due(self) -> Tuple[List[Tuple[int, str]], Optional[float]]:
+        """Pending (id, text) rows ready to post, and when the next one is ready if none are"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, text FROM outbox WHERE status = ? AND next_try <= ? ORDER BY id LIMIT ?",
+                (PENDING, now, BATCH_LIMIT)).fetchall()
+            if rows:
+                return rows, None
+            row = self._conn.execute("SELECT MIN(next_try) FROM outbox WHERE status = ?", (PENDING,)).fetchone()
+        return [], row[0]
+
+    def _mark(self, ids: List[int], status: str, tweet_id: str = None, error: str = None):
+        with self._lock:
+            self._conn.executemany("UPDATE outbox SET status = ?, tweet_id = ?, error = ? WHERE id = ?",
+                                   [(status, tweet_id, error, i) for i in ids])
+
+    def _retry_later(self, ids: List[int], error: str):
+        # Rows that went out together are retried together
+        with self._lock:
+            marks = ",".join("?" * len(ids))
+            attempts = self._conn.execute(
+                f"SELECT MAX(attempts) FROM outbox WHERE id IN ({marks})", ids).fetchone()[0] + 1
+            next_try = time.time() + backoff_delay(attempts, base=2.0, cap=RETRY_CAP)
+            self._conn.execute(
+                f"UPDATE outbox SET attempts = ?, next_try = ?, error = ? WHERE id IN ({marks})",
+                (attempts, next_try, error, *ids))
+
+    def _next_post(self, rows: List[Tuple[int, str]]) -> Tuple[str, List[int], Optional[str]]:
+        """
+        Text of the next post and the outbox ids it covers; for an over-long
+        message, also what is left of it after this post.
+        """
+        if self.mode == "single":
+            rows = rows[:1]
+        text, count = pack([t for _, t in rows])[0]
+        if count == 0:
+            return text, [rows[0][0]], split_long(rows[0][1])[1]
+        return text, [i for i, _ in rows[:count]], None
+
+    def _reply_target(self) -> Optional[str]:
+        if self.mode != "thread" or self._last_post is None:
+            return None
+        tweet_id, when = self._last_post
+        return tweet_id if time.time() - when <= self.burst_window else None
+
+    async def _post(self, session: aiohttp.ClientSession, text: str, reply_to: Optional[str]):
+        timeout = aiohttp.ClientTimeout(total=POST_TIMEOUT)
+        async with session.post(self.url, json=tweet_body(text, reply_to), timeout=timeout) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = {"text": await response.text()}
+            return response.status, response.headers, body
+
+    async def step(self, session: aiohttp.ClientSession) -> Optional[float]:
+        """
+        Make at most one post; returns how long to wait before the next step
+        (None when the outbox is empty).
+        """
+        rows, next_try = self._due()
+        if not rows:
+            return None if next_try is None else max(0.0, next_try - time.time())
+        wait = self.bucket.delay()
+        if wait > 0:
+            # Anything enqueued meanwhile joins the same digest
+            return wait
+
+        text, ids, rest = self._next_post(rows)
+        reply_to = self._reply_target()
+        self.bucket.take()
+        try:
+            status, headers, body = await self._post(session, text, reply_to)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats["retries"] += 1
+            self._retry_later(ids, repr(e))
+            return 0.0
+
+        self.bucket.observe(headers, status)
+        if status in (200, 201):
+            tweet_id = (body.get("data") or {}).get("id")
+            self._last_post = (tweet_id, time.time())
+            if rest:
+                # The rest of a long message stays queued for the next post
+                with self._lock:
+                    self._conn.execute("UPDATE outbox SET text = ? WHERE id = ?", (rest, ids[0]))
+            else:
+                self._mark(ids, SENT, tweet_id=tweet_id)
+                self.stats["messages"] += len(ids)
+            self.stats["posts"] += 1
+        elif status == 429:
+            # Not an error with the post - wait for the window, no attempt counted
+            self.stats["rate_limited"] += 1
+        elif status >= 500:
+            self.stats["retries"] += 1
+            self._retry_later(ids, f"HTTP {status}")
+        else:
+            # Rejected (auth, tier, duplicate...): kept in the outbox as failed, see retry_failed()
+            self.stats["failed"] += len(ids)
+            self._mark(ids, FAILED, error=f"HTTP {status}: {body}")
+            print(f"X post rejected ({status}): {body}")
+        return 0.0
+
+    async def run(self, idle: float = 5.0):
+        """Post from the outbox until cancelled"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        async with aiohttp.ClientSession(headers=auth_headers()) as session:
+            try:
+                while True:
+                    wait = await self.step(session)
+                    if wait == 0:
+                        continue
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), idle if wait is None else min(wait, idle))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._wakeup = None
+
+    async def drain(self) -> Dict[str, int]:
+        """Post until nothing is left pending (waiting out rate limits), then return stats"""
+        async with aiohttp.ClientSession(headers=auth_headers()) as session:
+            while True:
+                wait = await self.step(session)
+                if wait is None:
+                    return self.stats
+                if wait:
+                    await asyncio.sleep(wait)
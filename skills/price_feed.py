@@ -0,0 +1,340 @@
+"""
+Price Feeds
+Pluggable price sources for the trading bots
+
+Every source answers `await source.get_prices(["BTC", "SOL"])` with a
+{symbol: price} dict, and streaming sources also yield tick dicts
+({"symbol", "price", "volume", "timestamp"}) from `source.ticks()`.
+
+- WebSocketPriceFeed: structured JSON ticks over a WebSocket (primary)
+- ReplayPriceSource: ticks from a local JSONL/CSV file (tests, backtests)
+- BankrPromptPriceSource: asks the Bankr agent in plain English (slow fallback)
+- FallbackPriceSource: tries sources in order until every symbol is priced
+
+Usage:
+    feed = default_price_source()
+    prices = await feed.get_prices(["BTC", "SOL"])
+"""
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from bankr_client import backoff_delay, get_client
+from number_parser import parse_number
+
+# Structured tick feed, e.g. wss://feed.example.com/ticks
+PRICE_FEED_URL = os.environ.get("PRICE_FEED_URL", "")
+
+# Ticks older than this are treated as missing
+DEFAULT_MAX_AGE = 10.0  # seconds
+
+
+def make_tick(symbol: str, price: float, volume: float = 0.0, timestamp: Optional[float] = None) -> dict:
+    return {
+        "symbol": symbol.upper(),
+        "price": float(price),
+        "volume": float(volume or 0.0),
+        "timestamp": time.time() if timestamp is None else float(timestamp),
+    }
+
+
+def parse_tick_message(message) -> List[dict]:
+    """
+    Turn one feed message into ticks.
+
+    Accepts a tick object or a list of them, each with "symbol" and
+    "price" (short forms "s"/"p" also work), plus optional
+    "volume"/"v" and "timestamp"/"ts"; timestamps in ms are converted.
+    """
+    items = message if isinstance(message, list) else [message]
+    ticks = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        symbol = item.get("symbol", item.get("s"))
+        price = item.get("price", item.get("p"))
+        if symbol is None or price is None:
+            continue
+        timestamp = item.get("timestamp", item.get("ts"))
+        if timestamp is not None and float(timestamp) > 1e11:
+            timestamp = float(timestamp) / 1000
+        ticks.append(make_tick(symbol, price, item.get("volume", item.get("v", 0.0)), timestamp))
+    return ticks
+
+
+class PriceSource:
+    """Base interface for price sources"""
+
+    name = "base"
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        raise NotImplementedError
+
+    async def ticks(self) -> AsyncIterator[dict]:
+        """Stream of tick dicts; one-shot sources have none"""
+        raise NotImplementedError(f"{self.name} source does not stream ticks")
+        yield  # pragma: no cover
+
+    async def close(self):
+        pass
+
+
+class WebSocketPriceFeed(PriceSource):
+    """
+    Keeps the latest tick per symbol from a JSON WebSocket feed.
+
+    A background task holds the connection open (reconnecting with
+    backoff), so get_prices is a dict lookup rather than a round trip.
+    """
+
+    name = "websocket"
+
+    def __init__(self, url: str = PRICE_FEED_URL, subscribe_message: Optional[dict] = None,
+                 max_age: float = DEFAULT_MAX_AGE):
+        if not url:
+            raise ValueError("WebSocketPriceFeed needs a URL (set PRICE_FEED_URL)")
+        self.url = url
+        self.subscribe_message = subscribe_message
+        self.max_age = max_age
+        self.latest: Dict[str, dict] = {}
+        self._subscribers: List[asyncio.Queue] = []
+        self._updated = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        attempt = 0
+        self._session = aiohttp.ClientSession()
+        try:
+            while True:
+                try:
+                    async with self._session.ws_connect(self.url, heartbeat=15) as ws:
+                        attempt = 0
+                        if self.subscribe_message:
+                            await ws.send_json(self.subscribe_message)
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                try:
+                                    self._publish(parse_tick_message(json.loads(msg.data)))
+                                except (ValueError, TypeError):
+                                    continue
+                            elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"Price feed error: {e}")
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+        finally:
+            await self._session.close()
+
+    def _publish(self, ticks: List[dict]):
+        for tick in ticks:
+            self.latest[tick["symbol"]] = tick
+            for queue in self._subscribers:
+                queue.put_nowait(tick)
+        if ticks:
+            self._updated.set()
+
+    async def get_prices(self, symbols: List[str], wait: float = 2.0) -> Dict[str, float]:
+        """Latest fresh price per symbol; waits up to `wait` s for a first tick"""
+        self.start()
+        wanted = [s.upper() for s in symbols]
+        deadline = time.monotonic() + wait
+        while True:
+            now = time.time()
+            prices = {s: self.latest[s]["price"] for s in wanted
+                      if s in self.latest and now - self.latest[s]["timestamp"] <= self.max_age}
+            remaining = deadline - time.monotonic()
+            if len(prices) == len(wanted) or remaining <= 0:
+                return prices
+            self._updated.clear()
+            try:
+                await asyncio.wait_for(self._updated.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def ticks(self) -> AsyncIterator[dict]:
+        self.start()
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class ReplayPriceSource(PriceSource):
+    """
+    Replays ticks from a local file - a stand-in for the live feed.
+
+    JSONL files hold one tick message per line; CSV files need
+    symbol and price columns (volume/timestamp optional). With
+    `speed` > 0 ticks are paced by their timestamps (2.0 = twice as
+    fast); 0 replays as fast as possible.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 0.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.latest: Dict[str, dict] = {}
+        self._ticks = self._load(path)
+
+    @staticmethod
+    def _load(path: str) -> List[dict]:
+        ticks = []
+        with open(path, newline="") as f:
+            if path.endswith(".csv"):
+                for row in csv.DictReader(f):
+                    ticks.extend(parse_tick_message(row))
+            else:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        ticks.extend(parse_tick_message(json.loads(line)))
+        return ticks
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Latest replayed price per symbol (the file's last ticks before any replay)"""
+        if not self.latest:
+            for tick in self._ticks:
+                self.latest[tick["symbol"]] = tick
+        return {s.upper(): self.latest[s.upper()]["price"] for s in symbols if s.upper() in self.latest}
+
+    async def ticks(self) -> AsyncIterator[dict]:
+        while True:
+            previous = None
+            for tick in self._ticks:
+                if self.speed > 0 and previous is not None:
+                    await asyncio.sleep(max(0.0, tick["timestamp"] - previous) / self.speed)
+                else:
+                    await asyncio.sleep(0)
+                previous = tick["timestamp"]
+                self.latest[tick["symbol"]] = tick
+                yield dict(tick)
+            if not self.loop:
+                return
+
+
+# The symbol, then up to 40 characters that are neither digits, "$" nor the start of
+# another requested symbol's name, then the number
+PRICE_PATTERN = r'\b{symbol}\b(?:(?!\b(?:{others})\b)[^\d$]){{0,40}}\$?\s*(\d(?:[\d,]*\d)?(?:\.\d+)?[KkMB]?)'
+_price_patterns: Dict[tuple, "re.Pattern"] = {}
+
+
+def _price_pattern(symbol: str, symbols: List[str]) -> "re.Pattern":
+    others = tuple(sorted({s.upper() for s in symbols} - {symbol.upper()}))
+    key = (symbol.upper(), others)
+    pattern = _price_patterns.get(key)
+    if pattern is None:
+        pattern = _price_patterns[key] = re.compile(
+            PRICE_PATTERN.format(symbol=re.escape(symbol),
+                                 others="|".join(map(re.escape, others)) or "(?!)"),
+            re.IGNORECASE)
+    return pattern
+
+
+def parse_prompt_prices(text: str, symbols: List[str]) -> Dict[str, float]:
+    """
+    Pull "<SYMBOL> ... $price" pairs out of a free-text agent reply.
+
+    The number must follow the symbol within 40 characters, and no other
+    requested symbol may come in between - in "price of BTC and SOL: BTC
+    $67,970, SOL $84" SOL gets 84, not BTC's price.
+    """
+    prices = {}
+    for symbol in symbols:
+        match = _price_pattern(symbol, symbols).search(text)
+        if match:
+            price = parse_number(match.group(1))
+            if price is not None:
+                prices[symbol.upper()] = price
+    return prices
+
+
+class BankrPromptPriceSource(PriceSource):
+    """Asks the Bankr agent for prices and parses its reply - slow, last resort"""
+
+    name = "bankr-prompt"
+
+    def __init__(self, timeout: float = 180):
+        self.timeout = timeout
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        names = " and ".join(s.upper() for s in symbols)
+        completed = await get_client().run_prompt(f"what is the current price of {names}?", timeout=self.timeout)
+        if completed.get("status") != "completed":
+            return {}
+        return parse_prompt_prices(completed.get("response", ""), symbols)
+
+
+class FallbackPriceSource(PriceSource):
+    """Asks each source in turn for the symbols still missing"""
+
+    name = "fallback"
+
+    def __init__(self, sources: List[PriceSource]):
+        self.sources = sources
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        prices = {}
+        for source in self.sources:
+            missing = [s for s in symbols if s.upper() not in prices]
+            if not missing:
+                break
+            try:
+                prices.update(await source.get_prices(missing))
+            except Exception as e:
+                print(f"Price source {source.name} failed: {e}")
+        return prices
+
+    async def ticks(self) -> AsyncIterator[dict]:
+        for source in self.sources:
+            try:
+                async for tick in source.ticks():
+                    yield tick
+                return
+            except NotImplementedError:
+                continue
+        raise NotImplementedError("No streaming source configured")
+
+    async def close(self):
+        for source in self.sources:
+            await source.close()
+
+
+def default_price_source(replay_path: Optional[str] = None) -> PriceSource:
+    """
+    Structured feed first, Bankr prompt as the fallback.
+
+    Uses a replay file instead of the WebSocket when `replay_path` is given.
+    """
+    sources = []
+    if replay_path:
+        sources.append(ReplayPriceSource(replay_path))
+    elif PRICE_FEED_URL:
+        sources.append(WebSocketPriceFeed(PRICE_FEED_URL))
+    sources.append(BankrPromptPriceSource())
+    return FallbackPriceSource(sources)
@@ -0,0 +1,199 @@
+"""
+Research Cache
+Content-addressed cache for Grok answers, so a repeated question isn't re-asked
+
+Answers are keyed by a hash of everything that shapes them - model, system
+prompt, query and context - and kept for a TTL in an LRU memory tier. With
+a `path`, they also go to a small SQLite file, so a restart starts warm.
+
+Identical requests that arrive while the first is still in flight wait for
+its answer instead of sending their own (single-flight), from threads via
+get_or_compute and from coroutines via get_or_compute_async.
+
+Usage:
+    cache = ResponseCache(ttl=300, path="grok_cache.db")
+    key = cache_key("grok-2-1212", SYSTEM_PROMPT, "latest sui news")
+    answer = cache.get_or_compute(key, lambda: ask_grok(...))
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+DEFAULT_TTL = 300  # seconds
+MAX_ENTRIES = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key     TEXT PRIMARY KEY,
+    expires REAL NOT NULL,
+    value   TEXT NOT NULL
+)
+"""
+
+
+def cache_key(model: str, system_prompt: Optional[str], query: str, context: Optional[str] = None) -> str:
+    blob = json.dumps([model, system_prompt, query, context], separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class _Flight:
+    """One in-progress computation other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Lookup / store
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires, value FROM responses WHERE key = ? AND expires > ?", (key, now)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str):
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, expires, value) VALUES (?, ?, ?)",
+                                 (key, expires, value))
+
+    def _remember(self, key: str, expires: float, value: str):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # Single-flight
+
+    def get_or_compute(self, key: str, compute: Callable[[], str],
+                       cacheable: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Cached value for `key`, or compute() it once.
+
+        Threads asking for a key that is already being computed wait for
+        that result. Values failing `cacheable` (e.g. error strings) are
+        returned but not stored.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.collapsed += 1
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if cacheable is None or cacheable(flight.value):
+                self.put(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def get_or_compute_async(self, key: str, compute: Callable[[], Awaitable[str]],
+                                   cacheable: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        get_or_compute for coroutines; waiters share the first caller's request.
+
+        The request runs as its own task and every caller, the first one
+        included, awaits it through a shield - a caller cancelled or timed
+        out leaves the request running for the others (and the cache).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            self.collapsed += 1
+        else:
+            flight = asyncio.get_running_loop().create_task(self._fill(key, compute, cacheable))
+            self._async_flights[key] = flight
+            flight.add_done_callback(lambda done: self._landed(key, done))
+        return await asyncio.shield(flight)
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[str]],
+                    cacheable: Optional[Callable[[str], bool]]) -> str:
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            self.put(key, value)
+        return value
+
+    def _landed(self, key: str, flight: asyncio.Task):
+        if self._async_flights.get(key) is flight:
+            del self._async_flights[key]
+        if not flight.cancelled():
+            flight.exception()  # mark retrieved - waiters re-raise on await, if any are left
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits,
+                "misses": self.misses, "collapsed": self.collapsed}
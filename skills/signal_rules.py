@@ -0,0 +1,229 @@
+"""
+Signal Rules
+calculate_signal's strategy levels compiled into immutable per-symbol rules
+
+A symbol's TRADING_LEVELS entry decides which branch of calculate_signal
+can ever fire: a strong short bias only looks for shorts at short_level,
+a strong long bias only for longs at long_level, anything else falls back
+to the EMA/RSI rules. SignalRule.from_levels settles that once - the
+branch, its strength, stop, target and reason text - so evaluate() is a
+single comparison on the hot path. evaluate_batch() scores arrays of
+ticks for one symbol; a RuleTable scores one tick for each of thousands
+of symbols with a few array operations.
+
+RuleBook keeps the compiled rules for a levels dict (TRADING_LEVELS) and
+rebuilds a symbol's rule only when its entry is replaced. Edits made in
+place to an entry's dict are not seen - use set_levels() or call
+invalidate().
+
+Usage:
+    rules = RuleBook(TRADING_LEVELS)
+    signal = rules.get("BTCUSDT").evaluate(68500, 68100, 55)
+    scores = rules.table(symbols).score(prices, emas, rsis)
+"""
+
+import operator
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+LONG, NEUTRAL, SHORT = 1, 0, -1
+
+# Which branch of calculate_signal a symbol's levels select
+NO_LEVELS, SHORT_BIAS, LONG_BIAS, EMA_RULES = 0, 1, 2, 3
+
+NO_DIRECTION = "No clear direction - price near EMA or RSI in overbought/oversold"
+AT_SUPPORT = "Price at support - wait for entry zone"
+
+
+def _signal(price: float, direction: str = "neutral", strength: float = 0.0, stop_loss: float = 0,
+            take_profit: float = 0, reason: str = "") -> Dict:
+    return {
+        "direction": direction,
+        "strength": strength,
+        "entry_price": price,
+        "stop_loss": stop_loss,
+        "take_profit": take_profit,
+        "reason": reason,
+    }
+
+
+class SignalRule(NamedTuple):
+    """One symbol's levels, compiled; missing levels stay None and fall back to price-relative defaults"""
+    mode: int
+    short_level: Optional[float] = None
+    long_level: Optional[float] = None
+    tp1: Optional[float] = None
+    strength: float = 0.0
+    reason: str = ""
+
+    @classmethod
+    def from_levels(cls, levels: Optional[dict]) -> "SignalRule":
+        if not levels:
+            return cls(NO_LEVELS, reason=NO_DIRECTION)
+        bias_score = levels.get("bias_score", 5)
+        recommendation = levels.get("recommendation", "neutral")
+        common = {"short_level": levels.get("short_level"), "long_level": levels.get("long_level"),
+                  "tp1": levels.get("tp1"), "strength": min(1.0, 0.7 + (bias_score / 20))}
+        if recommendation == "short" and bias_score <= 3:
+            return cls(SHORT_BIAS, reason=f"Bearish bias ({bias_score}/10), price at resistance", **common)
+        if recommendation == "long" and bias_score >= 7:
+            return cls(LONG_BIAS, reason=f"Bullish bias ({bias_score}/10), price at support", **common)
+        return cls(EMA_RULES)
+
+    def evaluate(self, price: float, ema_9: float, rsi: float = 50) -> Dict:
+        """Same result as calculate_signal(price, ema_9, rsi, symbol) for the levels this was built from"""
+        mode = self.mode
+        if mode == SHORT_BIAS:
+            short_level = self.short_level if self.short_level is not None else price * 1.01
+            if price >= short_level:
+                return _signal(price, "short", self.strength,
+                               self.long_level if self.long_level is not None else price * 1.01,
+                               self.tp1 if self.tp1 is not None else price * 0.98,
+                               self.reason)
+            long_level = self.long_level if self.long_level is not None else price * 0.99
+            return _signal(price, reason=AT_SUPPORT if price <= long_level else "")
+
+        if mode == LONG_BIAS:
+            long_level = self.long_level if self.long_level is not None else price * 0.99
+            if price <= long_level:
+                return _signal(price, "long", self.strength,
+                               self.short_level if self.short_level is not None else price * 0.99,
+                               self.tp1 if self.tp1 is not None else price * 1.02,
+                               self.reason)
+            return _signal(price)
+
+        if mode == EMA_RULES:
+            if 30 < rsi < 70:
+                # No EMA yet (e.g. indicator still warming up) - treat as no distance
+                ema_distance = ((price - ema_9) / ema_9) * 100 if ema_9 else 0.0
+                if price > ema_9:
+                    return _signal(price, "long", min(1.0, (ema_distance / 2) + 0.3), ema_9, price * 1.05,
+                                   f"Price {ema_distance:.2f}% above EMA, RSI at {rsi}")
+                if price < ema_9:
+                    return _signal(price, "short", min(1.0, (abs(ema_distance) / 2) + 0.3), ema_9, price * 0.95,
+                                   f"Price {abs(ema_distance):.2f}% below EMA, RSI at {rsi}")
+            return _signal(price)
+
+        return _signal(price, reason=self.reason)
+
+    def evaluate_batch(self, price: np.ndarray, ema_9: np.ndarray, rsi: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        evaluate() over arrays of ticks for this symbol.
+
+        Returns {"direction": int8 array (LONG/NEUTRAL/SHORT), "strength": float array}.
+        """
+        n = len(price)
+        direction = np.zeros(n, dtype=np.int8)
+        strength = np.zeros(n)
+        mode = self.mode
+        if mode == SHORT_BIAS:
+            hit = price >= (self.short_level if self.short_level is not None else price * 1.01)
+            direction[hit] = SHORT
+            strength[hit] = self.strength
+        elif mode == LONG_BIAS:
+            hit = price <= (self.long_level if self.long_level is not None else price * 0.99)
+            direction[hit] = LONG
+            strength[hit] = self.strength
+        elif mode == EMA_RULES:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ema_distance = np.where(ema_9 != 0, ((price - ema_9) / ema_9) * 100, 0.0)
+            rsi_ok = (rsi > 30) & (rsi < 70)
+            up = (price > ema_9) & rsi_ok
+            down = (price < ema_9) & rsi_ok
+            direction[up] = LONG
+            direction[down] = SHORT
+            strength[up] = np.minimum(1.0, ema_distance[up] / 2 + 0.3)
+            strength[down] = np.minimum(1.0, np.abs(ema_distance[down]) / 2 + 0.3)
+        return {"direction": direction, "strength": strength}
+
+
+class RuleTable:
+    """The rules of many symbols as parallel arrays, to score one tick per symbol at once"""
+
+    def __init__(self, symbols: Sequence[str], rules: Sequence[SignalRule]):
+        self.symbols = list(symbols)
+        self.mode = np.array([r.mode for r in rules], dtype=np.int8)
+        # Missing levels are NaN and replaced by the price-relative default when scoring
+        self.short_level = np.array([np.nan if r.short_level is None else r.short_level for r in rules])
+        self.long_level = np.array([np.nan if r.long_level is None else r.long_level for r in rules])
+        self.strength = np.array([r.strength for r in rules])
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def score(self, price: np.ndarray, ema_9: np.ndarray, rsi: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score row i of the arrays with symbol i's rule.
+
+        Returns {"direction": int8 array (LONG/NEUTRAL/SHORT), "strength": float array}.
+        """
+        price = np.asarray(price, dtype=np.float64)
+        ema_9 = np.asarray(ema_9, dtype=np.float64)
+        rsi = np.asarray(rsi, dtype=np.float64)
+        mode = self.mode
+
+        short_level = np.where(np.isnan(self.short_level), price * 1.01, self.short_level)
+        long_level = np.where(np.isnan(self.long_level), price * 0.99, self.long_level)
+        level_short = (mode == SHORT_BIAS) & (price >= short_level)
+        level_long = (mode == LONG_BIAS) & (price <= long_level)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ema_distance = np.where(ema_9 != 0, ((price - ema_9) / ema_9) * 100, 0.0)
+        ema_ok = (mode == EMA_RULES) & (rsi > 30) & (rsi < 70)
+        up = ema_ok & (price > ema_9)
+        down = ema_ok & (price < ema_9)
+
+        direction = np.zeros(len(mode), dtype=np.int8)
+        direction[level_long | up] = LONG
+        direction[level_short | down] = SHORT
+        strength = np.select(
+            [level_short | level_long, up, down],
+            [self.strength, np.minimum(1.0, ema_distance / 2 + 0.3),
+             np.minimum(1.0, np.abs(ema_distance) / 2 + 0.3)],
+            0.0,
+        )
+        return {"direction": direction, "strength": strength}
+
+
+class RuleBook:
+    """Compiled rules for a live levels dict, rebuilt per symbol when its entry is replaced"""
+
+    def __init__(self, levels: Dict[str, dict]):
+        self.levels = levels
+        self._rules: Dict[str, tuple] = {}  # symbol -> (levels entry compiled, rule)
+        self._tables: Dict[tuple, tuple] = {}  # symbols -> (levels entries, table)
+
+    def get(self, symbol: str) -> SignalRule:
+        source = self.levels.get(symbol)
+        cached = self._rules.get(symbol)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        rule = SignalRule.from_levels(source)
+        self._rules[symbol] = (source, rule)
+        return rule
+
+    def table(self, symbols: Sequence[str]) -> RuleTable:
+        """RuleTable for these symbols, in this order; rebuilt if any of their entries was replaced"""
+        key = tuple(symbols)
+        sources: List = list(map(self.levels.get, key))
+        cached = self._tables.get(key)
+        if cached is not None and all(map(operator.is_, cached[0], sources)):
+            return cached[1]
+        table = RuleTable(key, [self.get(symbol) for symbol in key])
+        self._tables[key] = (sources, table)
+        return table
+
+    def set_levels(self, symbol: str, levels: dict):
+        """Replace a symbol's levels; its rule and the tables holding it are rebuilt on next use"""
+        self.levels[symbol] = dict(levels)
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop compiled rules (one symbol's, or all) after editing a levels dict in place"""
+        if symbol is None:
+            self._rules.clear()
+            self._tables.clear()
+            return
+        self._rules.pop(symbol, None)
+        for key in [key for key in self._tables if symbol in key]:
+            del self._tables[key]
@@ -0,0 +1,121 @@
+"""
+Snapshot Cache
+Remembers where each chart field was found in the last TradingView snapshot
+
+Between two ticks almost all of the DOM is unchanged - only the price header
+and the indicator legend move. Instead of searching the whole tree every time,
+the cache keeps the node path (child indices from the root) of each field's
+last match and probes that path first. A full search only runs on a miss.
+parse_all() also reuses last tick's parsed value for a field whose text
+is unchanged - the parsers only see the text, so comparing it is enough.
+
+Usage:
+    cache = SnapshotCache()
+    text = cache.find(snapshot, "price", ["price", "last", "close"])
+    values = cache.parse_all(snapshot, FIELD_KEYWORDS, {"price": parse_price, ...})
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tradingview_reader import find_fields
+
+Path = Tuple[int, ...]
+
+
+def node_at(snapshot: dict, path: Path) -> Optional[dict]:
+    """Follow a path of child indices, or None if the tree changed shape"""
+    node = snapshot
+    for index in path:
+        children = node.get("children", [])
+        if index >= len(children):
+            return None
+        node = children[index]
+    return node
+
+
+class SnapshotCache:
+    """Per-tab cache of field locations across successive snapshots"""
+
+    def __init__(self):
+        self.paths: Dict[str, Path] = {}
+        self.texts: Dict[str, str] = {}  # text each value was parsed from
+        self.values: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+
+    def find(self, snapshot: dict, field: str, keywords: list) -> Optional[str]:
+        """
+        Return the text of the node holding `field`.
+
+        Checks the path where the field was found last time; if that node
+        is gone or no longer mentions any keyword, falls back to a full
+        search and remembers the new path.
+        """
+        return self.find_all(snapshot, {field: keywords})[field]
+
+    def find_all(self, snapshot: dict, fields: Dict[str, list]) -> Dict[str, Optional[str]]:
+        """
+        Look up several fields at once: {field: keywords} -> {field: text}
+
+        Fields whose cached path still matches cost one path walk each;
+        all the misses share a single tree traversal.
+        """
+        texts = {}
+        missed = {}
+        for field, keywords in fields.items():
+            path = self.paths.get(field)
+            if path is not None:
+                node = node_at(snapshot, path)
+                if node is not None:
+                    text = node.get("text", "")
+                    if _mentions(text, keywords):
+                        self.hits += 1
+                        texts[field] = text
+                        continue
+            missed[field] = keywords
+
+        if missed:
+            self.misses += len(missed)
+            for field, match in find_fields(snapshot, missed, with_paths=True).items():
+                if match is None:
+                    self.paths.pop(field, None)
+                    texts[field] = None
+                else:
+                    self.paths[field], texts[field] = match
+        return texts
+
+    def parse_all(self, snapshot: dict, fields: Dict[str, list],
+                  parsers: Dict[str, Callable[[str], Any]]) -> Dict[str, Any]:
+        """
+        find_all(), then parse each field's text: {field: value}, None if not found.
+
+        A field whose text is the same as last tick keeps last tick's value
+        without being parsed again.
+        """
+        values = {}
+        for field, text in self.find_all(snapshot, fields).items():
+            if text is None:
+                self.values.pop(field, None)
+                self.texts.pop(field, None)
+                values[field] = None
+            elif self.texts.get(field) == text:
+                self.reused += 1
+                values[field] = self.values[field]
+            else:
+                values[field] = self.values[field] = parsers[field](text)
+                self.texts[field] = text
+        return values
+
+    def clear(self):
+        self.paths.clear()
+        self.texts.clear()
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+
+
+def _mentions(text: str, keywords: List[str]) -> bool:
+    text_lower = text.lower()
+    return any(kw.lower() in text_lower for kw in keywords)
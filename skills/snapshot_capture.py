@@ -0,0 +1,107 @@
+"""
+Snapshot Capture
+Takes browser snapshots on worker threads so DOM capture never blocks the event loop
+
+browser.snapshot(tab_id) is a blocking call that can take a good part of a
+second on a busy chart. The capture service runs it on its own thread pool
+and keeps each tab's newest finished snapshot in a slot - a plain
+attribute swap, so readers never take a lock. The trading loop asks for a
+snapshot no older than N ms: a fresh enough one comes straight from the
+slot, otherwise it waits for the capture already running (or starts one).
+A capture requested while one is running for that tab is skipped, never
+queued, so a slow browser can't build up a backlog.
+
+Usage:
+    capture = SnapshotCapture(browser)
+    snapshot = await capture.get(tab_id, max_age_ms=250)
+    # or keep the slots warm in the background
+    asyncio.create_task(capture.run([tab_id], interval=0.2))
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT_MAX_AGE_MS = 500
+DEFAULT_WORKERS = 4
+
+
+class SnapshotCapture:
+    def __init__(self, browser, max_workers: int = DEFAULT_WORKERS, executor: Optional[ThreadPoolExecutor] = None):
+        self.browser = browser
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot")
+        # tab_id -> (snapshot, monotonic time the capture started); replaced whole, never mutated
+        self._slots: Dict[str, Tuple[dict, float]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()  # guards _inflight only; readers of _slots never lock
+        self.stats = {"captures": 0, "skipped": 0, "served": 0, "waited": 0, "errors": 0}
+
+    def latest(self, tab_id: str, max_age_ms: Optional[float] = None) -> Optional[dict]:
+        """Newest snapshot of the tab, if any (and no older than max_age_ms); never waits"""
+        slot = self._slots.get(tab_id)
+        if slot is None:
+            return None
+        snapshot, taken = slot
+        if max_age_ms is not None and (time.monotonic() - taken) * 1000 > max_age_ms:
+            return None
+        return snapshot
+
+    def age_ms(self, tab_id: str) -> Optional[float]:
+        slot = self._slots.get(tab_id)
+        return None if slot is None else (time.monotonic() - slot[1]) * 1000
+
+    def request(self, tab_id: str) -> Future:
+        """Start a capture of the tab - or, if one is already running, return that one"""
+        with self._lock:
+            running = self._inflight.get(tab_id)
+            if running is not None and not running.done():
+                self.stats["skipped"] += 1
+                return running
+            future = self.executor.submit(self._capture, tab_id)
+            self._inflight[tab_id] = future
+            return future
+
+    def _capture(self, tab_id: str) -> dict:
+        started = time.monotonic()
+        try:
+            snapshot = self.browser.snapshot(tab_id)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        current = self._slots.get(tab_id)
+        # A slower capture that started earlier must not replace a newer one
+        if current is None or current[1] <= started:
+            self._slots[tab_id] = (snapshot, started)
+        self.stats["captures"] += 1
+        return snapshot
+
+    async def get(self, tab_id: str, max_age_ms: float = DEFAULT_MAX_AGE_MS) -> dict:
+        """
+        A snapshot no older than max_age_ms.
+
+        Served from the slot when fresh enough; otherwise waits for the
+        running (or a new) capture on the pool, without blocking the loop.
+        """
+        snapshot = self.latest(tab_id, max_age_ms)
+        if snapshot is not None:
+            self.stats["served"] += 1
+            return snapshot
+        self.stats["waited"] += 1
+        # The capture may be shared with other waiters: a cancelled get()
+        # (e.g. a wait_for timeout) must not cancel it for them
+        return await asyncio.shield(asyncio.wrap_future(self.request(tab_id)))
+
+    async def run(self, tab_ids: Iterable[str], interval: float = 0.25):
+        """Keep every tab's slot fresh by requesting a capture every `interval` seconds"""
+        tab_ids = list(tab_ids)
+        while True:
+            for tab_id in tab_ids:
+                self.request(tab_id)
+            await asyncio.sleep(interval)
+
+    def close(self):
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
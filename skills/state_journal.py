@@ -0,0 +1,220 @@
+"""
+State Journal
+Crash-safe, append-only record of positions, Bankr jobs and fills
+
+Every position change and submitted/finished job is appended to a SQLite
+table in WAL mode. On restart, replay() folds the log back into the current
+state, so an open position or an in-flight jobId survives a crash instead of
+being opened (or submitted) again.
+
+Writes never touch the disk on the caller's thread: append() puts the event
+on a queue and a writer thread commits them in batches. `sync` picks the
+durability/latency trade-off:
+    "off"    - let the OS flush (fastest, may lose the last events on power loss)
+    "normal" - fsync at WAL checkpoints (default; safe against process crashes)
+    "full"   - fsync every batch commit
+
+A batch that fails to commit is retried, and kept for the next batch
+if it still fails; flush() (and so replay() and close()) raises
+JournalError while any appended event is uncommitted, rather than let
+the caller act on a state that is missing it.
+
+Usage:
+    journal = StateJournal()
+    state = journal.replay()
+    journal.append("position_open", "BTCUSD", side="long", entry_price=68000, size=0.01)
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+JOURNAL_PATH = os.environ.get(
+    "BOT_JOURNAL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_journal.db")
+)
+
+SYNC_MODES = {"off": "OFF", "normal": "NORMAL", "full": "FULL"}
+
+BATCH_SIZE = 256  # events per commit at most
+FLUSH_INTERVAL = 0.05  # seconds a queued event may wait for its batch
+WRITE_RETRIES = 3  # commit attempts per batch before flush() reports the failure
+RETRY_DELAY = 0.05  # seconds, times the attempt number
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq  INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts   REAL NOT NULL,
+    kind TEXT NOT NULL,
+    key  TEXT NOT NULL,
+    data TEXT NOT NULL
+)
+"""
+
+# Event kinds and how replay folds them
+POSITION_OPEN = "position_open"      # key: symbol
+POSITION_CLOSE = "position_close"    # key: symbol
+JOB_SUBMITTED = "job_submitted"      # key: jobId
+JOB_FINISHED = "job_finished"        # key: jobId
+
+
+def _connect(path: str, sync: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={SYNC_MODES[sync]}")
+    conn.execute(SCHEMA)
+    return conn
+
+
+class JournalError(RuntimeError):
+    """Appended events that could not be committed"""
+
+
+class StateJournal:
+    def __init__(self, path: str = JOURNAL_PATH, sync: str = "normal",
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"sync must be one of {sorted(SYNC_MODES)}")
+        self.path = path
+        self.sync = sync
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+        self._conn = _connect(path, sync)
+        self._closed = False
+        # Events whose commit failed; retried with the next batch, never dropped
+        self._unwritten = []
+        self._error: Optional[sqlite3.Error] = None
+        self._writer = threading.Thread(target=self._write_loop, name="state-journal", daemon=True)
+        self._writer.start()
+
+    # Writing
+
+    def append(self, kind: str, key: str, **data):
+        """Queue an event; returns immediately"""
+        if self._closed:
+            raise RuntimeError("journal is closed")
+        self._queue.put((time.time(), kind, str(key), json.dumps(data, default=str)))
+
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Block until everything appended so far is committed.
+
+        Raises JournalError if some events still could not be written (they
+        stay queued and are retried with the next batch).
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+        unwritten = len(self._unwritten)
+        if unwritten:
+            raise JournalError(f"{unwritten} journal events not committed: {self._error}")
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+            self._conn.close()
+
+    def _commit(self, batch: list) -> bool:
+        """Commit a batch, retrying a few times; False if it still failed"""
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                with self._conn:
+                    self._conn.execute("BEGIN")
+                    self._conn.executemany(
+                        "INSERT INTO events (ts, kind, key, data) VALUES (?, ?, ?, ?)", batch)
+                self._error = None
+                return True
+            except sqlite3.Error as e:
+                self._error = e
+                if attempt < WRITE_RETRIES:
+                    time.sleep(RETRY_DELAY * attempt)
+        print(f"Journal write failed ({len(batch)} events, kept for retry): {self._error}")
+        return False
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            batch = self._unwritten + batch
+            if batch:
+                self._unwritten = [] if self._commit(batch) else batch
+            if stop and self._unwritten:
+                print(f"Journal closed with {len(self._unwritten)} uncommitted events: {self._error}")
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    # Reading
+
+    def events(self, since: int = 0):
+        """Committed events after sequence number `since`, oldest first"""
+        conn = _connect(self.path, self.sync)
+        try:
+            for seq, ts, kind, key, data in conn.execute(
+                    "SELECT seq, ts, kind, key, data FROM events WHERE seq > ? ORDER BY seq", (since,)):
+                yield {"seq": seq, "ts": ts, "kind": kind, "key": key, **json.loads(data)}
+        finally:
+            conn.close()
+
+    def replay(self) -> Dict:
+        """
+        Fold the log into current state:
+            {"positions": {symbol: event}, "jobs": {jobId: event}}
+        where jobs are the ones submitted but not yet finished.
+        """
+        self.flush()
+        positions, jobs = {}, {}
+        for event in self.events():
+            kind, key = event["kind"], event["key"]
+            if kind == POSITION_OPEN:
+                positions[key] = event
+            elif kind == POSITION_CLOSE:
+                positions.pop(key, None)
+            elif kind == JOB_SUBMITTED:
+                jobs[key] = event
+            elif kind == JOB_FINISHED:
+                jobs.pop(key, None)
+        return {"positions": positions, "jobs": jobs}
+
+    def compact(self):
+        """Rewrite the log as just the events that make up the current state"""
+        state = self.replay()
+        live = sorted(list(state["positions"].values()) + list(state["jobs"].values()),
+                      key=lambda e: e["seq"])
+        conn = _connect(self.path, self.sync)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                keep = [e["seq"] for e in live]
+                conn.execute("CREATE TEMP TABLE keep (seq INTEGER PRIMARY KEY)")
+                conn.executemany("INSERT INTO keep VALUES (?)", [(s,) for s in keep])
+                conn.execute("DELETE FROM events WHERE seq NOT IN (SELECT seq FROM keep)")
+                conn.execute("DROP TABLE keep")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
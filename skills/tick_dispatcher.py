@@ -0,0 +1,94 @@
+"""
+Tick Dispatcher
+Runs signal evaluation as soon as a tick arrives instead of on a timer
+
+Consumes a price source's tick stream (price_feed.py) and calls a handler
+per symbol with the newest tick. Ticks that pile up while a symbol's handler
+is still running are coalesced - the handler runs once more with the latest
+one, never on a stale backlog. An optional debounce window batches bursts.
+
+Usage:
+    dispatcher = TickDispatcher(feed, on_tick, debounce=0.005)
+    await dispatcher.run()
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+TickHandler = Callable[[dict], Awaitable[None]]
+
+
+class TickDispatcher:
+    def __init__(self, source, handler: TickHandler, debounce: float = 0.0,
+                 symbols: Optional[list] = None):
+        """
+        Args:
+            source: anything with an async `ticks()` generator
+            handler: coroutine called with the newest tick for a symbol
+            debounce: seconds to wait after a symbol's first pending tick
+                before handling, so a burst is handled once
+            symbols: only dispatch these symbols (default: all)
+        """
+        self.source = source
+        self.handler = handler
+        self.debounce = debounce
+        self.symbols = {s.upper() for s in symbols} if symbols else None
+        self._pending: Dict[str, dict] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self.received = 0
+        self.handled = 0
+        self.coalesced = 0
+        self.last_latency = 0.0  # seconds from receipt to handler start
+        self.max_latency = 0.0
+
+    async def run(self):
+        """Dispatch ticks until the source runs dry"""
+        try:
+            async for tick in self.source.ticks():
+                self.submit(tick)
+            # Let in-flight handlers finish on the final ticks
+            while self._workers:
+                await asyncio.gather(*list(self._workers.values()), return_exceptions=True)
+        finally:
+            for task in self._workers.values():
+                task.cancel()
+
+    def submit(self, tick: dict):
+        """Queue a tick; replaces any tick for the symbol still waiting"""
+        symbol = tick["symbol"]
+        if self.symbols is not None and symbol not in self.symbols:
+            return
+        self.received += 1
+        tick["received"] = time.monotonic()
+        if symbol in self._pending:
+            self.coalesced += 1
+        self._pending[symbol] = tick
+        if symbol not in self._workers:
+            self._workers[symbol] = asyncio.get_running_loop().create_task(self._drain(symbol))
+
+    async def _drain(self, symbol: str):
+        try:
+            if self.debounce:
+                await asyncio.sleep(self.debounce)
+            while symbol in self._pending:
+                tick = self._pending.pop(symbol)
+                latency = time.monotonic() - tick["received"]
+                self.last_latency = latency
+                self.max_latency = max(self.max_latency, latency)
+                try:
+                    await self.handler(tick)
+                except Exception as e:
+                    print(f"Error handling {symbol} tick: {e}")
+                self.handled += 1
+        finally:
+            self._workers.pop(symbol, None)
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "handled": self.handled,
+            "coalesced": self.coalesced,
+            "last_latency_ms": self.last_latency * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
@@ -2,10 +2,16 @@
 # Reads current chart values from TradingView browser tab
 # Works with Aftermath Bot - Real-time Dynamic Updates
 
+import asyncio
 import json
 import re
+import time
 from typing import Optional, Dict
 
+from metrics import span
+from number_parser import parse_indicator, parse_price, parse_rsi
+from signal_rules import RuleBook
+
 # TradingView indicator mappings
 INDICATOR_NAMES = {
     "EMA": ["EMA", "Exponential Moving Average", "EMA 9"],
@@ -14,8 +20,23 @@ INDICATOR_NAMES = {
     "MFI": ["MFI", "Money Flow Index"]
 }
 
+# Keywords that locate each field in the chart DOM
+FIELD_KEYWORDS = {
+    "price": ["price", "last", "close"],
+    "ema_9": ["EMA", "ema", "exponential"],
+    "rsi": ["RSI", "rsi"],
+}
+
+# How each field's text becomes a value
+FIELD_PARSERS = {
+    "price": parse_price,
+    "ema_9": parse_indicator,
+    "rsi": parse_rsi,
+}
+
 
-async def read_tradingview_browser(browser, tab_id: str) -> Dict:
+async def read_tradingview_browser(browser, tab_id: str, cache=None, capture=None,
+                                   max_age_ms: float = 500, raise_errors: bool = False) -> Dict:
     """
     Read live data from TradingView browser tab.
     
@@ -24,6 +45,18 @@ async def read_tradingview_browser(browser, tab_id: str) -> Dict:
     2. Parses current price, EMA, RSI from the DOM
     3. Returns structured data for the bot
     
+    Pass the same `snapshot_cache.SnapshotCache` on every tick for a tab
+    and fields are looked up where they were found last time, so only a
+    changed layout costs a full tree search; fields whose subtree didn't
+    change keep last tick's parsed value.
+    
+    The blocking browser.snapshot call runs on a worker thread. With a
+    `snapshot_capture.SnapshotCapture`, the newest snapshot no older than
+    `max_age_ms` is reused instead of capturing a new one.
+    
+    Errors are printed and the defaults (price 0) returned, unless
+    `raise_errors` is set.
+    
     Requires: TradingView tab to be open and visible
     """
     from datetime import datetime
@@ -43,23 +76,25 @@ async def read_tradingview_browser(browser, tab_id: str) -> Dict:
     
     try:
         # Get snapshot of TradingView tab
-        snapshot = browser.snapshot(tab_id)
+        with span("snapshot"):
+            if capture is not None:
+                snapshot = await capture.get(tab_id, max_age_ms)
+            else:
+                snapshot = await asyncio.get_running_loop().run_in_executor(None, browser.snapshot, tab_id)
         
-        # Parse price from chart - look for price display
-        # TradingView typically shows price in specific elements
-        price_text = find_element_text(snapshot, ["price", "last", "close"])
-        if price_text:
-            result["price"] = parse_price(price_text)
+        with span("parse"):
+            if cache is not None:
+                # Unchanged fields keep last tick's value without re-parsing
+                values = cache.parse_all(snapshot, FIELD_KEYWORDS, FIELD_PARSERS)
+            else:
+                texts = find_fields(snapshot, FIELD_KEYWORDS)
+                values = {field: FIELD_PARSERS[field](text) if text else None
+                          for field, text in texts.items()}
         
-        # Parse EMA from indicators panel
-        ema_text = find_element_text(snapshot, ["EMA", "ema", "exponential"])
-        if ema_text:
-            result["ema_9"] = parse_price(ema_text)
-        
-        # Parse RSI
-        rsi_text = find_element_text(snapshot, ["RSI", "rsi"])
-        if rsi_text:
-            result["rsi"] = parse_rsi(rsi_text)
+        # Price from the price display, EMA and RSI from the indicator legends
+        for field, value in values.items():
+            if value is not None:
+                result[field] = value
             
         # Try to find support/resistance levels (horizontal lines)
         # These are typically drawn as trendlines or price alerts
@@ -67,50 +102,95 @@ async def read_tradingview_browser(browser, tab_id: str) -> Dict:
         result["resistance"] = find_resistance_levels(snapshot)
         
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error reading TradingView: {e}")
         
     return result
 
 
-def find_element_text(snapshot: dict, keywords: list) -> Optional[str]:
-    """Search snapshot for element containing keywords"""
-    # Recursively search the snapshot tree
-    text = snapshot.get("text", "")
-    if any(kw.lower() in text.lower() for kw in keywords):
-        return text
-    for child in snapshot.get("children", []):
-        result = find_element_text(child, keywords)
-        if result:
-            return result
-    return None
+# Deepest node the tree search will descend to
+MAX_SEARCH_DEPTH = 256
+
+
+_compiled_keywords = {}
+
+
+def compile_keywords(fields: Dict[str, list]):
+    """
+    Build one case-insensitive alternation over every field's keywords.
+    
+    Returns (pattern, owners) where owners maps each lower-cased keyword
+    to the fields it belongs to. Results are memoised per field spec.
+    """
+    key = tuple((field, tuple(keywords)) for field, keywords in fields.items())
+    if key in _compiled_keywords:
+        return _compiled_keywords[key]
+    
+    owners = {}
+    for field, keywords in fields.items():
+        for kw in keywords:
+            owners.setdefault(kw.lower(), []).append(field)
+    # Longest first so a keyword never shadows a longer one it prefixes
+    alternation = "|".join(re.escape(kw) for kw in sorted(owners, key=len, reverse=True))
+    _compiled_keywords[key] = (re.compile(alternation), owners)
+    return _compiled_keywords[key]
 
 
-def parse_price(text: str) -> float:
-    """Extract price from text like '$67,961' or '67,961.50'"""
-    # Remove $ and commas
-    cleaned = text.replace("$", "").replace(",", "").strip()
-    # Extract first number
-    match = re.search(r'[\d.]+', cleaned)
-    if match:
-        try:
-            return float(match.group())
-        except:
-            pass
-    return 0
-
-
-def parse_rsi(text: str) -> float:
-    """Extract RSI value from text"""
-    # Look for number between 0-100
-    match = re.search(r'(\d+\.?\d*)\s*(?=|$)', text)
-    if match:
-        try:
-            val = float(match.group(1))
-            if 0 <= val <= 100:
-                return val
-        except:
-            pass
-    return 50
+def find_fields(snapshot: dict, fields: Dict[str, list], max_depth: int = MAX_SEARCH_DEPTH,
+                with_paths: bool = False) -> Dict:
+    """
+    Find the first node matching each field's keywords in one traversal.
+    
+    Walks the tree depth-first with an explicit stack (no recursion limit),
+    lower-cases each node's text once, and tests all keywords with a single
+    compiled pattern. Stops as soon as every field has a match.
+    
+    Args:
+        snapshot: browser snapshot tree ({"text": ..., "children": [...]})
+        fields: {field: [keywords]}
+        max_depth: nodes deeper than this are not visited
+        with_paths: also return the child-index path of each match
+        
+    Returns:
+        {field: text} or, with_paths, {field: (path, text)}; None if not found
+    """
+    found = {field: None for field in fields}
+    if not fields:
+        return found
+    pattern, owners = compile_keywords(fields)
+    remaining = len(found)
+    
+    # Paths are only built when asked for; otherwise entries carry depth alone
+    stack = [(snapshot, 0, ())]
+    while stack:
+        node, depth, path = stack.pop()
+        text = node.get("text", "")
+        if text:
+            for match in pattern.finditer(text.lower()):
+                for field in owners[match.group()]:
+                    if found[field] is None:
+                        found[field] = (path, text) if with_paths else text
+                        remaining -= 1
+            if not remaining:
+                break
+        
+        if depth < max_depth:
+            children = node.get("children")
+            if children:
+                depth += 1
+                if with_paths:
+                    for index in range(len(children) - 1, -1, -1):
+                        stack.append((children[index], depth, path + (index,)))
+                else:
+                    stack.extend((child, depth, path) for child in reversed(children))
+    
+    return found
+
+
+def find_element_text(snapshot: dict, keywords: list) -> Optional[str]:
+    """Search snapshot for element containing keywords"""
+    return find_fields(snapshot, {"text": keywords})["text"]
 
 
 def find_support_levels(snapshot: dict) -> list:
@@ -145,6 +225,10 @@ TRADING_LEVELS = {
 }
 
 
+# Compiled per-symbol rules behind calculate_signal
+RULES = RuleBook(TRADING_LEVELS)
+
+
 def parse_chart_data_from_snapshot(snapshot: dict) -> Dict:
     """
     Parse chart data from TradingView snapshot.
@@ -184,71 +268,11 @@ def calculate_signal(price: float, ema_9: float, rsi: float = 50, symbol: str =
     - entry_price: suggested entry
     - stop_loss: suggested stop loss
     - take_profit: suggested take profit
-    """
-    signal = {
-        "direction": "neutral",
-        "strength": 0.0,
-        "entry_price": price,
-        "stop_loss": 0,
-        "take_profit": 0,
-        "reason": ""
-    }
     
-    # Get strategy levels for symbol
-    levels = TRADING_LEVELS.get(symbol, {})
-    
-    # Use bias score from strategy (0 = bearish, 10 = bullish)
-    bias_score = levels.get("bias_score", 5)
-    recommendation = levels.get("recommendation", "neutral")
-    
-    # Calculate distance from EMA
-    ema_distance = ((price - ema_9) / ema_9) * 100
-    
-    # Primary signal from strategy recommendation
-    if recommendation == "short" and bias_score <= 3:
-        # Bearish - look for short entries
-        if price >= levels.get("short_level", price * 1.01):
-            signal["direction"] = "short"
-            signal["strength"] = min(1.0, 0.7 + (bias_score / 20))
-            signal["stop_loss"] = levels.get("long_level", price * 1.01)
-            signal["take_profit"] = levels.get("tp1", price * 0.98)
-            signal["reason"] = f"Bearish bias ({bias_score}/10), price at resistance"
-        elif price <= levels.get("long_level", price * 0.99):
-            signal["direction"] = "neutral"
-            signal["reason"] = "Price at support - wait for entry zone"
-            
-    elif recommendation == "long" and bias_score >= 7:
-        # Bullish - look for long entries
-        if price <= levels.get("long_level", price * 0.99):
-            signal["direction"] = "long"
-            signal["strength"] = min(1.0, 0.7 + (bias_score / 20))
-            signal["stop_loss"] = levels.get("short_level", price * 0.99)
-            signal["take_profit"] = levels.get("tp1", price * 1.02)
-            signal["reason"] = f"Bullish bias ({bias_score}/10), price at support"
-            
-    # Fallback to EMA-based signals if no strategy
-    elif levels:
-        # Long signal: price above EMA + RSI in favorable zone
-        if price > ema_9 and 30 < rsi < 70:
-            signal["direction"] = "long"
-            signal["strength"] = min(1.0, (ema_distance / 2) + 0.3)
-            signal["stop_loss"] = ema_9  # Stop at EMA
-            signal["take_profit"] = price * 1.05  # 5% target
-            signal["reason"] = f"Price {ema_distance:.2f}% above EMA, RSI at {rsi}"
-            
-        # Short signal: price below EMA + RSI in favorable zone
-        elif price < ema_9 and 30 < rsi < 70:
-            signal["direction"] = "short"
-            signal["strength"] = min(1.0, (abs(ema_distance) / 2) + 0.3)
-            signal["stop_loss"] = ema_9
-            signal["take_profit"] = price * 0.95
-            signal["reason"] = f"Price {abs(ema_distance):.2f}% below EMA, RSI at {rsi}"
-    
-    # Neutral
-    else:
-        signal["reason"] = "No clear direction - price near EMA or RSI in overbought/oversold"
-        
-    return signal
+    The symbol's TRADING_LEVELS entry is compiled once into a
+    signal_rules.SignalRule (rebuilt when the entry is replaced).
+    """
+    return RULES.get(symbol).evaluate(price, ema_9, rsi)
 
 
 # Browser integration functions
@@ -273,6 +297,114 @@ async def read_tradingview_tab(browser_tab_id: str) -> Optional[Dict]:
     return None
 
 
+# Longest a single tab may take before the multi-tab read gives up on it
+TAB_TIMEOUT = 2.0
+
+
+async def read_timeframes(browser, tabs: Dict[str, str], symbol: str = "BTCUSD",
+                          timeout: float = TAB_TIMEOUT, caches: Dict = None, capture=None,
+                          max_age_ms: float = 500) -> Dict:
+    """
+    Read every timeframe tab of a symbol at once.
+    
+    `tabs` maps timeframe -> tab_id (e.g. {"5m": "tab-1", "1h": "tab-3"}).
+    All tabs are snapshotted and parsed concurrently - on the `capture`
+    pool when given, else on the loop's default executor - so the read
+    takes about as long as the slowest tab. A tab that takes longer than
+    `timeout` seconds, fails to read, or shows no price is left out and
+    listed under "missing" with the reason, instead of holding up the
+    others.
+    
+    `caches` optionally maps timeframe -> SnapshotCache, one per tab.
+    
+    Returns {"symbol", "timeframes": {tf: chart_data}, "missing": {tf: reason},
+    "elapsed_ms"}, ready for confluence_signal().
+    """
+    caches = caches or {}
+    order = [tf for tf in CHART_CONFIG["timeframes"] if tf in tabs]
+    order += [tf for tf in tabs if tf not in order]
+    
+    async def read_one(timeframe):
+        return await asyncio.wait_for(
+            read_tradingview_browser(browser, tabs[timeframe], cache=caches.get(timeframe),
+                                     capture=capture, max_age_ms=max_age_ms, raise_errors=True),
+            timeout)
+    
+    start = time.monotonic()
+    with span("read_timeframes"):
+        results = await asyncio.gather(*(read_one(tf) for tf in order), return_exceptions=True)
+    
+    view = {"symbol": symbol, "timeframes": {}, "missing": {},
+            "elapsed_ms": (time.monotonic() - start) * 1000}
+    for timeframe, data in zip(order, results):
+        if isinstance(data, asyncio.TimeoutError):
+            view["missing"][timeframe] = f"timeout after {timeout}s"
+        elif isinstance(data, BaseException):
+            view["missing"][timeframe] = f"{type(data).__name__}: {data}" if str(data) else type(data).__name__
+        elif not data.get("price"):
+            view["missing"][timeframe] = "no price on chart"
+        else:
+            data["symbol"] = symbol
+            data["timeframe"] = timeframe
+            view["timeframes"][timeframe] = data
+    return view
+
+
+def confluence_signal(view: Dict, symbol: str = "BTCUSDT", min_agree: int = 2) -> Dict:
+    """
+    Combine calculate_signal() across the timeframes of a read_timeframes() view.
+    
+    Each timeframe votes its direction, weighted by its strength. The
+    winning direction needs at least `min_agree` timeframes behind it and
+    more weight than the opposite side; its strength is the mean strength
+    of the agreeing timeframes scaled by the share of timeframes that
+    agree. Entry, stop and target come from the fastest agreeing timeframe.
+    
+    Returns the calculate_signal() fields plus "agreement" (e.g. "3/4")
+    and the per-timeframe signals under "timeframes".
+    """
+    signals = {
+        timeframe: calculate_signal(data["price"], data.get("ema_9", 0), data.get("rsi", 50), symbol)
+        for timeframe, data in view["timeframes"].items()
+    }
+    weight = {"long": 0.0, "short": 0.0}
+    for signal in signals.values():
+        if signal["direction"] in weight:
+            weight[signal["direction"]] += signal["strength"]
+    
+    direction, agreeing = "neutral", []
+    if weight["long"] != weight["short"]:
+        direction = "long" if weight["long"] > weight["short"] else "short"
+        agreeing = [tf for tf, signal in signals.items() if signal["direction"] == direction]
+    if direction == "neutral" or len(agreeing) < min_agree:
+        direction, agreeing = "neutral", []
+    
+    total = len(signals)
+    price = next(iter(view["timeframes"].values()))["price"] if signals else 0
+    result = {
+        "direction": direction,
+        "strength": 0.0,
+        "entry_price": price,
+        "stop_loss": 0,
+        "take_profit": 0,
+        "reason": "",
+        "agreement": f"{len(agreeing)}/{total}",
+        "timeframes": signals,
+    }
+    if direction == "neutral":
+        result["reason"] = f"No confluence across {total} timeframe(s)"
+        return result
+    
+    lead = signals[agreeing[0]]
+    # mean strength of the agreeing timeframes x the share that agree
+    result["strength"] = sum(signals[tf]["strength"] for tf in agreeing) / total
+    result["entry_price"] = lead["entry_price"]
+    result["stop_loss"] = lead["stop_loss"]
+    result["take_profit"] = lead["take_profit"]
+    result["reason"] = f"{len(agreeing)}/{total} timeframes {direction} ({', '.join(agreeing)}): {lead['reason']}"
+    return result
+
+
 # Configuration for Hector's chart
 CHART_CONFIG = {
     "symbols": ["BTCUSD", "SOLUSDT", "SUIUSD"],
@@ -0,0 +1,184 @@
+"""
+Trigger Index
+Sorted price triggers per symbol, so a tick only touches the triggers it crosses
+
+Each symbol keeps its triggers in sorted lists keyed by price level. On a new
+price, bisect finds exactly the triggers crossed since the last price - the
+cost is O(log n + fired), not a linear re-check of every level.
+
+Two kinds of trigger:
+- one-shot (stop-loss, take-profit): fire once the price is strictly past the
+  level, then are removed - same test as AftermathBot.check_stop_loss
+- persistent (strategy levels, support/resistance, alerts): fire every time
+  the price crosses the level, in either direction they were set for
+
+Usage:
+    index = TriggerIndex()
+    add_position_triggers(index, "BTCUSD", "long", entry_price=68000)
+    for trigger in index.update("BTCUSD", 66500):
+        print(trigger["kind"], trigger["level"])
+"""
+
+import itertools
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional
+
+from aftermath_bot import CONFIG
+
+ABOVE = "above"  # fires when price rises past the level
+BELOW = "below"  # fires when price falls past the level
+
+
+class _SymbolTriggers:
+    """Sorted (level, id) entries for one symbol"""
+
+    def __init__(self):
+        self.once = {ABOVE: [], BELOW: []}
+        self.persistent = {ABOVE: [], BELOW: []}
+        self.last_price: Optional[float] = None
+
+
+class TriggerIndex:
+    def __init__(self):
+        self._symbols: Dict[str, _SymbolTriggers] = {}
+        self._triggers: Dict[int, dict] = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def _book(self, symbol: str) -> _SymbolTriggers:
+        if symbol not in self._symbols:
+            self._symbols[symbol] = _SymbolTriggers()
+        return self._symbols[symbol]
+
+    def add(self, symbol: str, level: float, direction: str, kind: str = "alert",
+            once: bool = True, **payload) -> int:
+        """
+        Register a trigger and return its id.
+
+        Args:
+            level: price level
+            direction: ABOVE or BELOW
+            kind: label passed back when it fires ("stop_loss", "tp1", ...)
+            once: remove after firing (persistent triggers fire on every cross)
+            payload: anything else to hand back with the trigger
+        """
+        if direction not in (ABOVE, BELOW):
+            raise ValueError(f"direction must be {ABOVE!r} or {BELOW!r}")
+        trigger_id = next(self._ids)
+        trigger = {"id": trigger_id, "symbol": symbol, "level": float(level),
+                   "direction": direction, "kind": kind, "once": once, **payload}
+        self._triggers[trigger_id] = trigger
+        book = self._book(symbol)
+        entries = (book.once if once else book.persistent)[direction]
+        insort(entries, (trigger["level"], trigger_id))
+        return trigger_id
+
+    def remove(self, trigger_id: int) -> bool:
+        trigger = self._triggers.pop(trigger_id, None)
+        if trigger is None:
+            return False
+        book = self._symbols[trigger["symbol"]]
+        entries = (book.once if trigger["once"] else book.persistent)[trigger["direction"]]
+        key = (trigger["level"], trigger_id)
+        i = bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+            del entries[i]
+        return True
+
+    def remove_where(self, symbol: str, **match) -> int:
+        """Remove a symbol's triggers whose fields equal `match` (e.g. position_id=3)"""
+        doomed = [t["id"] for t in self._triggers.values()
+                  if t["symbol"] == symbol and all(t.get(k) == v for k, v in match.items())]
+        for trigger_id in doomed:
+            self.remove(trigger_id)
+        return len(doomed)
+
+    def update(self, symbol: str, price: float) -> List[dict]:
+        """
+        Feed a new price; returns the triggers it fires, nearest level first.
+
+        One-shot triggers fire when price is strictly beyond their level
+        (this also catches triggers added while already in the money).
+        Persistent triggers fire when the move from the last price to this
+        one crosses their level.
+        """
+        book = self._symbols.get(symbol)
+        if book is None:
+            return []
+        fired = []
+
+        # One-shot ABOVE: every level < price - a prefix of the sorted list
+        entries = book.once[ABOVE]
+        k = bisect_left(entries, (price,))
+        if k:
+            fired.extend(self._triggers.pop(tid) for _, tid in reversed(entries[:k]))
+            del entries[:k]
+
+        # One-shot BELOW: every level > price - a suffix
+        entries = book.once[BELOW]
+        k = bisect_right(entries, (price, float("inf")))
+        if k < len(entries):
+            fired.extend(self._triggers.pop(tid) for _, tid in entries[k:])
+            del entries[k:]
+
+        last = book.last_price
+        if last is not None and price != last:
+            if price > last:
+                # Crossed upward: last <= level < price
+                entries = book.persistent[ABOVE]
+                lo = bisect_left(entries, (last,))
+                hi = bisect_left(entries, (price,))
+                fired.extend(self._triggers[tid] for _, tid in entries[lo:hi])
+            else:
+                # Crossed downward: price < level <= last
+                entries = book.persistent[BELOW]
+                lo = bisect_right(entries, (price, float("inf")))
+                hi = bisect_right(entries, (last, float("inf")))
+                fired.extend(self._triggers[tid] for _, tid in reversed(entries[lo:hi]))
+        book.last_price = price
+
+        return fired
+
+    def triggers(self, symbol: Optional[str] = None) -> List[dict]:
+        return [t for t in self._triggers.values() if symbol is None or t["symbol"] == symbol]
+
+
+def add_position_triggers(index: TriggerIndex, symbol: str, side: str, entry_price: float,
+                          config: dict = CONFIG, levels: Optional[dict] = None, **payload) -> List[int]:
+    """
+    Stop-loss and take-profit triggers for a position, as AftermathBot checks them.
+
+    With strategy `levels`, tp1/tp2 are added as a take-profit ladder too.
+    """
+    stop_pct = config["stop_loss_pct"] / 100
+    tp_pct = config["take_profit_pct"] / 100
+    ids = []
+    if side == "long":
+        ids.append(index.add(symbol, entry_price * (1 - stop_pct), BELOW, "stop_loss", **payload))
+        ids.append(index.add(symbol, entry_price * (1 + tp_pct), ABOVE, "take_profit", **payload))
+        ladder_direction = ABOVE
+    else:
+        ids.append(index.add(symbol, entry_price * (1 + stop_pct), ABOVE, "stop_loss", **payload))
+        ids.append(index.add(symbol, entry_price * (1 - tp_pct), BELOW, "take_profit", **payload))
+        ladder_direction = BELOW
+    for name in ("tp1", "tp2"):
+        if levels and levels.get(name):
+            ids.append(index.add(symbol, levels[name], ladder_direction, name, **payload))
+    return ids
+
+
+def add_level_triggers(index: TriggerIndex, symbol: str, levels: dict,
+                       support: Optional[list] = None, resistance: Optional[list] = None) -> List[int]:
+    """Persistent alerts on a symbol's strategy levels and chart S/R lines"""
+    ids = []
+    if levels.get("short_level"):
+        ids.append(index.add(symbol, levels["short_level"], ABOVE, "short_level", once=False))
+    if levels.get("long_level"):
+        ids.append(index.add(symbol, levels["long_level"], BELOW, "long_level", once=False))
+    for level in support or []:
+        ids.append(index.add(symbol, level, BELOW, "support", once=False))
+    for level in resistance or []:
+        ids.append(index.add(symbol, level, ABOVE, "resistance", once=False))
+    return ids
@@ -0,0 +1,256 @@
+"""
+Webhook Server
+Receives TradingView alert webhooks and queues them as signals for the trading loop
+
+TradingView can POST an alert's message to a URL. Set the message to JSON
+with the shared secret and the chart values, for example:
+
+    {"secret": "...", "symbol": "{{ticker}}", "timeframe": "{{interval}}",
+     "price": {{close}}, "ema_9": {{plot_0}}, "rsi": {{plot_1}}}
+
+Each valid alert becomes a TradingViewSignal on an in-process asyncio
+queue; the handler only parses, checks and enqueues. Receipt to
+evaluation is not sub-millisecond under load: bench_webhook.py, with the
+load generators sharing one core with the server, measured p50 4.2 ms /
+p99 13.8 ms at about 2.4k alerts/s (one alert at a time: p50 about
+0.4 ms, p99 about 5 ms). An alert whose price or EMA is missing or isn't
+a positive finite number is refused with 422. TradingView can't set
+headers, so the secret travels in the body (an X-Webhook-Secret header
+works too). If the consumer falls behind, the oldest queued alert is
+dropped - a stale alert is worth less than the newest one.
+
+Usage:
+    server = WebhookServer(secret=os.environ["WEBHOOK_SECRET"], port=8787)
+    await server.start()
+    while True:
+        signal = await server.get()
+        print(signal.symbol, signal.get_direction())
+
+Run bench_webhook.py to load-test it.
+"""
+
+import asyncio
+import hmac
+import json
+import math
+import os
+import time
+from typing import Iterable, Optional
+
+from aiohttp import web
+
+from aftermath_bot import TradingViewSignal
+import metrics
+from number_parser import parse_number
+
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8787
+WEBHOOK_PATH = "/webhook"
+
+QUEUE_SIZE = 10_000  # alerts waiting for the trading loop at most
+MAX_BODY = 16 * 1024  # bytes; alert messages are tiny
+
+# TradingView's {{interval}} placeholder prints minutes ("5", "240") or "D"/"W"/"M"
+INTERVAL_NAMES = {"D": "1d", "1D": "1d", "W": "1w", "1W": "1w", "M": "1M", "1M": "1M"}
+
+
+class AlertError(ValueError):
+    """An alert that can't be turned into a signal"""
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'BINANCE:BTCUSDT' / 'btcusd' -> 'BTCUSDT' / 'BTCUSD'"""
+    return symbol.rsplit(":", 1)[-1].strip().upper()
+
+
+def normalize_timeframe(interval: str) -> str:
+    """TradingView interval -> CHART_CONFIG style: '5' -> '5m', '60' -> '1h', '240' -> '4h'"""
+    interval = str(interval).strip()
+    if interval in INTERVAL_NAMES:
+        return INTERVAL_NAMES[interval]
+    if interval.isdigit():
+        minutes = int(interval)
+        if minutes and minutes % 60 == 0:
+            return f"{minutes // 60}h"
+        return f"{minutes}m"
+    return interval
+
+
+def _number(alert: dict, *names, default: Optional[float] = None) -> float:
+    """First of `names` present in the alert, as a float ("67,300.92" strings allowed)"""
+    for name in names:
+        value = alert.get(name)
+        if value is None or value == "":
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            number = float(value)
+        else:
+            number = parse_number(str(value))
+        # json.loads takes NaN and Infinity
+        if number is None or not math.isfinite(number):
+            raise AlertError(f"{name} is not a number: {value!r}")
+        return number
+    if default is None:
+        raise AlertError(f"missing {names[0]}")
+    return default
+
+
+def parse_alert(alert: dict, received: float) -> TradingViewSignal:
+    """Alert JSON -> TradingViewSignal; raises AlertError if it is unusable"""
+    symbol = alert.get("symbol") or alert.get("ticker")
+    if not symbol:
+        raise AlertError("missing symbol")
+    price = _number(alert, "price", "close")
+    if price <= 0:
+        raise AlertError(f"bad price: {price}")
+    # No default: a 0 EMA would put every price above it and score a full-strength long
+    ema_9 = _number(alert, "ema_9", "ema")
+    if ema_9 <= 0:
+        raise AlertError(f"bad ema_9: {ema_9}")
+    rsi = _number(alert, "rsi", default=50.0)
+    timeframe = alert.get("timeframe") or alert.get("interval")
+    return TradingViewSignal(
+        price, ema_9, rsi,
+        symbol=normalize_symbol(str(symbol)),
+        timeframe=normalize_timeframe(timeframe) if timeframe else None,
+        received=received,
+    )
+
+
+class WebhookServer:
+    def __init__(self, secret: str = WEBHOOK_SECRET, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT,
+                 path: str = WEBHOOK_PATH, symbols: Optional[Iterable[str]] = None,
+                 maxsize: int = QUEUE_SIZE):
+        """
+        Args:
+            secret: shared secret every alert must carry (required)
+            symbols: only accept alerts for these symbols (default: all)
+            maxsize: queued alerts at most; the oldest is dropped beyond that
+        """
+        if not secret:
+            raise ValueError("WebhookServer needs a shared secret (set WEBHOOK_SECRET)")
+        self._secret = secret.encode()
+        self.host = host
+        self.port = port
+        self.path = path
+        self.symbols = {normalize_symbol(s) for s in symbols} if symbols else None
+        self.signals: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._runner: Optional[web.AppRunner] = None
+        self.stats = {"received": 0, "accepted": 0, "rejected": 0, "invalid": 0, "dropped": 0}
+        self.last_latency = 0.0  # seconds from receipt to get()
+        self.max_latency = 0.0
+
+    def _authorized(self, request: web.Request, alert: dict) -> bool:
+        secret = request.headers.get("X-Webhook-Secret") or alert.get("secret")
+        if not isinstance(secret, str):
+            return False
+        return hmac.compare_digest(secret.encode(), self._secret)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        received = time.perf_counter()
+        self.stats["received"] += 1
+        try:
+            # TradingView posts JSON as text/plain, so don't go by Content-Type
+            alert = json.loads(await request.read())
+            if not isinstance(alert, dict):
+                raise AlertError("alert must be a JSON object")
+        except ValueError as e:
+            self.stats["invalid"] += 1
+            return web.Response(status=400, text=f"bad alert: {e}")
+
+        if not self._authorized(request, alert):
+            self.stats["rejected"] += 1
+            return web.Response(status=401, text="bad secret")
+
+        try:
+            signal = parse_alert(alert, received)
+            if self.symbols is not None and signal.symbol not in self.symbols:
+                raise AlertError(f"unknown symbol {signal.symbol}")
+        except AlertError as e:
+            self.stats["invalid"] += 1
+            return web.Response(status=422, text=str(e))
+
+        self.put(signal)
+        return web.Response(status=202, text="ok")
+
+    def put(self, signal: TradingViewSignal):
+        """Queue a signal, dropping the oldest one if the queue is full"""
+        if self.signals.full():
+            self.signals.get_nowait()
+            self.stats["dropped"] += 1
+        self.signals.put_nowait(signal)
+        self.stats["accepted"] += 1
+
+    def _record(self, signal: TradingViewSignal):
+        latency = time.perf_counter() - signal.received
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        if metrics.enabled():
+            metrics.histogram("webhook_queue").record(int(latency * 1e9))
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[TradingViewSignal]:
+        """Next alert's signal; None if `timeout` seconds pass without one"""
+        if not self.signals.empty():
+            # Backlog: no waiting, and no wait_for task per alert
+            signal = self.signals.get_nowait()
+        elif timeout:
+            try:
+                signal = await asyncio.wait_for(self.signals.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        else:
+            signal = await self.signals.get()
+        self._record(signal)
+        return signal
+
+    async def start(self):
+        app = web.Application(client_max_size=MAX_BODY)
+        app.router.add_post(self.path, self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            # Port 0 asks the OS for a free one
+            self.port = self._runner.addresses[0][1]
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def summary(self) -> dict:
+        return dict(self.stats, queued=self.signals.qsize(),
+                    last_latency_ms=self.last_latency * 1000, max_latency_ms=self.max_latency * 1000)
+
+
+async def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TradingView alert webhook server")
+    parser.add_argument("--host", default=WEBHOOK_HOST)
+    parser.add_argument("--port", type=int, default=WEBHOOK_PORT)
+    args = parser.parse_args()
+
+    async with WebhookServer(host=args.host, port=args.port) as server:
+        print(f"Listening on http://{args.host}:{server.port}{server.path}")
+        while True:
+            signal = await server.get()
+            print(f"{signal.symbol} {signal.timeframe or '-'}: {signal.get_direction()} "
+                  f"(strength {signal.get_strength():.2f}) at ${signal.price:,.2f} "
+                  f"- {server.last_latency * 1000:.3f} ms after receipt")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -9,6 +9,12 @@ Usage:
 Or import and use:
     from x_poster import post_tweet
     post_tweet("Hello from the bot!")
+
+For alerts from the trading loop, use the outbound queue instead
+(post_queue.py): enqueue() never blocks, and a background worker posts
+within the API's rate limits.
+    python3 x_poster.py --queue --message "BTC flipped long"
+    python3 x_poster.py --worker
 """
 
 import os
@@ -33,24 +39,35 @@ CREDENTIALS = {
 # Alternative: Use Selenium or Playwright for browser automation
 # Or use the browser approach we have
 
-def post_tweet(message: str) -> Optional[dict]:
+TWEETS_URL = "https://api.twitter.com/2/tweets"
+TWEET_LIMIT = 280  # characters per post
+POST_TIMEOUT = 15  # seconds
+
+
+def auth_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {CREDENTIALS['bearer_token']}",
+        "Content-Type": "application/json"
+    }
+
+
+def tweet_body(message: str, reply_to: Optional[str] = None) -> dict:
+    data = {"text": message}
+    if reply_to:
+        data["reply"] = {"in_reply_to_tweet_id": reply_to}
+    return data
+
+
+def post_tweet(message: str, reply_to: Optional[str] = None) -> Optional[dict]:
     """
     Post a tweet using X API v2
     
     NOTE: Requires X API Basic tier ($100/month)
     Free tier cannot post tweets.
     """
-    url = "https://api.twitter.com/2/tweets"
-    
-    headers = {
-        "Authorization": f"Bearer {CREDENTIALS['bearer_token']}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {"text": message}
-    
     try:
-        response = requests.post(url, headers=headers, json=data)
+        response = requests.post(TWEETS_URL, headers=auth_headers(), json=tweet_body(message, reply_to),
+                                 timeout=POST_TIMEOUT)
         if response.status_code == 201:
             return response.json()
         else:
@@ -66,14 +83,12 @@ def check_api_tier() -> str:
     Check what API tier the account has
     """
     # Try to post a tweet to see if it works
-    test_url = "https://api.twitter.com/2/tweets"
-    
     headers = {
         "Authorization": f"Bearer {CREDENTIALS['bearer_token']}",
     }
     
     try:
-        response = requests.get(test_url, headers=headers)
+        response = requests.get(TWEETS_URL, headers=headers, timeout=POST_TIMEOUT)
         return f"API Status: {response.status_code}"
     except Exception as e:
         return f"Error: {e}"
@@ -83,13 +98,31 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="X Poster Bot")
-    parser.add_argument("--message", "-m", required=True, help="Tweet message")
+    parser.add_argument("--message", "-m", help="Tweet message")
     parser.add_argument("--check", action="store_true", help="Check API tier")
+    parser.add_argument("--queue", action="store_true", help="Add the message to the outbound queue")
+    parser.add_argument("--worker", action="store_true", help="Post everything in the outbound queue, then exit")
+    parser.add_argument("--mode", choices=["digest", "thread", "single"], default="digest",
+                        help="How the worker coalesces bursts (with --worker)")
     
     args = parser.parse_args()
     
     if args.check:
         print(check_api_tier())
+    elif args.worker:
+        import asyncio
+        from post_queue import PostQueue
+        outbox = PostQueue(mode=args.mode)
+        stats = asyncio.run(outbox.drain())
+        print(f"Outbox: {stats}")
+        outbox.close()
+    elif not args.message:
+        parser.error("--message is required")
+    elif args.queue:
+        from post_queue import PostQueue
+        outbox = PostQueue()
+        print(f"Queued as #{outbox.enqueue(args.message)} ({outbox.pending()} pending)")
+        outbox.close()
     else:
         result = post_tweet(args.message)
         if result: